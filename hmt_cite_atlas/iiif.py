@@ -1,6 +1,9 @@
 from posixpath import join as urljoin
 from urllib.parse import quote_plus, unquote
 
+from .urns import parse_urn
+
+
 # FIXME: iiif3 is a different service
 # IIIF_SUFFIX = "3"
 IIIF_SUFFIX = ""
@@ -27,7 +30,7 @@ class IIIFResolver:
 
     @property
     def munged_image_path(self):
-        image_part = self.urn.rsplit(":", maxsplit=1).pop()
+        image_part = parse_urn(self.urn).passage
         return image_part.replace("_", "-")
 
     @property
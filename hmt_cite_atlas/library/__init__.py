@@ -0,0 +1 @@
+default_app_config = "hmt_cite_atlas.library.apps.LibraryConfig"
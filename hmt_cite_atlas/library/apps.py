@@ -3,18 +3,12 @@ from django.db.backends.signals import connection_created
 
 
 class LibraryConfig(BaseAppConfig):
-    name = "library"
+    name = "hmt_cite_atlas.library"
+    label = "library"
 
+    def ready(self):
+        from .sqlite import configure_connection
 
-def tweak_sqlite_pragma(sender, connection, **kwargs):
-    """
-    Customize PRAGMA settings for SQLite
-    """
-    if connection.vendor == "sqlite":
-        cursor = connection.cursor()
-        cursor.execute("PRAGMA synchronous=OFF;")
-        cursor.execute("PRAGMA cache_size=100000;")
-        cursor.execute("PRAGMA journal_mode=MEMORY;")
-
-
-connection_created.connect(tweak_sqlite_pragma)
+        # Applies the SQLite PRAGMA profile (see `sqlite.PROFILES`) to every
+        # new connection.
+        connection_created.connect(configure_connection)
@@ -0,0 +1,390 @@
+import sys
+import time
+from collections import defaultdict
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils.functional import cached_property
+
+from ..urns import parse_urn
+from .hierarchy import URNHierarchy
+from .models import (
+    Book,
+    CITECollection,
+    CITEDatum,
+    CITEProperty,
+    CTSCatalog,
+    Datamodel,
+    Line,
+    Relation,
+    Scholion,
+    Section
+)
+from .profiling import ImportProfiler
+from .records import Record
+
+
+BATCH_SIZE = 2500
+# Keeps `urn__in` lookups under SQLite's bound parameter limit.
+LOOKUP_BATCH_SIZE = 500
+
+# Models that can be the subject or object of a relation, in the order we
+# try to match a URN against them.
+RELATABLE_MODELS = [Line, Section, Book, CITEDatum]
+
+
+def log(*objs):
+    print(*objs, file=sys.stderr, sep="\n")
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BulkWriter:
+    """
+    Writes unsaved model instances with chunked `bulk_create` calls and keeps
+    track of rows written and time spent per model.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, profiler=None):
+        self.batch_size = batch_size
+        self.profiler = profiler or ImportProfiler(enabled=False)
+        self.stats = {}
+
+    def write(self, model, instances):
+        start = time.perf_counter()
+        written = 0
+        with self.profiler.phase(f"write.{model.__name__}"), transaction.atomic():
+            for chunk in chunked(instances, self.batch_size):
+                # Django splits each chunk further to stay within the limits of
+                # the database backend (e.g. 999 bound parameters on SQLite).
+                model.objects.bulk_create(chunk)
+                written += len(chunk)
+        elapsed = time.perf_counter() - start
+
+        rows, seconds = self.stats.get(model.__name__, (0, 0.0))
+        self.stats[model.__name__] = (rows + written, seconds + elapsed)
+        return written
+
+    def report(self):
+        lines = []
+        for name, (rows, seconds) in self.stats.items():
+            rate = rows / seconds if seconds else 0
+            lines.append(f"{name}: {rows} rows in {seconds:.2f}s ({rate:.0f} rows/s)")
+        return lines
+
+
+class RelationLoader:
+    """
+    Writes #!relations entries as Relation rows with their generic foreign key
+    columns already filled in, in `BulkWriter` batches.
+
+    Subject and object URNs are resolved to (content_type_id, object_id) pairs
+    from `pks`, a {model: {urn: pk}} map of RELATABLE_MODELS (and CITEDatum
+    for verbs); book and passage range objects are expanded through the
+    `URNHierarchy` of the library first.
+    """
+
+    def __init__(self, library_obj, pks, hierarchy, writer=None, problems=None):
+        self.library_obj = library_obj
+        self.pks = pks
+        self.hierarchy = hierarchy
+        self.writer = writer or BulkWriter()
+        self.problems = [] if problems is None else problems
+
+    @cached_property
+    def content_types(self):
+        return {
+            model: ContentType.objects.get_for_model(model).pk
+            for model in RELATABLE_MODELS
+        }
+
+    def add(self, instance):
+        self.pks[type(instance)][instance.urn] = instance.pk
+
+    def get_target(self, urn):
+        """
+        Return a (content_type_id, object_id) pair for `urn`; scholion level
+        URNs are resolved to their lemma or comment section.
+        """
+        for candidate in [urn, f"{urn}.lemma", f"{urn}.comment"]:
+            for model in RELATABLE_MODELS:
+                pk = self.pks[model].get(candidate)
+                if pk is not None:
+                    return self.content_types[model], pk
+        return None
+
+    def resolve(self, urn, obj_kwargs, target):
+        if target is None:
+            self.problems.append(
+                (f"URN (or permutations) not in index: {urn}", obj_kwargs)
+            )
+        return target
+
+    def get_targets(self, obj_kwargs):
+        """
+        Return the subject target, verb pk and (object URN, target) pairs of a
+        relation entry, with None for anything that doesn't resolve.
+        """
+        subject = self.get_target(obj_kwargs["subject_obj"])
+        verb_id = self.pks[CITEDatum].get(obj_kwargs["verb"])
+        objects = [
+            (object_urn, self.get_target(object_urn))
+            for object_urn in self.hierarchy.expand_all(obj_kwargs["object_obj"])
+        ]
+        return subject, verb_id, objects
+
+    def build_relations(self, obj_kwargs, subject, verb_id, objects):
+        for _, obj in objects:
+            if obj is None:
+                continue
+            yield Relation(
+                subject_content_type_id=subject[0],
+                subject_id=subject[1],
+                verb_id=verb_id,
+                object_content_type_id=obj[0],
+                object_id=obj[1],
+                object_at=obj_kwargs["object_at"],
+                citelibrary=self.library_obj,
+            )
+
+    def build(self, entries):
+        for _, obj_kwargs in entries:
+            subject, verb_id, objects = self.get_targets(obj_kwargs)
+            subject = self.resolve(obj_kwargs["subject_obj"], obj_kwargs, subject)
+            verb_id = self.resolve(obj_kwargs["verb"], obj_kwargs, verb_id)
+            if subject is None or verb_id is None:
+                continue
+            for object_urn, obj in objects:
+                self.resolve(object_urn, obj_kwargs, obj)
+            yield from self.build_relations(obj_kwargs, subject, verb_id, objects)
+
+    def split(self, entries):
+        """
+        Resolve each of `entries` once, returning the relations of the entries
+        that fully resolve and the entries that don't (yet), without reporting
+        the latter as problems.
+        """
+        relations, deferred = [], []
+        for entry in entries:
+            obj_kwargs = entry[1]
+            subject, verb_id, objects = self.get_targets(obj_kwargs)
+            resolved = subject is not None and verb_id is not None
+            if resolved and all(obj is not None for _, obj in objects):
+                relations.extend(
+                    self.build_relations(obj_kwargs, subject, verb_id, objects)
+                )
+            else:
+                deferred.append(entry)
+        return relations, deferred
+
+    def write(self, entries):
+        return self.writer.write(Relation, self.build(entries))
+
+
+class BulkVisitor:
+    """
+    Alternative to `Visitor` that resolves the parsed index in dependency order
+    and builds unsaved instances in memory instead of creating objects one at
+    a time:
+
+    libraries -> catalogs / collections -> properties / datamodels -> data ->
+    books / scholia -> lines / sections -> relations
+    """
+
+    def __init__(self, index, library_obj, writer=None, hierarchy=None):
+        self.index = index
+        self.library_obj = library_obj
+        self.writer = writer or BulkWriter()
+        self.hierarchy = hierarchy or URNHierarchy.from_index(index)
+        self.pks = defaultdict(dict)
+        self.books = {}
+        self.scholia = {}
+        self.visited = 0
+        self.problems = []
+
+    @cached_property
+    def relations(self):
+        return RelationLoader(
+            self.library_obj,
+            self.pks,
+            self.hierarchy,
+            writer=self.writer,
+            problems=self.problems,
+        )
+
+    def get_block(self, block):
+        for key, record in self.index.items():
+            if isinstance(record, Record) and record.block == block:
+                yield key, record
+
+    def load_pks(self, model, urns=None):
+        """
+        Update the URN -> pk map for `model`, either for the whole library or
+        only for the given `urns`.
+        """
+        qs = model.objects.filter(citelibrary=self.library_obj).order_by()
+        if urns is None:
+            self.pks[model].update(qs.values_list("urn", "pk"))
+        else:
+            for chunk in chunked(urns, LOOKUP_BATCH_SIZE):
+                self.pks[model].update(
+                    qs.filter(urn__in=chunk).values_list("urn", "pk")
+                )
+        return self.pks[model]
+
+    def write(self, model, instances, urns=None):
+        self.visited += self.writer.write(model, instances)
+        return self.load_pks(model, urns=urns)
+
+    def resolve_fk(self, model, urn, obj_kwargs):
+        pk = self.pks[model].get(urn)
+        if pk is None:
+            self.problems.append(
+                (f"URN (or permutations) not in index: {urn}", obj_kwargs)
+            )
+        return pk
+
+    def build(self, model, entries, **fk_models):
+        for _, record in entries:
+            kwargs = record.as_kwargs(self.library_obj)
+            resolved = True
+            for field, fk_model in fk_models.items():
+                pk = self.resolve_fk(fk_model, kwargs.pop(field), record)
+                if pk is None:
+                    resolved = False
+                    break
+                kwargs[f"{field}_id"] = pk
+            if resolved:
+                yield model(**kwargs)
+
+    def split_hierarchy(self, entries):
+        """
+        Split #!ctsdata entries into lines and sections.
+
+        Books and scholia are implicit in the line and section URNs; they are
+        added to `self.books` and `self.scholia` in order of first appearance.
+        """
+        lines, sections = [], []
+        for urn, record in entries:
+            catalog_urn = record.ctscatalog
+            if self.resolve_fk(CTSCatalog, catalog_urn, record) is None:
+                continue
+            parsed = parse_urn(urn)
+            book_urn = parsed.ancestor(1)
+            self.books.setdefault(book_urn, catalog_urn)
+            if len(parsed.parts) == 2:
+                lines.append((book_urn, record))
+            else:
+                scholion_urn = parsed.ancestor(2)
+                self.scholia.setdefault(scholion_urn, (book_urn, catalog_urn))
+                sections.append((book_urn, scholion_urn, record))
+        return lines, sections
+
+    def build_books(self, start=0):
+        catalog_pks = self.pks[CTSCatalog]
+        for idx, (urn, catalog_urn) in enumerate(self.books.items(), start):
+            yield Book(
+                urn=urn,
+                idx=idx,
+                position=idx + 1,
+                ctscatalog_id=catalog_pks[catalog_urn],
+                citelibrary=self.library_obj,
+            )
+
+    def build_scholia(self, start=0):
+        book_pks = self.pks[Book]
+        catalog_pks = self.pks[CTSCatalog]
+        for idx, (urn, (book_urn, catalog_urn)) in enumerate(
+            self.scholia.items(), start
+        ):
+            yield Scholion(
+                urn=urn,
+                idx=idx,
+                position=idx + 1,
+                book_id=book_pks[book_urn],
+                ctscatalog_id=catalog_pks[catalog_urn],
+                citelibrary=self.library_obj,
+            )
+
+    def build_lines(self, lines):
+        book_pks = self.pks[Book]
+        catalog_pks = self.pks[CTSCatalog]
+        for book_urn, record in lines:
+            yield Line(
+                urn=record.urn,
+                text_content=record.text_content,
+                idx=record.idx,
+                position=record.position,
+                book_id=book_pks[book_urn],
+                ctscatalog_id=catalog_pks[record.ctscatalog],
+                citelibrary=self.library_obj,
+            )
+
+    def build_sections(self, sections):
+        book_pks = self.pks[Book]
+        scholion_pks = self.pks[Scholion]
+        catalog_pks = self.pks[CTSCatalog]
+        for book_urn, scholion_urn, record in sections:
+            yield Section(
+                urn=record.urn,
+                text_content=record.text_content,
+                idx=record.idx,
+                position=record.position,
+                book_id=book_pks[book_urn],
+                scholion_id=scholion_pks[scholion_urn],
+                ctscatalog_id=catalog_pks[record.ctscatalog],
+                citelibrary=self.library_obj,
+            )
+
+    def apply_headers(self):
+        """
+        Write the (small) header blocks that everything else depends on.
+        """
+        self.write(CTSCatalog, self.build(CTSCatalog, self.get_block("#!ctscatalog")))
+        self.write(
+            CITECollection,
+            self.build(CITECollection, self.get_block("#!citecollections")),
+        )
+        self.write(
+            CITEProperty,
+            self.build(
+                CITEProperty,
+                self.get_block("#!citeproperties"),
+                citecollection=CITECollection,
+            ),
+        )
+        self.write(
+            Datamodel,
+            self.build(
+                Datamodel, self.get_block("#!datamodels"), citecollection=CITECollection
+            ),
+        )
+
+    def apply(self):
+        print("BulkVisitor.apply")
+        self.apply_headers()
+        self.write(
+            CITEDatum,
+            self.build(
+                CITEDatum, self.get_block("#!citedata"), citecollection=CITECollection
+            ),
+        )
+
+        lines, sections = self.split_hierarchy(self.get_block("#!ctsdata"))
+        self.write(Book, self.build_books())
+        self.write(Scholion, self.build_scholia())
+        self.write(Line, self.build_lines(lines))
+        self.write(Section, self.build_sections(sections))
+
+        self.visited += self.relations.write(self.get_block("#!relations"))
+
+        log(*self.writer.report())
+        return self.visited, self.problems
@@ -0,0 +1,132 @@
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+import time
+
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Bytes of decompressed data read (and decoded) at a time.
+CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def open_zstd(raw):
+    if zstandard is None:
+        raise ImportError("Reading .zst files requires the zstandard package")
+    return zstandard.ZstdDecompressor().stream_reader(raw)
+
+
+# File suffix -> function wrapping a binary file in a decompressing reader.
+DECOMPRESSORS = {
+    ".gz": lambda raw: gzip.GzipFile(fileobj=raw, mode="rb"),
+    ".bz2": lambda raw: bz2.BZ2File(raw, mode="rb"),
+    ".xz": lambda raw: lzma.LZMAFile(raw, mode="rb"),
+    ".zst": open_zstd,
+}
+
+
+def get_compression(path):
+    """
+    Return the suffix of a compressed file, or None.
+    """
+    for suffix in DECOMPRESSORS:
+        if str(path).endswith(suffix):
+            return suffix
+    return None
+
+
+class CountingReader(io.RawIOBase):
+    """
+    Wraps a binary file and counts the bytes read from it.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        read = self.raw.readinto(buffer)
+        self.bytes_read += read or 0
+        return read
+
+
+class CEXStream:
+    """
+    Iterates over the lines of a (plain, gzip, bz2, xz or zstd compressed)
+    CEX file, selected by its suffix:
+
+    with CEXStream("hmt-2020h.cex.xz") as stream:
+        for line in stream:
+            ...
+
+    Compressed files are decompressed and decoded in CHUNK_BYTES chunks while
+    they are read, without writing the decompressed file anywhere.
+    `bytes_read` counts the bytes read from disk, `bytes_decoded` the
+    (decompressed) bytes decoded from UTF-8 and `decode_time` the seconds
+    spent decompressing and decoding.
+    """
+
+    def __init__(self, path, chunk_bytes=CHUNK_BYTES):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.compression = get_compression(path)
+        self.bytes_decoded = 0
+        self.decode_time = 0.0
+        self._raw = None
+        self._stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def bytes_read(self):
+        return self._raw.bytes_read if self._raw is not None else 0
+
+    def open(self):
+        self._raw = CountingReader(open(self.path, "rb"))
+        if self.compression:
+            self._stream = DECOMPRESSORS[self.compression](self._raw)
+        else:
+            self._stream = self._raw
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+        if self._raw is not None:
+            self._raw.raw.close()
+        self._stream = None
+
+    def read(self, decoder):
+        started = time.perf_counter()
+        chunk = self._stream.read(self.chunk_bytes)
+        text = decoder.decode(chunk, final=not chunk)
+        self.decode_time += time.perf_counter() - started
+        self.bytes_decoded += len(chunk)
+        return chunk, text
+
+    def __iter__(self):
+        if self._stream is None:
+            self.open()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        pending = ""
+        while True:
+            chunk, text = self.read(decoder)
+            if not chunk:
+                break
+            lines = (pending + text).split("\n")
+            pending = lines.pop()
+            yield from lines
+        if pending:
+            yield pending
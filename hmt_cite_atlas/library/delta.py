@@ -0,0 +1,411 @@
+import hashlib
+import json
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from .bulk import RELATABLE_MODELS, BulkVisitor, RelationLoader, chunked, log
+from .models import (
+    Book,
+    CITECollection,
+    CITEDatum,
+    CITELibrary,
+    CITEProperty,
+    CTSCatalog,
+    Datamodel,
+    Line,
+    RecordFingerprint,
+    Relation,
+    Scholion,
+    Section
+)
+
+
+LOOKUP_BATCH_SIZE = 500
+
+# Blocks in dependency order, with the models their records are written to and
+# the foreign keys that have to be resolved for them; #!relations are applied
+# once everything they can refer to is in place.
+DELTA_BLOCKS = [
+    ("#!ctscatalog", CTSCatalog, {}),
+    ("#!citecollections", CITECollection, {}),
+    ("#!citeproperties", CITEProperty, {"citecollection": CITECollection}),
+    ("#!datamodels", Datamodel, {"citecollection": CITECollection}),
+    ("#!citedata", CITEDatum, {"citecollection": CITECollection}),
+    ("#!ctsdata", None, {}),
+]
+
+
+def get_fingerprint_key(key):
+    if isinstance(key, tuple):
+        return json.dumps(key, ensure_ascii=False)
+    return key
+
+
+def get_digest(block, key, record):
+    payload = json.dumps(
+        [block, key, record], sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def get_library(data):
+    """
+    Return the library a release is applied to: the one with the same URN or,
+    for a new release, the one named by `previous_urn` in its metadata entry.
+
+    Libraries that were imported without fingerprints are emptied first, as
+    there is nothing to compare their contents against.
+    """
+    library_obj = CITELibrary()
+    for urn in [data.get("previous_urn"), data["urn"]]:
+        library_obj = CITELibrary.objects.filter(urn=urn).first() or library_obj
+    library_obj.urn = data["urn"]
+    library_obj.name = data["metadata"]["library_title"]
+    library_obj.metadata = data["metadata"]
+    library_obj.save()
+
+    if not library_obj.fingerprints.exists():
+        for model in [Relation, CTSCatalog, CITECollection]:
+            model.objects.filter(citelibrary=library_obj).delete()
+    return library_obj
+
+
+def get_update_fields(model):
+    return [
+        field.attname
+        for field in model._meta.concrete_fields
+        if not field.primary_key and field.name != "citelibrary"
+    ]
+
+
+class DeltaVisitor(BulkVisitor):
+    """
+    Applies a new release of a library on top of the one that is already
+    imported.
+
+    Every parsed record is fingerprinted (block, key and normalized field
+    values) and compared against the `RecordFingerprint` rows stored by the
+    previous delta import. Only the records that were inserted, updated or
+    deleted are written; books and scholia follow the lines and sections that
+    make them up.
+
+    Relations are fingerprinted over the lines / sections they expand to, so
+    a range whose contents change is rewritten as well.
+    """
+
+    def __init__(self, index, library_obj, writer=None, hierarchy=None):
+        super().__init__(index, library_obj, writer=writer, hierarchy=hierarchy)
+        self.fingerprints = {}
+        self.changes = defaultdict(Counter)
+        # URNs of books and scholia that were created or pruned.
+        self.touched = set()
+        # {block: (inserted, updated, deleted)} fingerprint keys, once applied.
+        self.changed_keys = {}
+
+    def normalize(self, block, record):
+        record = dict(record)
+        if block == "#!relations":
+            record["object_obj"] = self.hierarchy.expand_all(record["object_obj"])
+        return record
+
+    def get_fingerprints(self):
+        fingerprints = {}
+        for key, data in self.index.items():
+            block = data.block
+            record = self.normalize(block, data)
+            fingerprint_key = get_fingerprint_key(key)
+            fingerprints[block, fingerprint_key] = (
+                get_digest(block, fingerprint_key, record),
+                key,
+                record,
+            )
+        return fingerprints
+
+    def get_stored_fingerprints(self):
+        qs = RecordFingerprint.objects.filter(citelibrary=self.library_obj)
+        return {
+            (block, key): digest
+            for block, key, digest in qs.values_list("block", "key", "digest")
+        }
+
+    def get_stored_relations(self, keys):
+        qs = RecordFingerprint.objects.filter(
+            citelibrary=self.library_obj, block="#!relations"
+        )
+        for chunk in chunked(keys, LOOKUP_BATCH_SIZE):
+            yield from qs.filter(key__in=chunk).values_list("key", "data")
+
+    def diff(self, stored):
+        """
+        Return {block: (inserted, updated, deleted)} sets of fingerprint keys.
+        """
+        diff = defaultdict(lambda: (set(), set(), set()))
+        for (block, key), (digest, _, _) in self.fingerprints.items():
+            if (block, key) not in stored:
+                diff[block][0].add(key)
+            elif stored[block, key] != digest:
+                diff[block][1].add(key)
+        for block, key in stored:
+            if (block, key) not in self.fingerprints:
+                diff[block][2].add(key)
+        return diff
+
+    def get_entries(self, block, keys):
+        for key in keys:
+            _, entry_key, _ = self.fingerprints[block, key]
+            yield entry_key, self.index[entry_key]
+
+    def get_relation_urns(self, record):
+        urns = set()
+        for urn in [record["subject_obj"], *record["object_obj"]]:
+            urns.update([urn, f"{urn}.lemma", f"{urn}.comment"])
+        return urns
+
+    def load_relation_targets(self, records):
+        urns = set()
+        for record in records:
+            urns |= self.get_relation_urns(record)
+        for model in RELATABLE_MODELS:
+            self.load_pks(model, urns=urns)
+
+    def get_touched_relations(self, diff):
+        """
+        Unchanged relations that refer to a record that was just inserted or
+        deleted (and so could not be resolved, or is gone).
+        """
+        touched = set(self.touched)
+        for block in ["#!ctsdata", "#!citedata"]:
+            inserted, _, deleted = diff.get(block, (set(), set(), set()))
+            touched |= inserted | deleted
+        if not touched:
+            return set()
+
+        inserted, updated, _ = diff.get("#!relations", (set(), set(), set()))
+        changed = inserted | updated
+        relations = set()
+        for (block, key), (_, _, record) in self.fingerprints.items():
+            if block != "#!relations" or key in changed:
+                continue
+            if record["verb"] in touched or self.get_relation_urns(record) & touched:
+                relations.add(key)
+        return relations
+
+    def delete_relations(self, keys):
+        records = [record for _, record in self.get_stored_relations(keys)]
+        self.load_relation_targets(records)
+        self.load_pks(CITEDatum, urns=[record["verb"] for record in records])
+
+        # Don't report relations that can't be resolved any more as problems.
+        loader = RelationLoader(
+            self.library_obj, self.pks, self.hierarchy, writer=self.writer
+        )
+        deleted = 0
+        for relation in loader.build((None, record) for record in records):
+            deleted += (
+                Relation.objects.filter(
+                    subject_content_type_id=relation.subject_content_type_id,
+                    subject_id=relation.subject_id,
+                    verb_id=relation.verb_id,
+                    object_content_type_id=relation.object_content_type_id,
+                    object_id=relation.object_id,
+                    object_at=relation.object_at,
+                    citelibrary=self.library_obj,
+                )
+                .delete()[1]
+                .get(Relation._meta.label, 0)
+            )
+        return deleted
+
+    def delete_records(self, model, urns):
+        deleted = 0
+        qs = model.objects.filter(citelibrary=self.library_obj)
+        for chunk in chunked(urns, LOOKUP_BATCH_SIZE):
+            deleted += qs.filter(urn__in=chunk).delete()[1].get(model._meta.label, 0)
+        return deleted
+
+    def update_records(self, model, instances):
+        instances = list(instances)
+        for instance in instances:
+            instance.pk = self.pks[model][instance.urn]
+        model.objects.bulk_update(
+            instances, get_update_fields(model), batch_size=self.writer.batch_size
+        )
+        return len(instances)
+
+    def apply_block(self, block, model, fk_models, inserted, updated):
+        for fk_model in fk_models.values():
+            self.load_pks(fk_model)
+        self.load_pks(model, urns=updated)
+        self.write(
+            model,
+            self.build(model, self.get_entries(block, inserted), **fk_models),
+            urns=inserted,
+        )
+        self.update_records(
+            model, self.build(model, self.get_entries(block, updated), **fk_models)
+        )
+
+    def get_hierarchy_order(self, model):
+        urns = self.hierarchy.books if model is Book else self.hierarchy.scholia
+        return {urn: idx for idx, urn in enumerate(urns)}
+
+    def apply_hierarchy(self, inserted, updated):
+        """
+        Write changed lines and sections, along with any books and scholia
+        they introduce, then prune and reorder books and scholia.
+        """
+        self.load_pks(CTSCatalog)
+        self.load_pks(Line, urns=updated)
+        self.load_pks(Section, urns=updated)
+
+        entries = list(self.get_entries("#!ctsdata", inserted | updated))
+        lines, sections = self.split_hierarchy(entries)
+        for model, build in [(Book, self.build_books), (Scholion, self.build_scholia)]:
+            self.load_pks(
+                model, urns=list(self.books if model is Book else self.scholia)
+            )
+            order = self.get_hierarchy_order(model)
+            new = []
+            for instance in build():
+                if instance.urn not in self.pks[model]:
+                    instance.idx = order[instance.urn]
+                    instance.position = instance.idx + 1
+                    new.append(instance)
+            urns = [instance.urn for instance in new]
+            self.write(model, new, urns=urns)
+            self.touched.update(urns)
+            self.changes[model.__name__]["inserted"] += len(urns)
+
+        for model, built in [
+            (Line, self.build_lines(lines)),
+            (Section, self.build_sections(sections)),
+        ]:
+            new, changed = [], []
+            for instance in built:
+                (changed if instance.urn in self.pks[model] else new).append(instance)
+            self.write(model, new, urns=[instance.urn for instance in new])
+            self.update_records(model, changed)
+
+        for model, children in [
+            (Scholion, ["sections"]),
+            (Book, ["lines", "sections"]),
+        ]:
+            # Unordered: `idx` is what's being rewritten here.
+            qs = model.objects.filter(citelibrary=self.library_obj).order_by()
+            orphans = qs.filter(**{f"{child}__isnull": True for child in children})
+            self.touched.update(orphans.values_list("urn", flat=True))
+            self.changes[model.__name__]["deleted"] += orphans.delete()[1].get(
+                model._meta.label, 0
+            )
+
+            order = self.get_hierarchy_order(model)
+            moved = []
+            for pk, urn, idx in qs.values_list("pk", "urn", "idx"):
+                if order.get(urn, idx) != idx:
+                    moved.append(model(pk=pk, idx=order[urn], position=order[urn] + 1))
+            model.objects.bulk_update(moved, ["idx", "position"])
+            self.changes[model.__name__]["updated"] += len(moved)
+
+    def apply_relations(self, keys):
+        entries = list(self.get_entries("#!relations", keys))
+        self.load_relation_targets(
+            self.fingerprints["#!relations", key][2] for key in keys
+        )
+        self.load_pks(CITEDatum, urns=[obj_kwargs["verb"] for _, obj_kwargs in entries])
+        self.visited += self.relations.write(entries)
+
+    def store_fingerprints(self, diff):
+        qs = RecordFingerprint.objects.filter(citelibrary=self.library_obj)
+        instances = []
+        for block, (inserted, updated, deleted) in diff.items():
+            for chunk in chunked(updated | deleted, LOOKUP_BATCH_SIZE):
+                qs.filter(block=block, key__in=chunk).delete()
+            for key in inserted | updated:
+                digest, _, record = self.fingerprints[block, key]
+                instances.append(
+                    RecordFingerprint(
+                        block=block,
+                        key=key,
+                        digest=digest,
+                        data=record if block == "#!relations" else None,
+                        citelibrary=self.library_obj,
+                    )
+                )
+        self.writer.write(RecordFingerprint, instances)
+
+    def get_changed_urns(self):
+        """
+        Return the URNs of the CITE data this import inserted or updated and of
+        the lines and sections it inserted or deleted, or None if it changed a
+        catalog, collection, property or datamodel (which everything derived
+        from the library depends on).
+        """
+        empty = (set(), set(), set())
+        for block, _, _ in DELTA_BLOCKS:
+            if block not in ["#!citedata", "#!ctsdata"] and any(
+                self.changed_keys.get(block, empty)
+            ):
+                return None
+        inserted, updated, _ = self.changed_keys.get("#!citedata", empty)
+        urns = inserted | updated
+        inserted, _, deleted = self.changed_keys.get("#!ctsdata", empty)
+        return urns | inserted | deleted
+
+    def report(self):
+        lines = []
+        for name, counts in self.changes.items():
+            summary = ", ".join(
+                f"{counts[change]} {change}"
+                for change in ["inserted", "updated", "deleted"]
+            )
+            lines.append(f"{name}: {summary}")
+        blocks = [block for block, _, _ in DELTA_BLOCKS] + ["#!relations"]
+        unchanged = len(self.fingerprints) - sum(
+            self.changes[block]["inserted"] + self.changes[block]["updated"]
+            for block in blocks
+        )
+        lines.append(f"{unchanged} records unchanged")
+        return lines
+
+    def apply(self):
+        print("DeltaVisitor.apply")
+        self.fingerprints = self.get_fingerprints()
+        diff = self.changed_keys = self.diff(self.get_stored_fingerprints())
+        for block, (inserted, updated, deleted) in diff.items():
+            self.changes[block].update(
+                inserted=len(inserted), updated=len(updated), deleted=len(deleted)
+            )
+        empty = (set(), set(), set())
+
+        with transaction.atomic():
+            # Relations go first, while everything they refer to still exists.
+            _, relations_updated, relations_deleted = diff.get("#!relations", empty)
+            self.delete_relations(relations_updated | relations_deleted)
+
+            for block, model, _ in reversed(DELTA_BLOCKS):
+                _, _, deleted = diff.get(block, empty)
+                if block == "#!ctsdata":
+                    self.delete_records(Line, deleted)
+                    self.delete_records(Section, deleted)
+                else:
+                    self.delete_records(model, deleted)
+
+            for block, model, fk_models in DELTA_BLOCKS:
+                inserted, updated, deleted = diff.get(block, empty)
+                if block == "#!ctsdata":
+                    if inserted or updated or deleted:
+                        self.apply_hierarchy(inserted, updated)
+                elif inserted or updated:
+                    self.apply_block(block, model, fk_models, inserted, updated)
+
+            touched = self.get_touched_relations(diff)
+            self.delete_relations(touched)
+            relations_inserted, _, _ = diff.get("#!relations", empty)
+            self.apply_relations(relations_inserted | relations_updated | touched)
+
+            self.store_fingerprints(diff)
+
+        log(*self.report())
+        log(*self.writer.report())
+        return self.visited, self.problems
@@ -0,0 +1,157 @@
+from django.db import transaction
+from django.db.models import Q
+
+from ..urns import parse_urn
+from .bulk import LOOKUP_BATCH_SIZE, BulkWriter, chunked
+from .models import CITECollection, CITEDatum, DSERecord, Line, Scholion
+
+
+DSE_DATAMODEL_URN = "urn:cite2:cite:datamodels.v1:dse"
+
+# Properties of a DSE collection, by the name they are suffixed with.
+DSE_PROPERTIES = ["label", "passage", "imageroi", "surface"]
+
+
+def get_property_urn(collection_urn, name):
+    """
+    get_property_urn("urn:cite2:hmt:va_dse.v1:", "passage")
+    -> "urn:cite2:hmt:va_dse.v1.passage:"
+    """
+    return f"{collection_urn.rstrip(':')}.{name}:"
+
+
+def parse_image_roi(value):
+    """
+    Split an image URN into the image URN and the (x, y, w, h) floats of its
+    region of interest (its subreference), if it has a well-formed one:
+
+    parse_image_roi("urn:cite2:hmt:vaimg.2017a:VA012RN_0013@0.1,0.2,0.3,0.04")
+    -> ("urn:cite2:hmt:vaimg.2017a:VA012RN_0013", [0.1, 0.2, 0.3, 0.04])
+    """
+    try:
+        urn = parse_urn(value)
+    except ValueError:
+        return value, [None] * 4
+    try:
+        coords = [float(part) for part in (urn.subreference or "").split(",")]
+    except ValueError:
+        coords = []
+    if len(coords) != 4:
+        coords = [None] * 4
+    return f"{urn.root}{urn.reference}", coords
+
+
+class DSEMaterializer:
+    """
+    Rebuilds the `DSERecord` rows of a library from the CITEData of its DSE
+    collections (the collections with a DSE_DATAMODEL_URN datamodel):
+
+    DSEMaterializer(library_obj).apply()
+
+    Surfaces, lines and scholia are resolved against the library with chunked
+    `urn__in` lookups. Records whose surface or passage doesn't resolve are
+    kept, with a null foreign key; records without a passage or image are
+    counted in `skipped`.
+
+    After a delta import `apply(urns)` only rebuilds the records that can have
+    changed (see `get_stale_pks`).
+    """
+
+    model = DSERecord
+
+    def __init__(self, library_obj, writer=None):
+        self.library_obj = library_obj
+        self.writer = writer or BulkWriter()
+        self.skipped = 0
+
+    def get_collections(self):
+        return CITECollection.objects.filter(
+            citelibrary=self.library_obj, datamodels__urn=DSE_DATAMODEL_URN
+        ).distinct()
+
+    def load_pks(self, model, urns):
+        qs = model.objects.filter(citelibrary=self.library_obj).order_by()
+        pks = {}
+        for chunk in chunked(set(urns), LOOKUP_BATCH_SIZE):
+            pks.update(qs.filter(urn__in=chunk).values_list("urn", "pk"))
+        return pks
+
+    def get_stale_pks(self, collection, urns):
+        """
+        Return the pks of the CITE data of `collection` whose record has to be
+        rebuilt after a delta import that changed `urns`: the ones in `urns`,
+        the ones without a record (e.g. as the line it pointed at was deleted)
+        and the ones whose surface or passage didn't resolve.
+        """
+        data = CITEDatum.objects.filter(citecollection=collection).order_by()
+        unresolved = Q(dse_record__isnull=True) | Q(dse_record__surface__isnull=True)
+        unresolved |= Q(dse_record__line__isnull=True, dse_record__scholion__isnull=True)
+        pks = set(data.filter(unresolved).values_list("pk", flat=True))
+        for chunk in chunked(urns, LOOKUP_BATCH_SIZE):
+            pks.update(data.filter(urn__in=chunk).values_list("pk", flat=True))
+        return pks
+
+    def get_data(self, collection, pks=None):
+        data = CITEDatum.objects.filter(citecollection=collection).order_by("pk")
+        if pks is None:
+            yield from data.values_list("pk", "urn", "fields")
+            return
+        for chunk in chunked(sorted(pks), LOOKUP_BATCH_SIZE):
+            yield from data.filter(pk__in=chunk).values_list("pk", "urn", "fields")
+
+    def get_rows(self, collection, pks=None):
+        property_urns = {
+            name: get_property_urn(collection.urn, name) for name in DSE_PROPERTIES
+        }
+        for pk, urn, fields in self.get_data(collection, pks):
+            row = {name: fields.get(urn) for name, urn in property_urns.items()}
+            if not (row["passage"] and row["imageroi"]):
+                self.skipped += 1
+                continue
+            row.update(datum_id=pk, urn=urn)
+            yield row
+
+    def build(self, rows):
+        surfaces = self.load_pks(CITEDatum, [row["surface"] for row in rows])
+        passages = [row["passage"] for row in rows]
+        lines = self.load_pks(Line, passages)
+        scholia = self.load_pks(Scholion, passages)
+        for row in rows:
+            image_urn, (x, y, w, h) = parse_image_roi(row["imageroi"])
+            yield DSERecord(
+                urn=row["urn"],
+                label=row["label"],
+                passage=row["passage"],
+                image_urn=image_urn,
+                roi_x=x,
+                roi_y=y,
+                roi_w=w,
+                roi_h=h,
+                datum_id=row["datum_id"],
+                surface_id=surfaces.get(row["surface"]),
+                line_id=lines.get(row["passage"]),
+                scholion_id=scholia.get(row["passage"]),
+                citelibrary=self.library_obj,
+            )
+
+    def apply(self, urns=None):
+        """
+        Rebuild the records of the library or, given the `urns` a delta import
+        changed (see `DeltaVisitor.get_changed_urns`), only the stale ones.
+        """
+        if urns is not None and not urns:
+            return 0
+        written = 0
+        with transaction.atomic():
+            records = DSERecord.objects.filter(citelibrary=self.library_obj)
+            if urns is None:
+                records.delete()
+            for collection in self.get_collections():
+                pks = None
+                if urns is not None:
+                    pks = self.get_stale_pks(collection, urns)
+                    for chunk in chunked(pks, LOOKUP_BATCH_SIZE):
+                        records.filter(datum_id__in=chunk).delete()
+                rows = list(self.get_rows(collection, pks))
+                written += self.writer.write(DSERecord, self.build(rows))
+        return written
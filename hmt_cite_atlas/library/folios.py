@@ -0,0 +1,97 @@
+from django.db import transaction
+
+from .bulk import LOOKUP_BATCH_SIZE, BulkWriter, chunked
+from .models import CITECollection, CITEDatum, Folio
+
+
+# Collections of codex pages, ordered by their ordering property.
+FOLIO_COLLECTIONS = ["urn:cite2:hmt:msA.v1:"]
+
+
+def get_ordinal(value):
+    """
+    get_ordinal("12") -> 12; get_ordinal("") -> None
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FolioMaterializer:
+    """
+    Rebuilds the `Folio` rows of a library from the CITEData of its
+    FOLIO_COLLECTIONS, with the value of the ordering property of each
+    collection (e.g. `urn:cite2:hmt:msA.v1.sequence:`) as the ordinal:
+
+    FolioMaterializer(library_obj).apply()
+
+    Pages without an integer ordinal are counted in `skipped`. After a delta
+    import `apply(urns)` only rebuilds the pages in `urns` and the ones that
+    had no ordinal.
+    """
+
+    model = Folio
+
+    def __init__(self, library_obj, writer=None):
+        self.library_obj = library_obj
+        self.writer = writer or BulkWriter()
+        self.skipped = 0
+
+    def get_collections(self):
+        return CITECollection.objects.filter(
+            citelibrary=self.library_obj, urn__in=FOLIO_COLLECTIONS
+        )
+
+    def get_stale_pks(self, collection, urns):
+        data = CITEDatum.objects.filter(citecollection=collection).order_by()
+        pks = set(data.filter(folio__isnull=True).values_list("pk", flat=True))
+        for chunk in chunked(urns, LOOKUP_BATCH_SIZE):
+            pks.update(data.filter(urn__in=chunk).values_list("pk", flat=True))
+        return pks
+
+    def get_data(self, collection, pks=None):
+        data = CITEDatum.objects.filter(citecollection=collection).order_by("pk")
+        if pks is None:
+            yield from data.values_list("pk", "urn", "fields")
+            return
+        for chunk in chunked(sorted(pks), LOOKUP_BATCH_SIZE):
+            yield from data.filter(pk__in=chunk).values_list("pk", "urn", "fields")
+
+    def build(self, collection, pks=None):
+        ordering_property = collection.ordering_property
+        if ordering_property is None:
+            return
+        for pk, urn, fields in self.get_data(collection, pks):
+            ordinal = get_ordinal(fields.get(ordering_property.urn))
+            if ordinal is None:
+                self.skipped += 1
+                continue
+            yield Folio(
+                urn=urn,
+                ordinal=ordinal,
+                datum_id=pk,
+                citecollection=collection,
+                citelibrary=self.library_obj,
+            )
+
+    def apply(self, urns=None):
+        """
+        Rebuild the pages of the library or, given the `urns` a delta import
+        changed (see `DeltaVisitor.get_changed_urns`), only the stale ones.
+        """
+        if urns is not None and not urns:
+            return 0
+        written = 0
+        with transaction.atomic():
+            folios = Folio.objects.filter(citelibrary=self.library_obj)
+            if urns is None:
+                folios.delete()
+            for collection in self.get_collections():
+                pks = None
+                if urns is not None:
+                    pks = self.get_stale_pks(collection, urns)
+                    for chunk in chunked(pks, LOOKUP_BATCH_SIZE):
+                        folios.filter(datum_id__in=chunk).delete()
+                written += self.writer.write(Folio, self.build(collection, pks))
+        return written
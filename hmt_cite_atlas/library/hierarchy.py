@@ -0,0 +1,91 @@
+from ..urns import parse_urn
+
+
+class URNHierarchy:
+    """
+    version -> book -> leaf index of the #!ctsdata URNs of a library, built
+    once while parsing.
+
+    Expanding a book, scholion or passage range URN into its lines / sections
+    is a direct lookup that returns URNs in document order:
+
+    hierarchy.expand("urn:cts:greekLit:tlg0012.tlg001.msA:1")
+    hierarchy.expand("urn:cts:greekLit:tlg0012.tlg001.msA:1.13-1.14")
+    hierarchy.expand("urn:cts:greekLit:tlg5026.msA.hmt:1.1")
+    """
+
+    def __init__(self):
+        # version URN -> leaf URNs in document order
+        self.leaves = {}
+        # leaf URN -> position within its version
+        self.positions = {}
+        # book / scholion URN -> leaf URNs in document order
+        self.books = {}
+        self.scholia = {}
+
+    @classmethod
+    def from_index(cls, index):
+        hierarchy = cls()
+        for key, record in index.items():
+            if getattr(record, "block", None) == "#!ctsdata":
+                hierarchy.add(key)
+        return hierarchy
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, urn):
+        return urn in self.positions
+
+    def add(self, urn):
+        if urn in self.positions:
+            return
+        try:
+            parsed = parse_urn(urn)
+        except ValueError:
+            # Can't be expanded into (or be part of) a range.
+            return
+
+        leaves = self.leaves.setdefault(parsed.root, [])
+        self.positions[urn] = len(leaves)
+        leaves.append(urn)
+
+        self.books.setdefault(parsed.ancestor(1), []).append(urn)
+        if len(parsed.parts) > 2:
+            self.scholia.setdefault(parsed.ancestor(2), []).append(urn)
+
+    def expand_range(self, urn):
+        try:
+            parsed = parse_urn(urn)
+        except ValueError:
+            return None
+        if not parsed.is_range:
+            return None
+        start, end = (
+            self.positions.get(endpoint) for endpoint in parsed.endpoint_urns
+        )
+        if start is None or end is None or start > end:
+            return None
+        leaves = self.leaves[parsed.root]
+        return leaves[start:end + 1]
+
+    def expand(self, urn):
+        """
+        Return the leaf URNs `urn` refers to, or None if it can't be resolved.
+        """
+        if urn in self.positions:
+            return [urn]
+        if urn in self.books:
+            return list(self.books[urn])
+        if urn in self.scholia:
+            return list(self.scholia[urn])
+        return self.expand_range(urn)
+
+    def expand_all(self, urns):
+        """
+        Expand each of `urns`, keeping those that can't be resolved as they are.
+        """
+        expanded = []
+        for urn in urns:
+            expanded.extend(self.expand(urn) or [urn])
+        return expanded
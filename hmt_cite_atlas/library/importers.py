@@ -1,15 +1,46 @@
 import json
 import os
 import sys
-from functools import cache
+from contextlib import nullcontext
 
 from django.conf import settings
+from django.db import transaction
 
 import case_conversion
 import tqdm
 
+from ..urns import parse_urn
 from . import constants, factories
-from .models import CITELibrary, Line, Section
+from .bulk import BulkVisitor, BulkWriter, RelationLoader
+from .compression import CEXStream, get_compression
+from .dse import DSEMaterializer
+from .folios import FolioMaterializer
+from .hierarchy import URNHierarchy
+from .models import (
+    Book,
+    CITECollection,
+    CITEDatum,
+    CITELibrary,
+    CITEProperty,
+    CTSCatalog,
+    Datamodel,
+    ImportCheckpoint,
+    Line,
+    Scholion,
+    Section
+)
+from .profiling import ImportProfiler
+from .records import (
+    CiteDatum,
+    CiteRelation,
+    CtsPassage,
+    HeaderRecord,
+    Record,
+    intern
+)
+from .registry import URNRegistry
+from .reset import reset_libraries
+from .sqlite import connection_profile, deferred_indexes, restore_indexes
 
 
 LIBRARY_DATA_PATH = os.path.join(settings.PROJECT_ROOT, "data", "library")
@@ -17,30 +48,57 @@ LIBRARY_METADATA_PATH = os.path.join(LIBRARY_DATA_PATH, "metadata.json")
 
 IGNORE_BLOCKS = ["#!cexversion", "#!citelibrary", "#!imagedata"]
 
+# Index keys `Visitor` resolves per transaction (and checkpoint).
+CHECKPOINT_SIZE = 1000
+
+# Tables derived from the CITE data of a library, rebuilt after each import
+# (only the rows that depend on what a delta import changed).
+MATERIALIZERS = [FolioMaterializer, DSEMaterializer]
+
+# Models an import resumed by `Visitor` looks up the existing objects of.
+RESUMED_MODELS = [
+    CITECollection,
+    CITEProperty,
+    CITEDatum,
+    CTSCatalog,
+    Datamodel,
+    Book,
+    Scholion,
+    Line,
+    Section,
+]
+
 
 def log(*objs):
     print(*objs, file=sys.stderr, sep="\n")
 
 
 class Visitor:
-    def __init__(self, index):
+    def __init__(
+        self, index, library_obj=None, hierarchy=None, profiler=None, checkpoint=None
+    ):
         self.keys = tuple(index.keys())
         self.index = index
+        self.library_obj = library_obj
+        self.hierarchy = hierarchy or URNHierarchy.from_index(index)
+        self.profiler = profiler or ImportProfiler(enabled=False)
+        self.registry = URNRegistry()
         self.factory_lookup = {
-            "#!citecollections": factories.CITECollectionFactory(),
-            "#!citeproperties": factories.CITEPropertyFactory(),
-            "#!citedata": factories.CITEDatumFactory(),
-            "#!ctscatalog": factories.CTSCatalogFactory(),
+            "#!citecollections": factories.CITECollectionFactory(self.registry),
+            "#!citeproperties": factories.CITEPropertyFactory(self.registry),
+            "#!citedata": factories.CITEDatumFactory(self.registry),
+            "#!ctscatalog": factories.CTSCatalogFactory(self.registry),
             "#!ctsdata": {
-                "book": factories.BookFactory(),
-                "scholion": factories.ScholionFactory()
+                "book": factories.BookFactory(self.registry),
+                "scholion": factories.ScholionFactory(self.registry)
             },
-            "#!datamodels": factories.DatamodelFactory(),
-            "#!relations": factories.RelationFactory(),
+            "#!datamodels": factories.DatamodelFactory(self.registry),
             "#!imagedata": None,
         }
         self.visited = 0
         self.problems = []
+        self.checkpoint = checkpoint
+        self.resumed_problems = 0
 
     @staticmethod
     def is_urn(value):
@@ -52,13 +110,19 @@ class Visitor:
     def get_urn_position(self, field, urn, obj_kwargs):
         return next(idx for idx, item in enumerate(obj_kwargs[field]) if item == urn)
 
-    @cache
+    def lookup(self, urn):
+        """
+        Return the object created for `urn` (as an unsaved instance carrying
+        its pk, see `URNRegistry`) or, if there is none yet, its record.
+        """
+        return self.registry.find(urn) or self.index.get(urn)
+
     def get_urn_permutation(self, urn):
         lemma_urn = f"{urn}.lemma"
-        permutation = self.index.get(lemma_urn)
+        permutation = self.lookup(lemma_urn)
         if permutation is None:
             comment_urn = f"{urn}.comment"
-            permutation = self.index.get(comment_urn)
+            permutation = self.lookup(comment_urn)
         # FIXME: These are two regressions from our previous approach
         # urn:cts:greekLit:tlg5026.msAim.hmt:18.74#urn:cite2:cite:verbs.v1:commentsOn#urn:cts:greekLit:tlg0012.tlg001.msA:18.604_605
         # urn:cts:greekLit:tlg0012.tlg001.msA-folios:250v.18.604_605
@@ -72,25 +136,19 @@ class Visitor:
         return permutation
 
     def get_node_data(self, urn, obj_kwargs):
-        try:
-            return self.index[urn]
-        except KeyError:
+        data = self.lookup(urn)
+        if data is None:
             return self.get_urn_permutation(urn)
+        return data
 
-    @cache
-    def expand_book_lines(self, book, field):
-        # We need to do some massaging here in case the object doesn't refer to
-        # either a single line or a range of line but an entire 'book'.
-        # Because, whatever those values might be they cannot be extracted from
-        # the URN itself and we need to build them from the index.
-        line_re = r":" + re.escape(book) + r".[0-9]+"
-        for urn in self.index.keys():
-            # Relation rows are keyed over their S-V-O triple (as a tuple) so
-            # we can skip those immediately.
-            if isinstance(urn, tuple):
-                continue
-            if re.search(line_re, urn):
-                yield field, urn
+    def get_indexed(self, model, urn, **joins):
+        """
+        Return the `Book` or `Scholion` for `urn`, creating it if needed.
+        """
+        if urn not in self.registry.pks[model]:
+            self.visited += 1
+        factory = self.factory_lookup["#!ctsdata"][model._meta.model_name]
+        return factory.get(urn=urn, **joins)
 
     def resolve_line(self, book_urn, **obj_kwargs):
         joins = {
@@ -98,13 +156,7 @@ class Visitor:
             "ctscatalog": obj_kwargs.pop("ctscatalog")
         }
 
-        book_obj = self.index.get(book_urn)
-        if book_obj is None:
-            factory = self.factory_lookup["#!ctsdata"]["book"]
-            book_obj = factory.get(urn=book_urn, **joins)
-            self.index[book_urn] = book_obj
-            self.visited += 1
-        joins.update({"book": book_obj})
+        joins.update({"book": self.get_indexed(Book, book_urn, **joins)})
 
         return Line.objects.get_or_create(**obj_kwargs, **joins)
 
@@ -114,38 +166,21 @@ class Visitor:
             "ctscatalog": obj_kwargs.pop("ctscatalog")
         }
 
-        book_obj = self.index.get(book_urn)
-        if book_obj is None:
-            factory = self.factory_lookup["#!ctsdata"]["book"]
-            book_obj = factory.get(urn=book_urn, **joins)
-            self.index[book_urn] = book_obj
-            self.visited += 1
-        joins.update({"book": book_obj})
-
-        scholion_obj = self.index.get(scholion_urn)
-        if scholion_obj is None:
-            factory = self.factory_lookup["#!ctsdata"]["scholion"]
-            scholion_obj = factory.get(urn=scholion_urn, **joins)
-            self.index[scholion_urn] = scholion_obj
-            self.visited += 1
-        joins.update({"scholion": scholion_obj})
+        joins.update({"book": self.get_indexed(Book, book_urn, **joins)})
+        joins.update(
+            {"scholion": self.get_indexed(Scholion, scholion_urn, **joins)}
+        )
 
         return Section.objects.get_or_create(**obj_kwargs, **joins)
 
     def resolve_hierarchy(self, obj_kwargs):
-        stem, components = obj_kwargs["urn"].rsplit(":", maxsplit=1)
-        split = components.split(".")
-        try:
-            book, _ = split
-        except ValueError:
-            book, scholion, _ = split
-            return self.resolve_section(
-                f"{stem}:{book}", f"{stem}:{book}.{scholion}", **obj_kwargs
-            )
-        return self.resolve_line(f"{stem}:{book}", **obj_kwargs)
+        urn = parse_urn(obj_kwargs["urn"])
+        if len(urn.parts) == 2:
+            return self.resolve_line(urn.ancestor(1), **obj_kwargs)
+        return self.resolve_section(urn.ancestor(1), urn.ancestor(2), **obj_kwargs)
 
     def resolve_related_node(self, urn, field, data, obj_kwargs):
-        if isinstance(data, tuple):
+        if isinstance(data, Record):
             data = self.resolve_node(urn, data)
             if not data:
                 return
@@ -166,8 +201,8 @@ class Visitor:
                 elif self.is_urn(value):
                     yield field, value
 
-    def resolve_node(self, key, data):
-        block, obj_kwargs = data
+    def resolve_node(self, key, record):
+        block, obj_kwargs = record.block, record.as_kwargs(self.library_obj)
         for field, urn in self.filter_urn_nodes(obj_kwargs):
             data = self.get_node_data(urn, obj_kwargs)
             if not data:
@@ -183,35 +218,132 @@ class Visitor:
         except TypeError:
             # We're denormalizing.
             instance, created = self.resolve_hierarchy(obj_kwargs)
-            key = instance.urn
+            self.registry.add(instance)
 
         if instance:
             if created:
                 self.visited += 1
-                self.index[key] = instance
+            # Only the pk is kept (in `self.registry`), the index keeps the record.
             return instance
 
         self.problems.append(("Unable to instantiate obj:", obj_kwargs))
         return False
 
+    def get_relation_loader(self):
+        return RelationLoader(
+            self.library_obj,
+            self.registry.pks,
+            self.hierarchy,
+            writer=BulkWriter(profiler=self.profiler),
+            problems=self.problems,
+        )
+
+    def get_keys(self):
+        """
+        Return the (key, block) pairs of the records to resolve; relations are
+        written last, once everything they refer to exists.
+        """
+        nodes, relations = [], []
+        for key in self.keys:
+            record = self.index[key]
+            if isinstance(record, Record):
+                keys = relations if record.block == "#!relations" else nodes
+                keys.append((key, record.block))
+        return nodes + relations
+
+    def resume(self, keys):
+        """
+        Pick up the objects written before `self.checkpoint` and return the
+        position to continue from.
+        """
+        checkpoint = self.checkpoint
+        if not checkpoint.position:
+            return 0
+        if str(keys[checkpoint.position - 1][0]) != checkpoint.key:
+            raise ValueError(
+                f"{checkpoint.key} doesn't match the library, which can't be resumed"
+            )
+
+        for model in RESUMED_MODELS:
+            self.registry.load(
+                model, model.objects.filter(citelibrary=self.library_obj)
+            )
+        for factory in self.factory_lookup["#!ctsdata"].values():
+            factory.idx = len(self.registry.pks[factory.model])
+            factory.position = factory.idx + 1
+        self.visited = checkpoint.counters.get("visited", 0)
+        self.resumed_problems = checkpoint.counters.get("problems", 0)
+        log(
+            f"Resuming after {checkpoint.key} ({checkpoint.position} of {len(keys)} "
+            f"keys, {self.resumed_problems} earlier problems)."
+        )
+        return checkpoint.position
+
+    def save_checkpoint(self, position, key, block, completed=False):
+        checkpoint = self.checkpoint
+        checkpoint.position = position
+        checkpoint.key = str(key)
+        checkpoint.block = block
+        checkpoint.counters = {
+            "visited": self.visited,
+            "problems": self.resumed_problems + len(self.problems),
+        }
+        checkpoint.completed = completed
+        checkpoint.save()
+
     def apply(self):
+        """
+        Resolve the index in transactions of CHECKPOINT_SIZE keys, saving
+        `self.checkpoint` (if any) with each one.
+        """
         print("Visitor.apply")
-        for key in tqdm.tqdm(self.keys):
-            data = self.index[key]
-            if isinstance(data, tuple):
-                self.resolve_node(key, data)
+        keys = self.get_keys()
+        start = self.resume(keys) if self.checkpoint else 0
+        loader = self.get_relation_loader()
+        progress = tqdm.tqdm(total=len(keys), initial=start)
+        for chunk_start in range(start, len(keys), CHECKPOINT_SIZE):
+            chunk = keys[chunk_start:chunk_start + CHECKPOINT_SIZE]
+            with transaction.atomic():
+                relations = []
+                for key, _ in chunk:
+                    record = self.index[key]
+                    if not isinstance(record, Record):
+                        continue
+                    if record.block == "#!relations":
+                        relations.append((key, record))
+                    elif not self.registry.find(key):
+                        # Not resolved yet as a URN another record refers to.
+                        self.profiler.switch("Visitor", f"Visitor.{record.block}")
+                        self.resolve_node(key, record)
+                if relations:
+                    self.profiler.finish("Visitor")
+                    self.visited += loader.write(relations)
+                if self.checkpoint:
+                    position = chunk_start + len(chunk)
+                    self.save_checkpoint(
+                        position, *chunk[-1], completed=position == len(keys)
+                    )
+            progress.update(len(chunk))
+        progress.close()
+        self.profiler.finish("Visitor")
+        log(self.registry.report())
+        self.registry.clear()
         return self.visited, self.problems
 
 
 class Parser:
-    def __init__(self, full_content_path, library_obj):
+    def __init__(self, full_content_path, library_obj, profiler=None):
         self.full_content_path = full_content_path
         self.library_obj = library_obj
+        self.profiler = profiler or ImportProfiler(enabled=False)
         self.current_block = None
         self.dynamic_columns = {}
         self.property_flags = {}
         self.columns = {}
+        self.record_columns = {}
         self.index = {}
+        self.hierarchy = URNHierarchy()
+        self.stream = None
 
     @staticmethod
     def split_line(line):
@@ -230,8 +362,12 @@ class Parser:
         return case_conversion.snakecase(column)
 
     @staticmethod
-    def get_urn_root(urn, delimiter=":"):
-        return f"{urn.rsplit(delimiter, maxsplit=1)[0]}:"
+    def get_urn_root(urn):
+        try:
+            return parse_urn(urn).root
+        except ValueError:
+            # Malformed URNs are reported when they fail to resolve.
+            return f"{urn.rsplit(':', maxsplit=1)[0]}:"
 
     def ignore_block(self):
         return self.current_block in IGNORE_BLOCKS
@@ -245,8 +381,8 @@ class Parser:
             columns in self.columns.values() or columns in self.dynamic_columns.values()
         )
 
-    def index_obj(self, obj_kwargs, key=None):
-        self.index[key if key else obj_kwargs["urn"]] = (self.current_block, obj_kwargs)
+    def index_obj(self, record, key=None):
+        self.index[key if key else record["urn"]] = record
 
     def map_columns_to_model_fields(self, urn=None):
         if urn:
@@ -254,8 +390,7 @@ class Parser:
         columns = self.columns[self.current_block]
         return [self.normalize_column(column) for column in columns]
 
-    def destructure_line(self, line, urn=None):
-        model_fields = self.map_columns_to_model_fields(urn)
+    def get_values(self, line):
         values = []
         for value in self.split_line(line):
             if not value:
@@ -264,38 +399,54 @@ class Parser:
                 if value in {"true", "false"}:
                     value = bool(value)
                 values.append(value)
-        return {"citelibrary": self.library_obj, **dict(zip(model_fields, values))}
+        return values
 
-    def yield_data(self):
-        with open(self.full_content_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
+    def destructure_line(self, line, urn=None):
+        model_fields = self.map_columns_to_model_fields(urn)
+        return dict(zip(model_fields, self.get_values(line)))
 
-                if self.is_empty_line(line):
-                    continue
+    def get_record_columns(self, collection_urn):
+        # Shared by every #!citedata record of the collection.
+        columns = self.record_columns.get(collection_urn)
+        if columns is None or len(columns) != len(self.columns[collection_urn]):
+            columns = tuple(intern(urn) for urn in self.columns[collection_urn])
+            self.record_columns[collection_urn] = columns
+        return columns
 
-                block_tag = self.is_block_tag(line)
-                if block_tag:
-                    self.current_block = line
-                    position = 0
-                    continue
+    def iter_lines(self):
+        with CEXStream(self.full_content_path) as stream:
+            self.stream = stream
+            yield from stream
 
-                if self.ignore_block():
-                    continue
+    def yield_data(self):
+        for line in self.iter_lines():
+            line = line.strip()
 
-                if not block_tag and self.use_block_columns():
-                    if not self.columns.get(self.current_block):
-                        self.columns[self.current_block] = self.split_line(line)
-                        continue
+            if self.is_empty_line(line):
+                continue
 
-                if self.current_block == "#!ctsdata":
-                    position += 1
-                    idx = position - 1
-                    yield {"idx": idx, "position": position, "line": line}
+            block_tag = self.is_block_tag(line)
+            if block_tag:
+                self.current_block = line
+                position = 0
+                continue
+
+            if self.ignore_block():
+                continue
+
+            if not block_tag and self.use_block_columns():
+                if not self.columns.get(self.current_block):
+                    self.columns[self.current_block] = self.split_line(line)
                     continue
 
-                if not self.is_column_definition(line):
-                    yield {"line": line}
+            if self.current_block == "#!ctsdata":
+                position += 1
+                idx = position - 1
+                yield {"idx": idx, "position": position, "line": line}
+                continue
+
+            if not self.is_column_definition(line):
+                yield {"line": line}
 
     def handle_ctscatalog(self, line, **data):
         obj_kwargs = self.destructure_line(line)
@@ -303,19 +454,13 @@ class Parser:
             obj_kwargs.update(
                 {"citation_scheme": obj_kwargs["citation_scheme"].split(",")}
             )
-        self.index_obj(obj_kwargs)
+        self.index_obj(HeaderRecord(self.current_block, obj_kwargs))
 
     def handle_ctsdata(self, idx, position, line, **data):
         urn, tokens = self.split_line(line)
-        obj_kwargs = {
-            "urn": urn,
-            "text_content": tokens,
-            "position": position,
-            "idx": idx,
-            "ctscatalog": self.get_urn_root(urn),
-            "citelibrary": self.library_obj,
-        }
-        self.index_obj(obj_kwargs)
+        record = CtsPassage(urn, tokens, position, idx, self.get_urn_root(urn))
+        self.index_obj(record)
+        self.hierarchy.add(record.urn)
 
     def handle_citecollections(self, line, **data):
         obj_kwargs = self.destructure_line(line)
@@ -324,7 +469,7 @@ class Parser:
             "labelling_property": obj_kwargs.pop("labelling_property"),
             "ordering_property": obj_kwargs.pop("ordering_property"),
         }
-        self.index_obj(obj_kwargs)
+        self.index_obj(HeaderRecord(self.current_block, obj_kwargs))
 
     def handle_citeproperties(self, line, **data):
         obj_kwargs = self.destructure_line(line)
@@ -359,7 +504,7 @@ class Parser:
                 **property_flags,
             }
         )
-        self.index_obj(obj_kwargs)
+        self.index_obj(HeaderRecord(self.current_block, obj_kwargs))
 
     def handle_citedata(self, line, **data):
         urns = [item for item in self.split_line(line) if "urn:" in item]
@@ -373,14 +518,9 @@ class Parser:
             if self.get_urn_root(urn) in self.columns
         )
         urn = next(urn for urn in urns if collection_urn in urn)
-        obj_kwargs = self.destructure_line(line, urn=collection_urn)
-        transformed_kwargs = {
-            "urn": urn,
-            "citelibrary": obj_kwargs.pop("citelibrary"),
-            "citecollection": collection_urn,
-            "fields": obj_kwargs,
-        }
-        self.index_obj(transformed_kwargs)
+        columns = self.get_record_columns(collection_urn)
+        row = tuple(self.get_values(line))
+        self.index_obj(CiteDatum(urn, collection_urn, columns, row))
 
     def handle_datamodels(self, line, **data):
         obj_kwargs = self.destructure_line(line)
@@ -390,7 +530,7 @@ class Parser:
                 "citecollection": obj_kwargs.pop("collection"),
             }
         )
-        self.index_obj(obj_kwargs)
+        self.index_obj(HeaderRecord(self.current_block, obj_kwargs))
 
     def handle_relations(self, line, **data):
         transform = {
@@ -398,13 +538,12 @@ class Parser:
             "urn:cts:greekLit:tlg0012.tlg001.msA:18.603-18.604_605": "urn:cts:greekLit:tlg0012.tlg001.msA:18.604-18.605",
         }
         split = self.split_line(line)
-        try:
-            subject_urn, verb_urn, object_urn = self.split_line(line)
-        except:
-            import ipdb; ipdb.set_trace();
-            raise
+        if len(split) != 3:
+            raise ValueError(f"Expected a subject, verb and object URN: {line}")
+        subject_urn, verb_urn, object_urn = split
 
         if object_urn in transform:
+            self.patched("object", object_urn, transform[object_urn])
             object_urn = transform[object_urn]
 
         # Verbs are usually defined in themselves as citedata nodes but that's
@@ -412,19 +551,22 @@ class Parser:
         # supposed to be: urn:cite2:cite:verbs.v1:appearsIn, which is defined
         # in the source but never used at all. So let's work around that.
         if verb_urn == "urn:cite2:hmt:verbs.v1:appearsIn":
+            self.patched("verb", verb_urn, "urn:cite2:cite:verbs.v1:appearsIn")
             verb_urn = "urn:cite2:cite:verbs.v1:appearsIn"
 
-        object_urn_stem, positions = object_urn.rsplit(":", maxsplit=1)
-
-        object_at = None
-        if "@" in positions:
-            positions, object_at = positions.split("@")
+        key = tuple(intern(urn) for urn in split)
+        try:
+            object_urn = parse_urn(object_urn)
+        except ValueError:
+            # Kept as is; it's reported as a problem when it fails to resolve.
+            object_urn, _, object_at = object_urn.partition("@")
+            record = CiteRelation(subject_urn, verb_urn, [object_urn], object_at or None)
+            self.index_obj(record, key=key)
+            return
 
-        is_passage = False
-        passage_range = positions.split("-")
-        if len(passage_range) > 1:
-            is_passage = True
-            references = [reference.split(".") for reference in passage_range]
+        positions = object_urn.reference
+        if len(object_urn.endpoints) > 1:
+            references = [list(reference) for reference in object_urn.endpoints]
             # Detect and fix malformed passage URNs like:
             # urn:cts:greekLit:tlg0012.tlg001.msA:1.13-14
             # It should have the 'book' in each case:
@@ -443,21 +585,28 @@ class Parser:
                 references = fixed
 
             book = set([reference[0] for reference in references])
-            assert len(book) == 1
+            assert len(book) == 1, f"Range spans books: {object_urn.urn}"
             book = book.pop()
-            start, end = [int(reference[1]) for reference in references]
-            passage = [
-                f"{object_urn_stem}:{book}.{line}" for line in range(start, end + 1)
-            ]
-
-        obj_kwargs = {
-            "subject_obj": subject_urn,
-            "verb": verb_urn,
-            "object_obj": [object_urn] if not is_passage else passage,
-            "object_at": object_at,
-            "citelibrary": self.library_obj,
-        }
-        self.index_obj(key=tuple(split), obj_kwargs=obj_kwargs)
+            start, end = [reference[1] for reference in references]
+            positions = f"{book}.{start}-{book}.{end}"
+            if positions != object_urn.reference:
+                self.patched("range", object_urn.urn, f"{object_urn.root}{positions}")
+
+        # Ranges (and books) are expanded against the `URNHierarchy` of the
+        # library once all of its lines are known.
+        record = CiteRelation(
+            subject_urn,
+            verb_urn,
+            [f"{object_urn.root}{positions}"],
+            object_urn.subreference,
+        )
+        self.index_obj(record, key=key)
+
+    def patched(self, kind, original, patched):
+        """
+        Called when a (known) defect of the source is patched while parsing;
+        see `validation.ValidationParser`.
+        """
 
     def handle_imagedata(self, line, **data):
         raise NotImplementedError()
@@ -478,33 +627,300 @@ class Parser:
     def apply(self):
         print("Parser.apply")
         for data in tqdm.tqdm(self.yield_data()):
+            self.profiler.switch("Parser", f"Parser.{self.current_block}")
             self.handle(**data)
+        self.profiler.finish("Parser")
         return self.index
 
 
-def _import_library(data):
+def parse_library(
+    full_content_path, library_obj=None, parallel=False, snapshot=False, profiler=None
+):
+    """
+    Return the parser index and URN hierarchy of a CEX file.
+    """
+    profiler = profiler or ImportProfiler(enabled=False)
+    if snapshot:
+        from .snapshots import ParseSnapshot
+
+        parse_snapshot = ParseSnapshot(full_content_path)
+        with profiler.phase("ParseSnapshot.load"):
+            loaded = parse_snapshot.load()
+        if loaded is not None:
+            log(f"Loaded the parse snapshot {parse_snapshot.snapshot_path}.")
+            return loaded
+
+    if parallel and get_compression(full_content_path):
+        log(f"{full_content_path} is compressed and will be parsed serially.")
+        parallel = False
+    if parallel:
+        from .parallel import ParallelParser
+
+        parser = ParallelParser(full_content_path, library_obj, profiler=profiler)
+    else:
+        parser = Parser(full_content_path, library_obj, profiler=profiler)
+    with profiler.phase(f"{type(parser).__name__}.apply"):
+        index = parser.apply()
+    stream = parser.stream
+    if stream is not None and stream.compression:
+        log(
+            f"Read {stream.bytes_read} bytes, decompressed and decoded "
+            f"{stream.bytes_decoded} bytes in {stream.decode_time:.2f}s."
+        )
+    if snapshot:
+        with profiler.phase("ParseSnapshot.save"):
+            parse_snapshot.save(index, parser.hierarchy)
+    return index, parser.hierarchy
+
+
+def get_checkpoint(library_obj, full_content_path, resume=False):
+    """
+    Return the `ImportCheckpoint` to resume the import of a library from or,
+    unless `resume` is set, a new one.
+    """
+    from .snapshots import get_content_hash
+
+    checkpoint = ImportCheckpoint.objects.filter(citelibrary=library_obj).first()
+    if resume and checkpoint is None and has_records(library_obj):
+        raise ValueError(
+            f"{library_obj.urn} has no checkpoint to resume from (it wasn't "
+            "imported with the default visitor), so the import can't be resumed"
+        )
+    # Cached by the file's size and modification time, so a parse snapshot of
+    # the same file reuses it.
+    content_hash = get_content_hash(full_content_path)
+    if resume and checkpoint is not None:
+        if checkpoint.content_hash != content_hash:
+            raise ValueError(
+                f"{full_content_path} changed since {library_obj.urn} was "
+                "imported from it, so the import can't be resumed"
+            )
+        return checkpoint
+    if checkpoint is not None:
+        checkpoint.delete()
+    return ImportCheckpoint.objects.create(
+        citelibrary=library_obj, content_hash=content_hash
+    )
+
+
+def has_records(library_obj):
+    return any(
+        model.objects.filter(citelibrary=library_obj).exists()
+        for model in RESUMED_MODELS
+    )
+
+
+def _import_library(
+    data,
+    bulk=False,
+    stream=False,
+    parallel=False,
+    delta=False,
+    profile=False,
+    cprofile=False,
+    snapshot=False,
+    parsed=None,
+    resume=False,
+):
     full_content_path = os.path.join(LIBRARY_DATA_PATH, data["content_path"])
-    library_obj, _ = CITELibrary.objects.update_or_create(
-        urn=data["urn"],
-        defaults=dict(
-            name=data["metadata"]["library_title"], metadata=data["metadata"]
-        ),
+    if delta:
+        from .delta import get_library
+
+        library_obj = get_library(data)
+    else:
+        library_obj, _ = CITELibrary.objects.update_or_create(
+            urn=data["urn"],
+            defaults=dict(
+                name=data["metadata"]["library_title"], metadata=data["metadata"]
+            ),
+        )
+
+    checkpoint = None
+    if not (stream or bulk or delta):
+        checkpoint = get_checkpoint(library_obj, full_content_path, resume=resume)
+        if checkpoint.completed:
+            log(f"{library_obj.urn} was already imported from {full_content_path}.")
+            return
+
+    profiler = ImportProfiler(
+        enabled=profile or cprofile,
+        cprofile_dir=f"{full_content_path}.profile" if cprofile else None,
     )
+    with profiler:
+        if stream and not delta:
+            from .streaming import stream_library
 
-    index = Parser(full_content_path, library_obj).apply()
-    visited, problems = Visitor(index).apply()
+            with profiler.phase("stream_library"):
+                visited, problems = stream_library(
+                    full_content_path, library_obj, profiler=profiler
+                )
+        else:
+            if parsed is None:
+                parsed = parse_library(
+                    full_content_path,
+                    library_obj,
+                    parallel=parallel,
+                    snapshot=snapshot,
+                    profiler=profiler,
+                )
+            index, hierarchy = parsed
+
+            writer = BulkWriter(profiler=profiler)
+            if delta:
+                from .delta import DeltaVisitor
+
+                visitor = DeltaVisitor(
+                    index, library_obj, writer=writer, hierarchy=hierarchy
+                )
+            elif bulk:
+                visitor = BulkVisitor(
+                    index, library_obj, writer=writer, hierarchy=hierarchy
+                )
+            else:
+                visitor = Visitor(
+                    index,
+                    library_obj,
+                    hierarchy=hierarchy,
+                    profiler=profiler,
+                    checkpoint=checkpoint,
+                )
+            with profiler.phase(f"{type(visitor).__name__}.apply"):
+                visited, problems = visitor.apply()
+
+        # Delta imports only rebuild the rows that depend on what they changed.
+        urns = visitor.get_changed_urns() if delta else None
+        materialized = []
+        for materializer_class in MATERIALIZERS:
+            with profiler.phase(f"{materializer_class.__name__}.apply"):
+                materializer = materializer_class(library_obj)
+                materialized.append((materializer, materializer.apply(urns=urns)))
 
     failed = len(problems)
     plural = f"object{'s' if failed > 1 else ''}"
     log(*(f"{urn}:\n{obj}" for urn, obj in problems))
     log(f"Visited {visited} {plural}.")
     log(f"Could not create {failed} {plural}.")
+    log(
+        *(
+            f"Materialized {written} {materializer.model.__name__} rows "
+            f"(skipped {materializer.skipped} incomplete records)."
+            for materializer, written in materialized
+        )
+    )
 
+    if profiler.enabled:
+        log(*profiler.report())
+        profiler.write(
+            f"{full_content_path}.profile.json",
+            library=library_obj.urn,
+            visited=visited,
+            problems=failed,
+        )
 
-def import_libraries(reset=True):
-    if reset:
-        CITELibrary.objects.all().delete()
 
-    library_metadata = json.load(open(LIBRARY_METADATA_PATH))
-    for library_data in library_metadata["libraries"]:
-        _import_library(library_data)
+def import_libraries(
+    reset=True,
+    bulk=False,
+    stream=False,
+    parallel=False,
+    delta=False,
+    profile=False,
+    cprofile=False,
+    shadow=False,
+    snapshot=False,
+    workers=None,
+    resume=False,
+):
+    """
+    Import every library listed in `metadata.json`.
+
+    With `bulk=True` objects are written per model with chunked `bulk_create`
+    calls (see `bulk.BulkVisitor`) instead of one at a time.
+
+    With `stream=True` the data blocks are written in chunks while the file
+    is parsed (see `streaming.stream_library`), so memory use stays bounded
+    regardless of the size of the library.
+
+    With `parallel=True` the large data blocks are parsed in a process pool
+    (see `parallel.ParallelParser`).
+
+    With `delta=True` existing libraries are kept and only the records that
+    changed since the last delta import are written (see `delta.DeltaVisitor`);
+    `reset` and `stream` are ignored.
+
+    With `profile=True` wall / CPU time, SQL queries, rows written and peak
+    memory are recorded per import phase (see `profiling.ImportProfiler`),
+    logged and written to `<content_path>.profile.json`. `cprofile=True` also
+    dumps a cProfile file per top level phase to `<content_path>.profile/`.
+
+    With `shadow=True` the import runs against a copy of the database that
+    replaces it once it has passed integrity and row count checks (see
+    `shadow.ShadowDatabase`); the live database is never written to.
+
+    With `snapshot=True` the parser output is saved next to each CEX file and
+    reused by later imports until the file or the parser changes (see
+    `snapshots.ParseSnapshot`); `stream=True` doesn't use snapshots.
+
+    With `workers=<n>` up to n libraries are parsed at once in worker
+    processes and written by this process as their parses complete (see
+    `pool.LibraryPool`); `stream` and `parallel` are ignored.
+
+    With `reset=True` (ignored with `delta=True` or `resume=True`) every
+    library is removed first, with set-based deletes per table (see
+    `reset.LibraryReset`).
+
+    Unless `bulk`, `stream` or `delta` is set, libraries are written in
+    transactions of CHECKPOINT_SIZE index keys, each of which saves the
+    progress of the import in an `ImportCheckpoint`. With `resume=True` an
+    interrupted import continues from its checkpoint (and libraries that
+    were completed are skipped) instead of starting over.
+
+    SQLite connections use the "import" (or "shadow") PRAGMA profile while
+    libraries are imported and, unless `delta=True`, the non-unique indexes of
+    the bulk loaded tables are only rebuilt once every library is loaded (see
+    `sqlite.deferred_indexes`). Indexes that an interrupted import didn't get
+    to rebuild are recreated at the start of the next one.
+    """
+    database = nullcontext()
+    if shadow:
+        from .shadow import ShadowDatabase
+
+        database = ShadowDatabase()
+
+    with database, connection_profile("shadow" if shadow else "import"):
+        # Indexes that an interrupted import left dropped (before the reset,
+        # which relies on them).
+        restore_indexes()
+        if reset and not (delta or resume):
+            reset_libraries()
+
+        indexes = nullcontext() if delta else deferred_indexes()
+        library_metadata = json.load(open(LIBRARY_METADATA_PATH))
+        with indexes:
+            if workers:
+                from .pool import LibraryPool
+
+                pool = LibraryPool(
+                    max_workers=workers,
+                    snapshot=snapshot,
+                    bulk=bulk,
+                    delta=delta,
+                    profile=profile,
+                    cprofile=cprofile,
+                    resume=resume,
+                )
+                pool.apply(library_metadata["libraries"])
+                return
+
+            for library_data in library_metadata["libraries"]:
+                _import_library(
+                    library_data,
+                    bulk=bulk,
+                    stream=stream,
+                    parallel=parallel,
+                    delta=delta,
+                    profile=profile,
+                    cprofile=cprofile,
+                    snapshot=snapshot,
+                    resume=resume,
+                )
@@ -0,0 +1,176 @@
+import hashlib
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.operations.base import Operation
+
+from django_jsonfield_backport.models import (
+    JSONField,
+    KeyTransform,
+    compile_json_path
+)
+
+
+JSONKeyIndex = namedtuple("JSONKeyIndex", ["collection_urn", "property_urn"])
+
+# CITE collection properties that are looked up through `fields__<property>`
+# often enough to index the value extracted from `CITEDatum.fields`. Each
+# entry needs a migration with an `AddJSONKeyIndex` operation for it (see
+# `get_missing_indexes`). DSE properties are queried through the columns of
+# `DSERecord` instead.
+JSON_KEY_INDEXES = [
+    # `shortcuts.get_folios_for_image`
+    JSONKeyIndex("urn:cite2:hmt:msA.v1:", "urn:cite2:hmt:msA.v1.image:")
+]
+
+
+def get_indexed_keys():
+    return {entry.property_urn for entry in JSON_KEY_INDEXES}
+
+
+def get_string_sql(value):
+    """
+    `value` as an SQL string literal (with `%` escaped for cursor formatting).
+    """
+    value = value.replace("'", "''").replace("%", "%%")
+    return f"'{value}'"
+
+
+def get_json_path_sql(key):
+    """
+    The JSON path of a top level key as an SQL string literal.
+    """
+    return get_string_sql(compile_json_path([key]))
+
+
+def get_index_name(model, key):
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+    return f"{model._meta.db_table}_json_{digest}"
+
+
+def get_create_index_sql(connection, model, field_name, key):
+    """
+    Return the statement creating an index on the value of `key` in a JSON
+    field, written the way `IndexedKeyTransform` queries it, or None for
+    database backends without expression indexes on JSON.
+    """
+    quote = connection.ops.quote_name
+    column = quote(model._meta.get_field(field_name).column)
+    if connection.vendor == "sqlite":
+        expression = f"JSON_EXTRACT({column}, {get_json_path_sql(key)})"
+    elif connection.vendor == "postgresql":
+        expression = f"({column} -> {get_string_sql(key)})"
+    else:
+        return None
+    return (
+        f"CREATE INDEX IF NOT EXISTS {quote(get_index_name(model, key))} "
+        f"ON {quote(model._meta.db_table)} ({expression})"
+    )
+
+
+def get_missing_indexes(model, using=DEFAULT_DB_ALIAS):
+    """
+    Return the registered keys of `model` without an index in the database.
+    """
+    connection = connections[using]
+    if connection.vendor not in ["sqlite", "postgresql"]:
+        return []
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, model._meta.db_table
+        )
+    return sorted(
+        key
+        for key in get_indexed_keys()
+        if get_index_name(model, key) not in constraints
+    )
+
+
+class IndexedKeyTransform(KeyTransform):
+    """
+    `KeyTransform` that writes the JSON path into the SQL on SQLite, instead of
+    passing it as a parameter, so the query planner can match it against the
+    expression index of the key.
+    """
+
+    def as_sqlite(self, compiler, connection):
+        lhs, params = self.preprocess_lhs(compiler, connection, lhs_only=True)
+        return f"JSON_EXTRACT({lhs}, {get_json_path_sql(self.key_name)})", params
+
+
+class IndexedKeyTransformFactory:
+    def __init__(self, key_name):
+        self.key_name = key_name
+
+    def __call__(self, *args, **kwargs):
+        return IndexedKeyTransform(self.key_name, *args, **kwargs)
+
+
+class IndexedJSONField(JSONField):
+    """
+    `JSONField` whose lookups of the keys in JSON_KEY_INDEXES can use their
+    indexes:
+
+    CITEDatum.objects.filter(**{"fields__urn:cite2:hmt:msA.v1.image:": urn})
+
+    Only the lookups change, so it deconstructs (and migrates) as a `JSONField`.
+    """
+
+    def get_transform(self, name):
+        if name in get_indexed_keys():
+            return IndexedKeyTransformFactory(name)
+        return super().get_transform(name)
+
+    def deconstruct(self):
+        name, _, args, kwargs = super().deconstruct()
+        return name, "django_jsonfield_backport.models.JSONField", args, kwargs
+
+
+class AddJSONKeyIndex(Operation):
+    """
+    Create an index on the value of `key` in the JSON field `field_name` of a
+    model (a no-op on backends without expression indexes on JSON).
+
+    Tables that SQLite rebuilds to alter them lose these indexes; add the
+    operation again after such a migration.
+    """
+
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, model_name, field_name, key):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.key = key
+
+    def deconstruct(self):
+        kwargs = {
+            "model_name": self.model_name,
+            "field_name": self.field_name,
+            "key": self.key,
+        }
+        return self.__class__.__name__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        sql = get_create_index_sql(
+            schema_editor.connection, model, self.field_name, self.key
+        )
+        if sql:
+            schema_editor.execute(sql)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor in ["sqlite", "postgresql"]:
+            name = schema_editor.quote_name(get_index_name(model, self.key))
+            schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def describe(self):
+        return f"Create an index on {self.model_name}.{self.field_name} {self.key}"
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.6 on 2026-10-17 10:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_jsonfield_backport.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0003_auto_20191113_1724'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordFingerprint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block', models.CharField(max_length=32)),
+                ('key', models.TextField()),
+                ('digest', models.CharField(max_length=40)),
+                ('data', django_jsonfield_backport.models.JSONField(blank=True, help_text='Resolved URNs of a relation, needed to remove its rows', null=True)),
+                ('citelibrary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprints', to='library.CITELibrary')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='recordfingerprint',
+            index=models.Index(fields=['citelibrary', 'block', 'key'], name='library_rec_citelib_f76be2_idx'),
+        ),
+    ]
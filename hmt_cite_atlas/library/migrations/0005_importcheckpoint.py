@@ -0,0 +1,29 @@
+# Generated by Django 2.2.6 on 2026-10-17 10:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_jsonfield_backport.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0004_recordfingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=40)),
+                ('block', models.CharField(blank=True, max_length=32)),
+                ('key', models.TextField(blank=True)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('counters', django_jsonfield_backport.models.JSONField(default=dict)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('citelibrary', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoint', to='library.CITELibrary')),
+            ],
+        ),
+    ]
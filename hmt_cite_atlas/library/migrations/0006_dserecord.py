@@ -0,0 +1,37 @@
+# Generated by Django 2.2.6 on 2026-10-17 10:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0005_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DSERecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('urn', models.CharField(max_length=255, unique=True)),
+                ('label', models.CharField(blank=True, max_length=255, null=True)),
+                ('passage', models.CharField(db_index=True, max_length=255)),
+                ('image_urn', models.CharField(db_index=True, max_length=255)),
+                ('roi_x', models.FloatField(blank=True, null=True)),
+                ('roi_y', models.FloatField(blank=True, null=True)),
+                ('roi_w', models.FloatField(blank=True, null=True)),
+                ('roi_h', models.FloatField(blank=True, null=True)),
+                ('citelibrary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dse_records', to='library.CITELibrary')),
+                ('datum', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dse_record', to='library.CITEDatum')),
+                ('line', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dse_records', to='library.Line')),
+                ('scholion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dse_records', to='library.Scholion')),
+                ('surface', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='surface_dse_records', to='library.CITEDatum')),
+            ],
+            options={
+                'verbose_name': 'DSE record',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
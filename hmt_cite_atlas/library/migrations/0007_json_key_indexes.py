@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from hmt_cite_atlas.library.json_indexes import AddJSONKeyIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("library", "0006_dserecord")]
+
+    operations = [
+        AddJSONKeyIndex(
+            model_name="citedatum",
+            field_name="fields",
+            key="urn:cite2:hmt:msA.v1.image:",
+        )
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.6 on 2026-10-17 10:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0007_json_key_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Folio',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('urn', models.CharField(max_length=255, unique=True)),
+                ('ordinal', models.IntegerField()),
+                ('citecollection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='folios', to='library.CITECollection')),
+                ('citelibrary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='folios', to='library.CITELibrary')),
+                ('datum', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='folio', to='library.CITEDatum')),
+            ],
+            options={
+                'ordering': ['ordinal'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='folio',
+            index=models.Index(fields=['citecollection', 'ordinal'], name='library_fol_citecol_c41220_idx'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 2.2.6 on 2026-10-17 10:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0008_folio'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='book',
+            name='ctscatalog',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='books', to='library.CTSCatalog'),
+        ),
+        migrations.AlterField(
+            model_name='line',
+            name='book',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='library.Book'),
+        ),
+        migrations.AlterField(
+            model_name='line',
+            name='ctscatalog',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='library.CTSCatalog'),
+        ),
+        migrations.AlterField(
+            model_name='scholion',
+            name='book',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='scholia', to='library.Book'),
+        ),
+        migrations.AlterField(
+            model_name='scholion',
+            name='ctscatalog',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='scholia', to='library.CTSCatalog'),
+        ),
+        migrations.AlterField(
+            model_name='section',
+            name='book',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='library.Book'),
+        ),
+        migrations.AlterField(
+            model_name='section',
+            name='ctscatalog',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='library.CTSCatalog'),
+        ),
+        migrations.AlterField(
+            model_name='section',
+            name='scholion',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='library.Scholion'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['ctscatalog', 'idx'], name='library_boo_ctscata_1733d5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='line',
+            index=models.Index(fields=['ctscatalog', 'idx'], name='library_lin_ctscata_03a751_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='line',
+            index=models.Index(fields=['book', 'idx'], name='library_lin_book_id_c6ecd9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scholion',
+            index=models.Index(fields=['ctscatalog', 'idx'], name='library_sch_ctscata_0886fd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scholion',
+            index=models.Index(fields=['book', 'idx'], name='library_sch_book_id_6e5ec6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['ctscatalog', 'idx'], name='library_sec_ctscata_397c88_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['book', 'idx'], name='library_sec_book_id_baff46_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['scholion', 'idx'], name='library_sec_scholio_61dee9_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.6 on 2026-10-17 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0009_atlas_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='relation',
+            index=models.Index(fields=['subject_content_type', 'subject_id'], name='library_rel_subject_0cecaa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='relation',
+            index=models.Index(fields=['object_content_type', 'object_id'], name='library_rel_object__ba7ec4_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from .atlas_models import Book, Line, Scholion, Section
+from .atlas_models import Book, DSERecord, Folio, Line, Scholion, Section
 from .cex_models import (
     CITECollection,
     CITEDatum,
@@ -8,10 +8,13 @@ from .cex_models import (
     Datamodel,
     Relation
 )
+from .import_models import DeferredIndex, ImportCheckpoint, RecordFingerprint
 
 
 __all__ = [
     "Book",
+    "DSERecord",
+    "Folio",
     "Line",
     "Scholion",
     "Section",
@@ -23,4 +26,7 @@ __all__ = [
     "CTSCatalog",
     "Datamodel",
     "Relation",
+    "DeferredIndex",
+    "ImportCheckpoint",
+    "RecordFingerprint",
 ]
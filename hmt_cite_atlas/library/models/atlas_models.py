@@ -16,7 +16,10 @@ class Book(GenericRelationMixin):
     idx = models.IntegerField(help_text="0-based index")
 
     ctscatalog = models.ForeignKey(
-        "library.CTSCatalog", related_name="books", on_delete=models.CASCADE
+        "library.CTSCatalog",
+        related_name="books",
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     citelibrary = models.ForeignKey(
         "library.CITELibrary", related_name="books", on_delete=models.CASCADE
@@ -24,6 +27,9 @@ class Book(GenericRelationMixin):
 
     class Meta:
         ordering = ["idx"]
+        # The composite indexes of the atlas models also serve the lookups of
+        # the foreign keys they start with, which have no index of their own.
+        indexes = [models.Index(fields=["ctscatalog", "idx"])]
 
     @property
     def label(self):
@@ -46,10 +52,13 @@ class Scholion(models.Model):
     idx = models.IntegerField(help_text="0-based index")
 
     book = models.ForeignKey(
-        "library.Book", related_name="scholia", on_delete=models.CASCADE
+        "library.Book", related_name="scholia", on_delete=models.CASCADE, db_index=False
     )
     ctscatalog = models.ForeignKey(
-        "library.CTSCatalog", related_name="scholia", on_delete=models.CASCADE
+        "library.CTSCatalog",
+        related_name="scholia",
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     citelibrary = models.ForeignKey(
         "library.CITELibrary", related_name="scholia", on_delete=models.CASCADE
@@ -58,6 +67,10 @@ class Scholion(models.Model):
     class Meta:
         verbose_name_plural = "Scholia"
         ordering = ["idx"]
+        indexes = [
+            models.Index(fields=["ctscatalog", "idx"]),
+            models.Index(fields=["book", "idx"]),
+        ]
 
     @property
     def label(self):
@@ -81,13 +94,22 @@ class Section(GenericRelationMixin):
     idx = models.IntegerField(help_text="0-based index")
 
     scholion = models.ForeignKey(
-        "library.Scholion", related_name="sections", on_delete=models.CASCADE
+        "library.Scholion",
+        related_name="sections",
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     book = models.ForeignKey(
-        "library.Book", related_name="sections", on_delete=models.CASCADE
+        "library.Book",
+        related_name="sections",
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     ctscatalog = models.ForeignKey(
-        "library.CTSCatalog", related_name="sections", on_delete=models.CASCADE
+        "library.CTSCatalog",
+        related_name="sections",
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     citelibrary = models.ForeignKey(
         "library.CITELibrary", related_name="sections", on_delete=models.CASCADE
@@ -95,6 +117,11 @@ class Section(GenericRelationMixin):
 
     class Meta:
         ordering = ["idx"]
+        indexes = [
+            models.Index(fields=["ctscatalog", "idx"]),
+            models.Index(fields=["book", "idx"]),
+            models.Index(fields=["scholion", "idx"]),
+        ]
 
     @property
     def label(self):
@@ -118,10 +145,13 @@ class Line(GenericRelationMixin):
     idx = models.IntegerField(help_text="0-based index")
 
     book = models.ForeignKey(
-        "library.Book", related_name="lines", on_delete=models.CASCADE
+        "library.Book", related_name="lines", on_delete=models.CASCADE, db_index=False
     )
     ctscatalog = models.ForeignKey(
-        "library.CTSCatalog", related_name="lines", on_delete=models.CASCADE
+        "library.CTSCatalog",
+        related_name="lines",
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     citelibrary = models.ForeignKey(
         "library.CITELibrary", related_name="lines", on_delete=models.CASCADE
@@ -129,6 +159,10 @@ class Line(GenericRelationMixin):
 
     class Meta:
         ordering = ["idx"]
+        indexes = [
+            models.Index(fields=["ctscatalog", "idx"]),
+            models.Index(fields=["book", "idx"]),
+        ]
 
     @property
     def label(self):
@@ -136,3 +170,103 @@ class Line(GenericRelationMixin):
 
     def __str__(self):
         return f"{self.ctscatalog} [line={self.position}]"
+
+
+class Folio(models.Model):
+    """
+    urn:cite2:hmt:msA.v1:12r
+
+    Codex page, materialized from its CITEDatum on import, with the position
+    of the page in the codex (from the ordering property of its collection)
+    as `ordinal`.
+    """
+
+    urn = models.CharField(max_length=255, unique=True)
+    ordinal = models.IntegerField()
+
+    datum = models.OneToOneField(
+        "library.CITEDatum", related_name="folio", on_delete=models.CASCADE
+    )
+    citecollection = models.ForeignKey(
+        "library.CITECollection", related_name="folios", on_delete=models.CASCADE
+    )
+    citelibrary = models.ForeignKey(
+        "library.CITELibrary", related_name="folios", on_delete=models.CASCADE
+    )
+
+    class Meta:
+        ordering = ["ordinal"]
+        indexes = [models.Index(fields=["citecollection", "ordinal"])]
+
+    def get_siblings(self):
+        return Folio.objects.filter(citecollection_id=self.citecollection_id)
+
+    def get_next(self):
+        return self.get_siblings().filter(ordinal__gt=self.ordinal).first()
+
+    def get_previous(self):
+        return (
+            self.get_siblings().filter(ordinal__lt=self.ordinal).order_by("-ordinal")
+        ).first()
+
+    def __str__(self):
+        return self.urn
+
+
+class DSERecord(models.Model):
+    """
+    urn:cite2:hmt:va_dse.v1:il4382
+
+    DSE (diplomatic scholarly edition) record, materialized from the CITEDatum
+    of a DSE collection on import: aligns a text passage with a region of
+    interest on an image of a manuscript surface (folio).
+    """
+
+    urn = models.CharField(max_length=255, unique=True)
+    label = models.CharField(max_length=255, blank=True, null=True)
+
+    passage = models.CharField(max_length=255, db_index=True)
+    image_urn = models.CharField(max_length=255, db_index=True)
+    roi_x = models.FloatField(blank=True, null=True)
+    roi_y = models.FloatField(blank=True, null=True)
+    roi_w = models.FloatField(blank=True, null=True)
+    roi_h = models.FloatField(blank=True, null=True)
+
+    datum = models.OneToOneField(
+        "library.CITEDatum", related_name="dse_record", on_delete=models.CASCADE
+    )
+    surface = models.ForeignKey(
+        "library.CITEDatum",
+        related_name="surface_dse_records",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+    )
+    line = models.ForeignKey(
+        "library.Line",
+        related_name="dse_records",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+    )
+    scholion = models.ForeignKey(
+        "library.Scholion",
+        related_name="dse_records",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+    )
+    citelibrary = models.ForeignKey(
+        "library.CITELibrary", related_name="dse_records", on_delete=models.CASCADE
+    )
+
+    class Meta:
+        verbose_name = "DSE record"
+        ordering = ["pk"]
+
+    @property
+    def roi(self):
+        return [self.roi_x, self.roi_y, self.roi_w, self.roi_h]
+
+    def __str__(self):
+        return self.urn
@@ -1,8 +1,10 @@
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django_jsonfield_backport.models import JSONField
 from django.db import models
 
+from django_jsonfield_backport.models import JSONField
+
+from ..json_indexes import IndexedJSONField
 from .mixins import GenericRelationMixin
 
 
@@ -142,7 +144,7 @@ class CITEDatum(GenericRelationMixin):
     """
 
     urn = models.CharField(max_length=255, unique=True)
-    fields = JSONField(default=dict, blank=True)
+    fields = IndexedJSONField(default=dict, blank=True)
 
     citecollection = models.ForeignKey(
         "library.CITECollection", related_name="citedata", on_delete=models.CASCADE
@@ -207,9 +209,49 @@ class CTSCatalog(models.Model):
         return self.urn
 
 
+class RelationQuerySet(models.QuerySet):
+    def for_subjects(self, queryset):
+        """
+        Relations whose subject is one of the objects of `queryset`.
+        """
+        content_type = ContentType.objects.get_for_model(queryset.model)
+        return self.filter(
+            subject_content_type=content_type, subject_id__in=queryset.values("pk")
+        )
+
+    def for_objects(self, queryset):
+        """
+        Relations whose object is one of the objects of `queryset`.
+        """
+        content_type = ContentType.objects.get_for_model(queryset.model)
+        return self.filter(
+            object_content_type=content_type, object_id__in=queryset.values("pk")
+        )
+
+    def with_targets(self):
+        """
+        Fetch the verbs, subjects and objects of the relations along with them,
+        in one query per content type rather than one per relation.
+        """
+        return self.select_related("verb").prefetch_related(
+            "subject_content_object", "object_content_object"
+        )
+
+    def with_objects(self):
+        """
+        Fetch only the objects of the relations along with them, for callers
+        that already hold the subjects.
+        """
+        return self.prefetch_related("object_content_object")
+
+
 class Relation(models.Model):
     """
     A unique triple of URNs combining to create a S-V-O relationship.
+
+    Subjects and objects are generic foreign keys, indexed on (content type,
+    id); `Relation.objects.for_subjects(...).with_targets()` resolves a batch
+    of relations in a constant number of queries.
     """
 
     subject_content_type = models.ForeignKey(
@@ -239,6 +281,14 @@ class Relation(models.Model):
         "library.CITELibrary", related_name="relations", on_delete=models.CASCADE
     )
 
+    objects = RelationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["subject_content_type", "subject_id"]),
+            models.Index(fields=["object_content_type", "object_id"]),
+        ]
+
     def __str__(self):
         subject_obj = self.subject_content_object
         object_obj = self.object_content_object
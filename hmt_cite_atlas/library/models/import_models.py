@@ -0,0 +1,72 @@
+from django.db import models
+
+from django_jsonfield_backport.models import JSONField
+
+
+class RecordFingerprint(models.Model):
+    """
+    Digest of a parsed CEX record as of the last delta import of a library.
+
+    `key` is the record URN (or the JSON encoded S-V-O triple for relations).
+    """
+
+    block = models.CharField(max_length=32)
+    key = models.TextField()
+    digest = models.CharField(max_length=40)
+    data = JSONField(
+        blank=True,
+        null=True,
+        help_text="Resolved URNs of a relation, needed to remove its rows",
+    )
+
+    citelibrary = models.ForeignKey(
+        "library.CITELibrary", related_name="fingerprints", on_delete=models.CASCADE
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["citelibrary", "block", "key"])]
+
+    def __str__(self):
+        return f"{self.block} {self.key}"
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of the last (non-bulk) import of a library, saved along with each
+    chunk of objects it writes so an interrupted import can be resumed.
+
+    `position` is the number of index keys processed so far, `key` and
+    `block` those of the last one; `counters` holds the visited / problem
+    counts at that point.
+    """
+
+    content_hash = models.CharField(max_length=40)
+    block = models.CharField(max_length=32, blank=True)
+    key = models.TextField(blank=True)
+    position = models.PositiveIntegerField(default=0)
+    counters = JSONField(default=dict)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    citelibrary = models.OneToOneField(
+        "library.CITELibrary", related_name="checkpoint", on_delete=models.CASCADE
+    )
+
+    def __str__(self):
+        return f"{self.citelibrary_id} {self.position} {self.key}"
+
+
+class DeferredIndex(models.Model):
+    """
+    An index that `sqlite.deferred_indexes` dropped for the duration of an
+    import, with the statement that recreates it.
+
+    Rows only outlive the import if it was interrupted; the next import
+    recreates their indexes (see `sqlite.restore_indexes`).
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    sql = models.TextField()
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,179 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+
+from .importers import IGNORE_BLOCKS, Parser
+from .readers import CEXReader
+
+
+# Large blocks that are independent once the header blocks are known; these
+# are split into line-aligned byte ranges and parsed in worker processes.
+PARALLEL_BLOCKS = {"#!ctsdata", "#!citedata", "#!relations"}
+CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def split_range(path, start, end, chunk_bytes=CHUNK_BYTES):
+    """
+    Split the bytes between `start` and `end` into ranges of roughly
+    `chunk_bytes` that begin and end on line boundaries.
+    """
+    boundaries = [start]
+    with open(path, "rb") as f:
+        offset = start + chunk_bytes
+        while offset < end:
+            f.seek(offset)
+            f.readline()
+            offset = f.tell()
+            if offset >= end:
+                break
+            boundaries.append(offset)
+            offset += chunk_bytes
+    boundaries.append(end)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def read_range(path, block, start, end):
+    # The block tag resets the parser state as it would in a serial parse.
+    yield block
+    with CEXReader(path, persist=False) as reader:
+        yield from reader.iter_lines(start, end)
+
+
+class RangeParser(Parser):
+    """
+    Parses the lines of a single block between two byte offsets, given the
+    column state collected from the header blocks.
+    """
+
+    def __init__(self, full_content_path, block, start, end, state):
+        super().__init__(full_content_path, None)
+        self.block = block
+        self.start = start
+        self.end = end
+        self.columns, self.dynamic_columns, self.property_flags = state
+
+    def iter_lines(self):
+        return read_range(self.full_content_path, self.block, self.start, self.end)
+
+
+def parse_range(task):
+    """
+    Worker entry point; returns the parsed (key, record) pairs for a byte
+    range along with the number of #!ctsdata lines that were read.
+    """
+    parser = RangeParser(*task)
+    position = 0
+    for data in parser.yield_data():
+        position = data.get("position", position)
+        parser.handle(**data)
+    return list(parser.index.items()), position
+
+
+class ParallelParser(Parser):
+    """
+    Parser that looks up block boundaries in the `CEXReader` index, parses the header blocks in
+    process and hands PARALLEL_BLOCKS (split into line-aligned byte ranges) to a
+    process pool.
+
+    The resulting index is identical to the one built by `Parser`, provided the
+    header blocks precede the data they describe (as the serial parser also
+    assumes).
+    """
+
+    def __init__(
+        self,
+        full_content_path,
+        library_obj,
+        chunk_bytes=CHUNK_BYTES,
+        max_workers=None,
+        profiler=None,
+    ):
+        super().__init__(full_content_path, library_obj, profiler=profiler)
+        self.chunk_bytes = chunk_bytes
+        self.max_workers = max_workers or os.cpu_count()
+        self.current_range = None
+
+    def iter_lines(self):
+        return read_range(self.full_content_path, *self.current_range)
+
+    def parse_range(self, block, start, end):
+        self.current_range = (block, start, end)
+        self.index = {}
+        for data in self.yield_data():
+            self.handle(**data)
+        return list(self.index.items())
+
+    def consume_column_header(self, block, start, end):
+        """
+        Consume the column header of the first block of its kind (see
+        `Parser.yield_data`) and return the offset after it.
+        """
+        self.current_block = block
+        if not self.use_block_columns() or self.columns.get(block):
+            return start
+
+        with open(self.full_content_path, "rb") as f:
+            f.seek(start)
+            while f.tell() < end:
+                line = f.readline().decode("utf-8").strip()
+                if not self.is_empty_line(line):
+                    self.columns[block] = self.split_line(line)
+                    break
+            return f.tell()
+
+    def get_tasks(self, blocks):
+        state = (self.columns, self.dynamic_columns, self.property_flags)
+        for pos, (block, start, end) in enumerate(blocks):
+            if block not in PARALLEL_BLOCKS:
+                continue
+            start = self.consume_column_header(block, start, end)
+            for chunk_start, chunk_end in split_range(
+                self.full_content_path, start, end, self.chunk_bytes
+            ):
+                task = (self.full_content_path, block, chunk_start, chunk_end, state)
+                yield pos, task
+
+    def apply(self):
+        print("ParallelParser.apply")
+        with CEXReader(self.full_content_path) as reader:
+            blocks = [
+                (entry["block"], entry["start"], entry["end"])
+                for entry in reader.get_blocks()
+            ]
+
+        results = {}
+        self.profiler.start("ParallelParser.headers")
+        for pos, (block, start, end) in enumerate(blocks):
+            if block in PARALLEL_BLOCKS or block in IGNORE_BLOCKS:
+                continue
+            results[pos] = self.parse_range(block, start, end)
+        self.profiler.stop("ParallelParser.headers")
+
+        tasks = list(self.get_tasks(blocks))
+        # Worker processes don't need (and shouldn't share) database connections.
+        connections.close_all()
+        with self.profiler.phase("ParallelParser.workers"), ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=django.setup
+        ) as executor:
+            offsets = {}
+            parsed = executor.map(parse_range, [task for _, task in tasks])
+            for (pos, _), (entries, lines) in zip(tasks, parsed):
+                offset = offsets.get(pos, 0)
+                if offset:
+                    for _, record in entries:
+                        record.idx += offset
+                        record.position += offset
+                offsets[pos] = offset + lines
+                results.setdefault(pos, []).extend(entries)
+
+        self.profiler.start("ParallelParser.merge")
+        self.index = {}
+        for pos in sorted(results):
+            for key, record in results[pos]:
+                self.index[key] = record
+                if record.block == "#!ctsdata":
+                    self.hierarchy.add(key)
+        self.profiler.stop("ParallelParser.merge")
+        return self.index
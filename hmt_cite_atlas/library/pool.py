@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.db import connections
+
+from . import importers
+
+
+def log(*objs):
+    print(*objs, file=sys.stderr, sep="\n")
+
+
+def get_content_path(data):
+    return os.path.join(importers.LIBRARY_DATA_PATH, data["content_path"])
+
+
+def parse_library(full_content_path, snapshot):
+    """
+    Worker entry point; returns the parsed (index, hierarchy) of a library and
+    the seconds it took.
+    """
+    started = time.perf_counter()
+    parsed = importers.parse_library(full_content_path, snapshot=snapshot)
+    return parsed, time.perf_counter() - started
+
+
+class LibraryPool:
+    """
+    Imports several libraries at once: each library is parsed in a worker
+    process, while this process is the only one that writes to the database.
+
+    Libraries are submitted largest file first and written (in the batched
+    transactions of the visitor used) in the order their parses complete, so
+    the wall time of an import approaches that of its largest library rather
+    than the sum of all of them. Progress and parse / write timings are logged
+    per library.
+
+    LibraryPool(max_workers=4, bulk=True).apply(libraries)
+
+    Workers parse with `Parser` (a worker can't start a process pool of its
+    own for `ParallelParser`); `stream` imports aren't supported.
+    """
+
+    def __init__(self, max_workers=None, snapshot=False, **options):
+        self.max_workers = max_workers or os.cpu_count()
+        self.snapshot = snapshot
+        self.options = options
+        self.timings = {}
+
+    def write(self, data, parsed):
+        started = time.perf_counter()
+        importers._import_library(data, parsed=parsed, **self.options)
+        return time.perf_counter() - started
+
+    def apply(self, libraries):
+        if not libraries:
+            return self.timings
+        started = time.perf_counter()
+        libraries = sorted(
+            libraries,
+            key=lambda data: os.path.getsize(get_content_path(data)),
+            reverse=True,
+        )
+
+        # Worker processes don't need (and shouldn't share) database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=min(self.max_workers, len(libraries)), initializer=django.setup
+        ) as executor:
+            futures = {
+                executor.submit(
+                    parse_library, get_content_path(data), self.snapshot
+                ): data
+                for data in libraries
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                data = futures[future]
+                parsed, parse_time = future.result()
+                progress = f"[{done}/{len(libraries)}] {data['urn']}"
+                log(f"{progress}: parsed in {parse_time:.2f}s")
+                write_time = self.write(data, parsed)
+                log(f"{progress}: written in {write_time:.2f}s")
+                self.timings[data["urn"]] = {"parse": parse_time, "write": write_time}
+
+        total = time.perf_counter() - started
+        slowest = max(sum(timing.values()) for timing in self.timings.values())
+        log(
+            f"Imported {len(libraries)} libraries in {total:.2f}s "
+            f"(slowest library: {slowest:.2f}s)"
+        )
+        return self.timings
@@ -0,0 +1,170 @@
+import cProfile
+import json
+import os
+import re
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+
+from django.db import connection
+
+
+class ImportProfiler:
+    """
+    Records wall time, CPU time, SQL queries, rows written and peak traced
+    memory per import phase.
+
+    Phases are named (e.g. "Parser.#!ctsdata") and can be nested; a phase that
+    is entered more than once accumulates. With `cprofile_dir` the top level
+    phases are also run under cProfile and dumped to `<phase>.prof` files.
+
+    with ImportProfiler() as profiler:
+        with profiler.phase("Parser.apply"):
+            ...
+    profiler.write(path)
+
+    A disabled profiler (the default of the importers) only costs a method
+    call per phase.
+    """
+
+    def __init__(self, enabled=True, cprofile_dir=None):
+        self.enabled = enabled
+        self.cprofile_dir = cprofile_dir
+        self.phases = {}
+        self.active = {}
+        self.switched = {}
+        self.queries = 0
+        self.rows = 0
+        self.exit_stack = None
+
+    def __enter__(self):
+        if self.enabled:
+            self.exit_stack = ExitStack()
+            self.exit_stack.enter_context(connection.execute_wrapper(self.execute))
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.exit_stack.callback(tracemalloc.stop)
+        return self
+
+    def __exit__(self, *exc_info):
+        for name in list(self.active):
+            self.stop(name)
+        if self.exit_stack is not None:
+            self.exit_stack.close()
+            self.exit_stack = None
+
+    def execute(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.queries += 1
+        # SELECTs report -1 (or the number of rows fetched so far).
+        if sql.lstrip()[:6].upper() != "SELECT":
+            self.rows += max(context["cursor"].rowcount, 0)
+        return result
+
+    def sample_memory(self):
+        if not tracemalloc.is_tracing():
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        for state in self.active.values():
+            state["peak_memory"] = max(state["peak_memory"], peak)
+        tracemalloc.reset_peak()
+
+    def start(self, name):
+        if not self.enabled or name in self.active:
+            return
+        self.sample_memory()
+        state = {
+            "wall": time.perf_counter(),
+            "cpu": time.process_time(),
+            "queries": self.queries,
+            "rows": self.rows,
+            "peak_memory": 0,
+            "cprofile": None,
+        }
+        # Reported in the order phases were first entered.
+        self.phases.setdefault(
+            name,
+            {
+                "calls": 0,
+                "wall": 0.0,
+                "cpu": 0.0,
+                "queries": 0,
+                "rows": 0,
+                "peak_memory": 0,
+            },
+        )
+        if self.cprofile_dir and not self.active:
+            state["cprofile"] = cProfile.Profile()
+            state["cprofile"].enable()
+        self.active[name] = state
+
+    def stop(self, name):
+        state = self.active.get(name)
+        if state is None:
+            return
+        if state["cprofile"]:
+            state["cprofile"].disable()
+            self.dump_cprofile(name, state["cprofile"])
+        self.sample_memory()
+        del self.active[name]
+
+        phase = self.phases[name]
+        phase["calls"] += 1
+        phase["wall"] += time.perf_counter() - state["wall"]
+        phase["cpu"] += time.process_time() - state["cpu"]
+        phase["queries"] += self.queries - state["queries"]
+        phase["rows"] += self.rows - state["rows"]
+        phase["peak_memory"] = max(phase["peak_memory"], state["peak_memory"])
+
+    @contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield self
+        finally:
+            self.stop(name)
+
+    def switch(self, scope, name):
+        """
+        Stop the phase last switched to within `scope` (if it's a different
+        one) and start `name`; used to time consecutive runs of a loop, such as
+        the lines of a block.
+        """
+        current = self.switched.get(scope)
+        if current == name or not self.enabled:
+            return
+        if current is not None:
+            self.stop(current)
+        self.start(name)
+        self.switched[scope] = name
+
+    def finish(self, scope):
+        current = self.switched.pop(scope, None)
+        if current is not None:
+            self.stop(current)
+
+    def dump_cprofile(self, name, profile):
+        os.makedirs(self.cprofile_dir, exist_ok=True)
+        filename = re.sub(r"[^\w.-]+", "_", name).strip("_")
+        profile.dump_stats(os.path.join(self.cprofile_dir, f"{filename}.prof"))
+
+    def get_report(self):
+        return {
+            "queries": self.queries,
+            "rows": self.rows,
+            "phases": [{"name": name, **phase} for name, phase in self.phases.items()],
+        }
+
+    def report(self):
+        lines = []
+        for name, phase in self.phases.items():
+            lines.append(
+                f"{name}: {phase['wall']:.2f}s wall, {phase['cpu']:.2f}s CPU, "
+                f"{phase['queries']} queries, {phase['rows']} rows, "
+                f"{phase['peak_memory'] / 1024 / 1024:.1f} MiB peak"
+            )
+        return lines
+
+    def write(self, path, **extra):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**extra, **self.get_report()}, f, indent=2)
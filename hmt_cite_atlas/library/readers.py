@@ -0,0 +1,240 @@
+import io
+import json
+import mmap
+import os
+
+from django.utils.functional import cached_property
+
+from . import constants
+from .compression import get_compression
+from .importers import Parser
+
+
+SIDECAR_SUFFIX = ".blocks.json"
+SIDECAR_VERSION = 1
+
+# Blocks whose parser state has to be built before a block can be parsed.
+BLOCK_DEPENDENCIES = {
+    "#!citedata": ["#!citeproperties"],
+    "#!citeproperties": ["#!citecollections"],
+}
+
+
+class CEXReader:
+    """
+    Memory-mapped access to a CEX file.
+
+    The byte offsets, line counts and column headers of every block are kept in
+    a sidecar index next to the file (`<path>.blocks.json`), so tools that only
+    need a single block can seek straight to it. The sidecar is rebuilt when
+    the size or modification time of the CEX file changes.
+
+    #!ctsdata entries also record the runs of lines belonging to each catalog.
+
+    Compressed files (see `compression.CEXStream`) can't be read this way.
+    """
+
+    def __init__(self, path, index_path=None, persist=True):
+        if get_compression(path):
+            raise ValueError(f"{path} is compressed and can't be memory-mapped")
+        self.path = path
+        self.index_path = index_path or f"{path}{SIDECAR_SUFFIX}"
+        self.persist = persist
+        self._file = None
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._data is not None and not isinstance(self._data, bytes):
+            self._data.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._file = open(self.path, "rb")
+            if os.fstat(self._file.fileno()).st_size:
+                self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                # Empty files can't be memory-mapped.
+                self._data = b""
+        return self._data
+
+    def get_source(self):
+        stat = os.stat(self.path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def iter_raw_lines(self, start=0, end=None):
+        """
+        Yield (offset, raw line) pairs between two byte offsets.
+        """
+        data = self.data
+        end = len(data) if end is None else end
+        offset = start
+        while offset < end:
+            newline = data.find(b"\n", offset, end)
+            stop = end if newline == -1 else newline + 1
+            yield offset, data[offset:stop]
+            offset = stop
+
+    def iter_lines(self, start, end):
+        """
+        Yield decoded lines between two byte offsets.
+        """
+        raw = self.data[start:end]
+        yield from io.TextIOWrapper(io.BytesIO(raw), encoding="utf-8")
+
+    def build_index(self):
+        tags = {tag.encode("utf-8") for tag in constants.BLOCKS}
+        delimiter = constants.DELIMITER.encode("utf-8")
+        comment = constants.COMMENT.encode("utf-8")
+
+        blocks = []
+        entry = None
+        for offset, raw in self.iter_raw_lines():
+            line = raw.strip()
+            if line in tags:
+                if entry:
+                    entry["end"] = offset
+                entry = {
+                    "block": line.decode("utf-8"),
+                    "start": offset + len(raw),
+                    "end": None,
+                    "lines": 0,
+                    "columns": None,
+                }
+                if entry["block"] == "#!ctsdata":
+                    entry["catalogs"] = {}
+                blocks.append(entry)
+                continue
+            if entry is None or not line or line.startswith(comment):
+                continue
+
+            entry["lines"] += 1
+            if entry["block"] == "#!ctsdata":
+                urn = line.split(delimiter, maxsplit=1)[0].decode("utf-8")
+                catalog_urn = Parser.get_urn_root(urn)
+                runs = entry["catalogs"].setdefault(catalog_urn, [])
+                if runs and runs[-1][1] == offset:
+                    runs[-1][1] = offset + len(raw)
+                else:
+                    # [start, end, position of the first line in the block]
+                    runs.append([offset, offset + len(raw), entry["lines"]])
+            elif entry["columns"] is None:
+                entry["columns"] = Parser.split_line(line.decode("utf-8"))
+
+        if entry:
+            entry["end"] = len(self.data)
+        return {
+            "version": SIDECAR_VERSION,
+            "source": self.get_source(),
+            "blocks": blocks,
+        }
+
+    def load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != SIDECAR_VERSION:
+            return None
+        if index.get("source") != self.get_source():
+            return None
+        return index
+
+    @cached_property
+    def index(self):
+        index = self.load_index()
+        if index is None:
+            index = self.build_index()
+            if self.persist:
+                with open(self.index_path, "w", encoding="utf-8") as f:
+                    json.dump(index, f)
+        return index
+
+    def get_blocks(self, *blocks):
+        return [
+            entry
+            for entry in self.index["blocks"]
+            if not blocks or entry["block"] in blocks
+        ]
+
+    def iter_block(self, block):
+        for entry in self.get_blocks(block):
+            yield from self.iter_lines(entry["start"], entry["end"])
+
+    def get_catalog_runs(self, catalog_urn):
+        for entry in self.get_blocks("#!ctsdata"):
+            yield from entry["catalogs"].get(catalog_urn, [])
+
+    def iter_catalog(self, catalog_urn):
+        for start, end, _ in self.get_catalog_runs(catalog_urn):
+            yield from self.iter_lines(start, end)
+
+
+class BlockParser(Parser):
+    """
+    Parser that seeks straight to the requested blocks through a `CEXReader`
+    instead of reading the whole file.
+
+    Blocks the requested ones depend on (see BLOCK_DEPENDENCIES) are read as
+    well, but only objects from the requested blocks are indexed. With `catalog_urn`
+    only the #!ctsdata lines of that catalog are read; their idx / position
+    values match those of a full parse.
+
+    BlockParser(path, library_obj, ["#!citedata"]).apply()
+    """
+
+    def __init__(self, full_content_path, library_obj, blocks, catalog_urn=None):
+        super().__init__(full_content_path, library_obj)
+        self.blocks = set(blocks)
+        self.catalog_urn = catalog_urn
+        self.reader = CEXReader(full_content_path)
+        self.position_offset = 0
+
+    def get_required_blocks(self):
+        blocks = set()
+        pending = list(self.blocks)
+        while pending:
+            block = pending.pop()
+            if block not in blocks:
+                blocks.add(block)
+                pending.extend(BLOCK_DEPENDENCIES.get(block, []))
+        return blocks
+
+    def iter_lines(self):
+        for entry in self.reader.get_blocks(*self.get_required_blocks()):
+            block = entry["block"]
+            if block == "#!ctsdata" and self.catalog_urn:
+                for start, end, position in entry["catalogs"].get(self.catalog_urn, []):
+                    # The block tag resets the position counter for each run.
+                    self.position_offset = position - 1
+                    yield block
+                    yield from self.reader.iter_lines(start, end)
+                continue
+
+            self.position_offset = 0
+            yield block
+            yield from self.reader.iter_lines(entry["start"], entry["end"])
+
+    def index_obj(self, record, key=None):
+        if self.current_block in self.blocks:
+            super().index_obj(record, key=key)
+
+    def handle_ctsdata(self, idx, position, line, **data):
+        offset = self.position_offset
+        super().handle_ctsdata(idx + offset, position + offset, line, **data)
+
+    def apply(self):
+        try:
+            return super().apply()
+        finally:
+            self.reader.close()
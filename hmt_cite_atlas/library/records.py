@@ -0,0 +1,127 @@
+import sys
+from collections.abc import Mapping
+
+
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Record(Mapping):
+    """
+    A parsed CEX row, stored as the value of its key in the parser index.
+
+    Records use `__slots__` and know their block, so the index holds neither a
+    dict nor a (block, obj_kwargs) tuple per row; URNs are interned so the
+    keys, relation subjects / objects and foreign key URNs of a library share
+    one string each. The citelibrary is added by whoever turns a record back
+    into model kwargs (see `as_kwargs`).
+
+    Records are read-only mappings of their fields, so `record["urn"]` and
+    `dict(record)` work as they did for the obj_kwargs dicts they replace.
+    """
+
+    __slots__ = ()
+    _fields = ()
+    block = None
+
+    def __getitem__(self, field):
+        if field not in self._fields:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.__reduce__()[1] == other.__reduce__()[1]
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def as_kwargs(self, citelibrary=None):
+        """
+        Return a new dict of model kwargs; list values are copied, as the
+        `Visitor` resolves URNs within them in place.
+        """
+        kwargs = {"citelibrary": citelibrary}
+        for field, value in self.items():
+            kwargs[field] = list(value) if isinstance(value, list) else value
+        return kwargs
+
+
+class HeaderRecord(Record):
+    """
+    A row of one of the (small) header blocks, whose fields follow the
+    columns declared in the file.
+    """
+
+    __slots__ = ("block", "data")
+
+    def __init__(self, block, data):
+        self.block = block
+        self.data = data
+
+    def __getitem__(self, field):
+        return self.data[field]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class CtsPassage(Record):
+    __slots__ = ("urn", "text_content", "position", "idx", "ctscatalog")
+    _fields = __slots__
+    block = "#!ctsdata"
+
+    def __init__(self, urn, text_content, position, idx, ctscatalog):
+        self.urn = intern(urn)
+        self.text_content = text_content
+        self.position = position
+        self.idx = idx
+        self.ctscatalog = intern(ctscatalog)
+
+
+class CiteDatum(Record):
+    """
+    A #!citedata row; the values are kept in a tuple alongside the (shared)
+    column names of the collection.
+    """
+
+    __slots__ = ("urn", "citecollection", "columns", "row")
+    _fields = ("urn", "citecollection", "fields")
+    block = "#!citedata"
+
+    def __init__(self, urn, citecollection, columns, row):
+        self.urn = intern(urn)
+        self.citecollection = intern(citecollection)
+        self.columns = columns
+        self.row = row
+
+    @property
+    def fields(self):
+        return dict(zip(self.columns, self.row))
+
+
+class CiteRelation(Record):
+    __slots__ = ("subject_obj", "verb", "object_obj", "object_at")
+    _fields = __slots__
+    block = "#!relations"
+
+    def __init__(self, subject_obj, verb, object_obj, object_at):
+        self.subject_obj = intern(subject_obj)
+        self.verb = intern(verb)
+        self.object_obj = [intern(urn) for urn in object_obj]
+        self.object_at = object_at
@@ -0,0 +1,71 @@
+from collections import defaultdict
+
+
+class URNRegistry:
+    """
+    Import-scoped URN -> pk map of the objects created so far, kept as
+    {model: {urn: pk}} (the shape `bulk.RelationLoader` expects) instead of
+    holding on to model instances.
+
+    A registry belongs to a single import (see `importers.Visitor`) and is
+    dropped along with it, so nothing leaks between libraries or between
+    repeated imports in one process. Entries are never evicted: a miss would
+    create the object a second time.
+    """
+
+    def __init__(self):
+        self.pks = defaultdict(dict)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(len(pks) for pks in self.pks.values())
+
+    def add(self, instance):
+        self.pks[type(instance)][instance.urn] = instance.pk
+
+    def load(self, model, queryset):
+        """
+        Register the (urn, pk) pairs of `queryset`, e.g. the objects an
+        interrupted import already created.
+        """
+        self.pks[model].update(queryset.order_by().values_list("urn", "pk"))
+
+    def get(self, model, urn):
+        """
+        Return an unsaved `model` instance carrying the pk registered for
+        `urn` (enough to use as a foreign key value), or None.
+        """
+        pk = self.pks[model].get(urn)
+        if pk is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return model(pk=pk, urn=urn)
+
+    def find(self, urn):
+        """
+        Like `get`, for whichever model `urn` is registered for.
+        """
+        for model, pks in self.pks.items():
+            pk = pks.get(urn)
+            if pk is not None:
+                self.hits += 1
+                return model(pk=pk, urn=urn)
+        self.misses += 1
+        return None
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.pks.clear()
+        self.hits = self.misses = 0
+
+    def report(self):
+        return (
+            f"URN registry: {len(self)} URNs, {self.hits} hits / "
+            f"{self.hits + self.misses} lookups ({self.hit_rate:.0%})"
+        )
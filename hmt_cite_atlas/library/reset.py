@@ -0,0 +1,169 @@
+import sys
+import time
+
+from django.apps import apps
+from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.contenttypes.models import ContentType
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import CITELibrary, Relation
+
+
+def log(*objs):
+    print(*objs, file=sys.stderr, sep="\n")
+
+
+def get_reset_models():
+    """
+    Return the models with a `citelibrary` foreign key, ordered so that each
+    model comes before the models it references.
+    """
+    models = [
+        model
+        for model in apps.get_app_config("library").get_models()
+        if any(field.name == "citelibrary" for field in model._meta.concrete_fields)
+    ]
+    references = {}
+    for model in models:
+        related_models = {
+            field.related_model
+            for field in model._meta.concrete_fields
+            if field.many_to_one and field.related_model in models
+        }
+        references[model] = related_models - {model}
+
+    ordered = []
+    while references:
+        # Models no remaining model refers to can go next.
+        referenced = set().union(*references.values())
+        ready = [model for model in references if model not in referenced]
+        if not ready:
+            raise ValueError(f"Circular references between {list(references)}")
+        for model in ready:
+            ordered.append(model)
+            del references[model]
+    return ordered
+
+
+def get_generic_relations():
+    """
+    Yield the (model, field) pairs of the generic relations to `Relation`.
+    """
+    for model in get_reset_models():
+        for field in model._meta.private_fields:
+            if isinstance(field, GenericRelation) and field.related_model is Relation:
+                yield model, field
+
+
+class LibraryReset:
+    """
+    Deletes the rows of a library with one set-based DELETE per table, scoped
+    to its `citelibrary_id`, instead of the collector of `QuerySet.delete`
+    (which loads the pks of every cascaded row into memory first):
+
+    LibraryReset(library_obj).apply()
+
+    Tables are emptied in foreign key safe order (see `get_reset_models`)
+    within one transaction. Relations of other libraries whose verb, subject
+    or object belongs to the library are deleted as well, as the generic
+    relations of Book, Line, Section and CITEDatum would have cascaded to them.
+
+    The row count and time of each table are kept in `timings` and logged.
+    """
+
+    def __init__(self, library_obj, using=DEFAULT_DB_ALIAS, delete_library=True):
+        self.library_obj = library_obj
+        self.connection = connections[using]
+        self.using = using
+        self.delete_library = delete_library
+        self.timings = {}
+
+    def quote(self, name):
+        return self.connection.ops.quote_name(name)
+
+    def execute(self, name, sql, params):
+        started = time.perf_counter()
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.rowcount
+        seconds = time.perf_counter() - started
+
+        timing = self.timings.setdefault(name, {"rows": 0, "seconds": 0.0})
+        timing["rows"] += rows
+        timing["seconds"] += seconds
+
+    def get_library_pks_sql(self, model):
+        return (
+            f"SELECT {self.quote(model._meta.pk.column)} "
+            f"FROM {self.quote(model._meta.db_table)} "
+            f"WHERE {self.quote(model._meta.get_field('citelibrary').column)} = %s"
+        )
+
+    def delete_foreign_relations(self):
+        """
+        Delete the relations of other libraries that point into this one.
+        """
+        pk = self.library_obj.pk
+        verb = Relation._meta.get_field("verb")
+        conditions = [
+            f"{self.quote(verb.column)} IN "
+            f"({self.get_library_pks_sql(verb.related_model)})"
+        ]
+        params = [pk]
+        content_types = ContentType.objects.db_manager(self.using)
+        for model, field in get_generic_relations():
+            content_type = Relation._meta.get_field(field.content_type_field_name)
+            object_id = Relation._meta.get_field(field.object_id_field_name)
+            conditions.append(
+                f"({self.quote(content_type.column)} = %s AND "
+                f"{self.quote(object_id.column)} IN "
+                f"({self.get_library_pks_sql(model)}))"
+            )
+            params.extend([content_types.get_for_model(model).pk, pk])
+
+        self.execute(
+            Relation.__name__,
+            f"DELETE FROM {self.quote(Relation._meta.db_table)} "
+            f"WHERE {' OR '.join(conditions)}",
+            params,
+        )
+
+    def apply(self):
+        pk = self.library_obj.pk
+        with transaction.atomic(using=self.using):
+            self.delete_foreign_relations()
+            for model in get_reset_models():
+                column = model._meta.get_field("citelibrary").column
+                self.execute(
+                    model.__name__,
+                    f"DELETE FROM {self.quote(model._meta.db_table)} "
+                    f"WHERE {self.quote(column)} = %s",
+                    [pk],
+                )
+            if self.delete_library:
+                self.execute(
+                    CITELibrary.__name__,
+                    f"DELETE FROM {self.quote(CITELibrary._meta.db_table)} "
+                    f"WHERE {self.quote(CITELibrary._meta.pk.column)} = %s",
+                    [pk],
+                )
+
+        log(f"Reset {self.library_obj.urn}:")
+        log(
+            *(
+                f"  {name}: {timing['rows']} rows in {timing['seconds']:.2f}s"
+                for name, timing in self.timings.items()
+            )
+        )
+        return self.timings
+
+
+def reset_libraries(queryset=None, using=DEFAULT_DB_ALIAS):
+    """
+    Reset every library in `queryset` (all libraries by default).
+    """
+    queryset = CITELibrary.objects.using(using) if queryset is None else queryset
+    return {
+        library_obj.urn: LibraryReset(library_obj, using=using).apply()
+        for library_obj in queryset
+    }
@@ -0,0 +1,225 @@
+import os
+import sqlite3
+import sys
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import (
+    Book,
+    CITECollection,
+    CITEDatum,
+    CITELibrary,
+    CITEProperty,
+    CTSCatalog,
+    Datamodel,
+    Line,
+    Relation,
+    Scholion,
+    Section
+)
+from .sqlite import active_profiles
+
+
+COUNTED_MODELS = [
+    CITELibrary,
+    CTSCatalog,
+    CITECollection,
+    CITEProperty,
+    Datamodel,
+    CITEDatum,
+    Book,
+    Scholion,
+    Line,
+    Section,
+    Relation,
+]
+
+
+def log(*objs):
+    print(*objs, file=sys.stderr, sep="\n")
+
+
+class ShadowDatabaseError(Exception):
+    pass
+
+
+class ShadowDatabase:
+    """
+    Points the default (SQLite) connection at a side database file for the
+    duration of an import and swaps it into place once it passes its checks:
+
+    with ShadowDatabase():
+        ...
+
+    The shadow database starts out as an online backup of the live one (so
+    sites, users and the fingerprints of delta imports carry over) and is
+    migrated. The live file is never written to; serving processes keep
+    reading it until the swap and pick up the new file with their next
+    connection (Django opens one per request unless CONN_MAX_AGE is set).
+
+    Before the swap the shadow database has to pass `PRAGMA integrity_check`
+    and `PRAGMA foreign_key_check`, contain a library, and keep at least
+    `min_ratio` of the rows of each model the live database had (None skips
+    that check). If the import or a check fails, the shadow file is removed
+    and the live database is left as it was.
+    """
+
+    def __init__(self, min_ratio=0.5, vacuum=True):
+        self.connection = connections[DEFAULT_DB_ALIAS]
+        self.path = self.connection.settings_dict["NAME"]
+        self.shadow_path = f"{self.path}.shadow"
+        self.min_ratio = min_ratio
+        self.vacuum = vacuum
+        self.counts = {}
+        self.profile = None
+
+    def __enter__(self):
+        if self.connection.vendor != "sqlite":
+            raise ShadowDatabaseError("Shadow imports require an SQLite database")
+        self.remove_shadow()
+        if os.path.exists(self.path):
+            self.copy_live()
+
+        self.profile = active_profiles.get(self.connection.alias)
+        self.connect(self.shadow_path)
+        call_command("migrate", interactive=False, verbosity=0)
+        self.counts = self.get_counts()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        swap = False
+        try:
+            if exc_type is None:
+                self.check()
+                self.optimize()
+                swap = True
+        finally:
+            self.connect(self.path)
+            if swap:
+                self.swap()
+                log(f"Swapped {self.shadow_path} into place.")
+            else:
+                self.remove_shadow()
+
+    def remove_shadow(self):
+        for suffix in ["", "-journal", "-wal", "-shm"]:
+            if os.path.exists(f"{self.shadow_path}{suffix}"):
+                os.remove(f"{self.shadow_path}{suffix}")
+
+    def copy_live(self):
+        # The backup only holds a shared lock on the live database, so readers
+        # aren't blocked while it is copied.
+        source = sqlite3.connect(self.path)
+        target = sqlite3.connect(self.shadow_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    def swap(self):
+        wal = os.path.exists(self.path) and self.get_journal_mode() == "wal"
+        self.set_journal_mode(self.shadow_path, "DELETE")
+        if wal:
+            self.checkpoint_live()
+        os.replace(self.shadow_path, self.path)
+        if wal:
+            # SQLite opens the -wal file next to a database whatever mode its
+            # header is in, so the (checkpointed, empty) ones of the previous
+            # file are removed. Open connections keep the files they have, and
+            # their snapshot of the previous release; new connections get
+            # fresh ones for the new file. As the last of the old connections
+            # removes the -wal file by name when it closes, the live database
+            # is only meant to be read (see settings.SQLITE_QUERY_ONLY).
+            for suffix in ["-wal", "-shm"]:
+                if os.path.exists(f"{self.path}{suffix}"):
+                    os.remove(f"{self.path}{suffix}")
+
+    def checkpoint_live(self):
+        """
+        Copy the frames in the -wal file of the live database back into it and
+        truncate the -wal file, so none of them can be replayed on top of the
+        shadow database once it replaces the live file.
+        """
+        connection = sqlite3.connect(self.path)
+        try:
+            busy, _, _ = connection.execute(
+                "PRAGMA wal_checkpoint(TRUNCATE);"
+            ).fetchone()
+        finally:
+            connection.close()
+        if busy:
+            raise ShadowDatabaseError(
+                f"Unable to checkpoint {self.path}; {self.shadow_path} was not "
+                "swapped into place"
+            )
+
+    def set_journal_mode(self, path, mode):
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute(f"PRAGMA journal_mode={mode};")
+        finally:
+            connection.close()
+
+    def get_journal_mode(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute("PRAGMA journal_mode;").fetchone()[0]
+        finally:
+            connection.close()
+
+    def connect(self, path):
+        self.connection.close()
+        self.connection.settings_dict["NAME"] = path
+        # Nothing else uses the shadow database while it is built, so it
+        # doesn't need a journal, syncs or locks that let other connections in.
+        alias = self.connection.alias
+        if path == self.shadow_path:
+            active_profiles[alias] = "shadow"
+        elif self.profile is None:
+            active_profiles.pop(alias, None)
+        else:
+            active_profiles[alias] = self.profile
+        ContentType.objects.clear_cache()
+
+    def get_counts(self):
+        return {model.__name__: model.objects.count() for model in COUNTED_MODELS}
+
+    def execute(self, sql):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    def check(self):
+        problems = []
+        integrity = self.execute("PRAGMA integrity_check;")
+        if integrity != [("ok",)]:
+            problems.append(f"integrity_check: {integrity[:10]}")
+        foreign_keys = self.execute("PRAGMA foreign_key_check;")
+        if foreign_keys:
+            problems.append(f"foreign_key_check: {foreign_keys[:10]}")
+
+        counts = self.get_counts()
+        for name, count in counts.items():
+            log(f"{name}: {self.counts[name]} -> {count} rows")
+        if not counts["CITELibrary"]:
+            problems.append("No libraries were imported")
+        if self.min_ratio is not None:
+            for name, count in counts.items():
+                if count < self.counts[name] * self.min_ratio:
+                    problems.append(
+                        f"{name} dropped from {self.counts[name]} to {count} rows"
+                    )
+
+        if problems:
+            raise ShadowDatabaseError(
+                f"{self.shadow_path} failed its checks:\n" + "\n".join(problems)
+            )
+
+    def optimize(self):
+        self.execute("ANALYZE;")
+        if self.vacuum:
+            # Reclaims the pages of the previous import that were deleted.
+            self.execute("VACUUM;")
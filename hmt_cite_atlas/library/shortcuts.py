@@ -1,61 +1,69 @@
 import csv
 import json
 import os
-import re
 from collections import defaultdict
 from pathlib import Path
 
-from django.db.models import Q
-
 import tqdm
 
 from hmt_cite_atlas.iiif import IIIFResolver
 from hmt_cite_atlas.library.models import (
     CITEDatum,
     CTSCatalog,
+    DSERecord,
+    Folio,
     Line,
+    Relation,
     Scholion,
     Section
 )
+from hmt_cite_atlas.urns import parse_urn
 
 
 CITATION_SCHEME_SCHOLION = "scholion"
 MSA_VERSION_URN = "urn:cts:greekLit:tlg0012.tlg001.msA:"
+MSA_IMAGE_PROPERTY_URN = "urn:cite2:hmt:msA.v1.image:"
+COMMENTS_ON_URN = "urn:cite2:cite:verbs.v1:commentsOn"
 
 
 def get_scholion_for_dse_scholion(scholion_cite_datum):
-    # FIXME: There might be a way we can use a subquery against the values in `urn:cite2:hmt:va_dse.v1.passage:`
-    scholion_urns = [
-        l.fields["urn:cite2:hmt:va_dse.v1.passage:"] for l in scholion_cite_datum
-    ]
-    scholion = Scholion.objects.filter(urn__in=scholion_urns)
+    scholion = Scholion.objects.filter(dse_records__datum__in=scholion_cite_datum)
     return Section.objects.filter(scholion__in=scholion)
 
 
+def get_commented_objects(subjects, verb_urn=None):
+    """
+    Map the pk of each object of the `subjects` queryset (e.g. the sections of
+    a folio or book) to the objects of its relations, in a constant number of
+    queries. Like `subject_relations`, relations of any verb are included
+    unless `verb_urn` (e.g. COMMENTS_ON_URN) is given.
+
+    get_commented_objects(book.sections.all())
+    -> {section_pk: [line, ...], ...}
+    """
+    relations = Relation.objects.for_subjects(subjects)
+    if verb_urn is not None:
+        relations = relations.filter(verb__urn=verb_urn)
+    relations = relations.with_objects().order_by("pk")
+    commented = defaultdict(list)
+    for relation in relations:
+        commented[relation.subject_id].append(relation.object_content_object)
+    return commented
+
+
 def extract_folios_range(urn):
-    _, ref = urn.rsplit(":", maxsplit=1)
-    pieces = ref.split("-")
-    for pos, piece in enumerate(pieces):
-        pieces[pos] = piece.split(".", maxsplit=1)[0]
     folio_datum_urn = "urn:cite2:hmt:msA.v1:"
-    return [f"{folio_datum_urn}{piece}" for piece in pieces]
+    return [f"{folio_datum_urn}{parts[0]}" for parts in parse_urn(urn).endpoints]
 
 
 def get_folios_in_range(urns):
-    first = CITEDatum.objects.get(urn=urns[0])
-    last = CITEDatum.objects.get(urn=urns[1])
-    folio_datum_urn = "urn:cite2:hmt:msA.v1:"
-    # @@@ prefer idx
+    first = Folio.objects.get(urn=urns[0])
+    last = Folio.objects.get(urn=urns[1])
     return CITEDatum.objects.filter(
-        urn__startswith=folio_datum_urn, id__gte=first.pk, id__lte=last.pk
-    ).order_by("id")
-
-
-def folio_sort_key(ref):
-    folio = ref.split(":").pop()
-    folio_int = int(re.sub("\D", "", folio))
-    recto_verso_part = 0 if folio.endswith("r") else 1
-    return (folio_int, recto_verso_part)
+        folio__citecollection=first.citecollection_id,
+        folio__ordinal__gte=first.ordinal,
+        folio__ordinal__lte=last.ordinal,
+    ).order_by("folio__ordinal")
 
 
 def get_lines_for_folio(folio_urn):
@@ -68,21 +76,20 @@ def get_lines_for_folio(folio_urn):
         print(f'Could not resolve folio [urn="{folio_urn}""]')
         raise e
 
-    # @@@ this will break in SQLite for the time being, but not in the future:
-    # https://code.djangoproject.com/ticket/12990
-    # https://github.com/laymonage/django-jsonfield-backport/pull/13
-    # kwargs = {"fields__contains": {"urn:cite2:hmt:va_dse.v1.surface:": folio.urn}}
-    kwargs = {f"fields__urn:cite2:hmt:va_dse.v1.surface:": folio.urn}
-    folio_cite_datum = CITEDatum.objects.filter(**kwargs)
+    # FIXME: TextPartNode preferred
+    # A subquery rather than a join with `distinct()`, so the lines are read in
+    # `idx` order from the (ctscatalog, idx) index without a sort.
+    dse_records = DSERecord.objects.filter(surface=folio).values("line_id")
+    return Line.objects.filter(ctscatalog__urn=MSA_VERSION_URN, pk__in=dse_records)
 
-    version_urn = MSA_VERSION_URN
 
-    # @@@ might be a way we can do some db-level "icontains" against `urn:cite2:hmt:va_dse.v1.passage:`
-    line_cite_datum = folio_cite_datum.filter(fields__icontains=version_urn)
-    # @@@ might be a way we can use a subquery against the values in `urn:cite2:hmt:va_dse.v1.passage:`
-    # FIXME: TextPartNode preferred
-    line_urns = [l.fields["urn:cite2:hmt:va_dse.v1.passage:"] for l in line_cite_datum]
-    return Line.objects.filter(urn__in=line_urns)
+def get_folios_for_image(image_urn):
+    """
+    get_folios_for_image("urn:cite2:hmt:vaimg.2017a:VA012RN_0013")
+
+    Uses the index on the (JSON) image property, see `json_indexes`.
+    """
+    return CITEDatum.objects.filter(**{f"fields__{MSA_IMAGE_PROPERTY_URN}": image_urn})
 
 
 def get_dse_scholion_for_folio(folio_urn):
@@ -95,18 +102,14 @@ def get_dse_scholion_for_folio(folio_urn):
         print(f'Could not resolve folio [urn="{folio_urn}""]')
         raise e
 
-    # @@@ this will break in SQLite for the time being, but not in the future:
-    # https://code.djangoproject.com/ticket/12990
-    # kwargs = {"fields__contains": {"urn:cite2:hmt:va_dse.v1.surface:": folio.urn}}
-    kwargs = {f"fields__urn:cite2:hmt:va_dse.v1.surface:": folio.urn}
-    return CITEDatum.objects.filter(**kwargs)
+    return CITEDatum.objects.filter(dse_record__surface=folio)
 
 
 def munge_urn(version_urn, urn, folio_urn):
     if version_urn in urn:
         return urn
-    version_part, ref = urn.rsplit(":", maxsplit=1)
-    _, folio_ref = folio_urn.rsplit(":", maxsplit=1)
+    ref = parse_urn(urn).passage
+    folio_ref = parse_urn(folio_urn).passage
     return f"{version_urn}{folio_ref}.{ref}"
 
 
@@ -126,10 +129,12 @@ def extract_text_annotations(folio_urn, version_urn=None):
 
     # e.g. urn:cts:greekLit:tlg5026.msAint.hmt:7.3007.comment
     scholion = get_scholion_for_dse_scholion(dse_scholion)
+    commented = get_commented_objects(scholion)
     text_annotations = {}
     for scholia in scholion:
         s = scholia
-        simplified_urn, kind = s.urn.rsplit(".", maxsplit=1)
+        section_urn = parse_urn(s.urn)
+        simplified_urn, kind = section_urn.parent, section_urn.parts[-1]
         data = text_annotations.setdefault(simplified_urn, {"urn": simplified_urn})
         data[kind] = s.text_content
         if "dse" not in data:
@@ -142,11 +147,9 @@ def extract_text_annotations(folio_urn, version_urn=None):
         if data["references"]:
             continue
 
-        for sr in s.subject_relations.all():
-            if sr.object_content_object:
-                data["references"].append(
-                    munge_urn(version_urn, sr.object_content_object.urn, folio_urn)
-                )
+        for obj in commented[s.pk]:
+            if obj:
+                data["references"].append(munge_urn(version_urn, obj.urn, folio_urn))
             else:
                 # TODO:
                 pass
@@ -162,7 +165,7 @@ def extract_textual_annotations(outdir, version_part, version_urn, folio):
         print(f"no annotations found for {folio.urn}")
         return
 
-    urn, folio = folio.urn.rsplit(":", maxsplit=1)
+    folio = parse_urn(folio.urn).passage
     outf = outdir / f"text_annotations_{version_part}-{folio}.json"
     json.dump(
         list(annotations.values()),
@@ -175,18 +178,14 @@ def extract_textual_annotations(outdir, version_part, version_urn, folio):
 def do_textual_annotation_extraction(outdir):
     # TODO: Run this against a single folio via debug flag
     # NOTE: This passage covers _all_ folios
-    passage = "urn:cts:greekLit:tlg0012.tlg001.msA-folios:12r.1.1-326v.24.804"
-    version_urn, _ = passage.rsplit(":", maxsplit=1)
-    pieces = [p for p in version_urn.rsplit(":") if p]
-    version_part = pieces[-1]
-    version_urn = f"{version_urn}:"
+    passage = parse_urn(
+        "urn:cts:greekLit:tlg0012.tlg001.msA-folios:12r.1.1-326v.24.804"
+    )
+    version_part = passage.work
+    version_urn = passage.root
 
-    urns = extract_folios_range(passage)
+    urns = extract_folios_range(passage.urn)
     folios = get_folios_in_range(urns)
-    folio_urns = [f.urn for f in folios]
-
-    folio_urns = sorted(folio_urns, key=folio_sort_key)
-
     for folio in tqdm.tqdm(folios):
         extract_textual_annotations(outdir, version_part, version_urn, folio)
 
@@ -230,9 +229,9 @@ def do_cex_folios_export(outdir):
     rows = []
     version_urn = "urn:cts:greekLit:tlg0012.tlg001.msA-folios"
     for folio_urn, lines in lookup.items():
-        folio_label = folio_urn.rsplit(":", maxsplit=1)[1]
+        folio_label = parse_urn(folio_urn).passage
         for line in lines:
-            ref = line.urn.rsplit(":", maxsplit=1)[1]
+            ref = parse_urn(line.urn).passage
             rows.append(
                 [line.idx, f"{version_urn}:{folio_label}.{ref}", line.text_content]
             )
@@ -257,23 +256,13 @@ def do_cex_export(outdir):
 
 
 def extract_image_annotation(folio, version_urn):
-    folio_image_urn = folio.fields["urn:cite2:hmt:msA.v1.image:"]
+    folio_image_urn = folio.fields[MSA_IMAGE_PROPERTY_URN]
     folio_image = CITEDatum.objects.get(urn=folio_image_urn)
     lines = get_lines_for_folio(folio.urn)
     urns = [l.urn for l in lines]
-    predicate = Q()
-    for urn in urns:
-        predicate.add(
-            # @@@ this will break in SQLite for the time being, but not in the future:
-            # https://code.djangoproject.com/ticket/12990
-            # https://github.com/laymonage/django-jsonfield-backport/pull/13
-            # Q(fields__contains={"urn:cite2:hmt:va_dse.v1.passage:": urn}), Q.OR
-            Q(**{"fields__urn:cite2:hmt:va_dse.v1.passage:": urn}),
-            Q.OR,
-        )
     # @@@ this could be other scholion too
-    results = CITEDatum.objects.filter(predicate).order_by("pk")
-    ref = folio.urn.rsplit(":", maxsplit=1)[1]
+    results = CITEDatum.objects.filter(dse_record__passage__in=urns).order_by("pk")
+    ref = parse_urn(folio.urn).passage
 
     iiif_obj = IIIFResolver(folio_image.urn)
     image_annotation = {
@@ -287,7 +276,7 @@ def extract_image_annotation(folio, version_urn):
     rois = []
     for result in results:
         passage_urn = result.fields["urn:cite2:hmt:va_dse.v1.passage:"]
-        _, passage_ref = passage_urn.rsplit(":", maxsplit=1)
+        passage_ref = parse_urn(passage_urn).passage
         rois.append(
             {
                 "data": result.fields,
@@ -306,19 +295,19 @@ def extract_image_annotations(outdir, version_urn, version_part, folio):
         print(f"no image annotations were found for {folio.urn}")
         return
 
-    urn, image_name = annotation["urn"].rsplit(":", maxsplit=1)
+    image_name = parse_urn(annotation["urn"]).passage
     outf = outdir / f"image_annotation_{version_part}-{image_name}.json"
     with outf.open("w", encoding="utf-8") as f:
         json.dump([annotation], f, indent=2, ensure_ascii=False)
 
 
 def do_extract_image_annotations(outdir):
-    passage = "urn:cts:greekLit:tlg0012.tlg001.msA-folios:12r.1.1-326v.24.804"
-    version_urn, _ = passage.rsplit(":", maxsplit=1)
-    pieces = [p for p in version_urn.rsplit(":") if p]
-    version_part = pieces[-1]
-    version_urn = f"{version_urn}:"
-    urns = extract_folios_range(passage)
+    passage = parse_urn(
+        "urn:cts:greekLit:tlg0012.tlg001.msA-folios:12r.1.1-326v.24.804"
+    )
+    version_part = passage.work
+    version_urn = passage.root
+    urns = extract_folios_range(passage.urn)
     folios = get_folios_in_range(urns)
     for folio in tqdm.tqdm(folios):
         extract_image_annotations(outdir, version_urn, version_part, folio)
@@ -0,0 +1,123 @@
+import hashlib
+import mmap
+import os
+import pickle
+from functools import lru_cache
+
+from django.utils.functional import cached_property
+
+from .. import urns
+from . import constants, hierarchy, importers, records
+
+
+SNAPSHOT_SUFFIX = ".snapshot"
+SNAPSHOT_VERSION = 1
+
+# Modules whose code determines the output of a parse; changing any of them
+# invalidates existing snapshots.
+PARSER_MODULES = [constants, hierarchy, importers, records, urns]
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+@lru_cache(maxsize=16)
+def hash_content(path, inode, size, mtime_ns):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_content_hash(path):
+    """
+    The SHA-1 of the content of `path`, computed once for as long as the file,
+    its size and its modification time stay the same (e.g. for both the
+    checkpoint and the parse snapshot of an import).
+    """
+    stat = os.stat(path)
+    return hash_content(
+        os.path.abspath(path), stat.st_ino, stat.st_size, stat.st_mtime_ns
+    )
+
+
+def get_parser_hash():
+    digest = hashlib.sha1()
+    for module in PARSER_MODULES:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ParseSnapshot:
+    """
+    The parser output (index and URN hierarchy) of a CEX file, pickled next to
+    the file (`<path>.snapshot`) so a later import of the same file can skip
+    parsing it:
+
+    snapshot = ParseSnapshot(path)
+    loaded = snapshot.load()
+    if loaded is None:
+        parser = Parser(path, library_obj)
+        index = parser.apply()
+        snapshot.save(index, parser.hierarchy)
+    else:
+        index, hierarchy = loaded
+
+    The snapshot starts with a small header holding its key: the content hash
+    of the CEX file and a hash of the parser code (see PARSER_MODULES). A
+    snapshot whose key doesn't match is ignored (and overwritten by the next
+    `save`), so editing the file or the parser invalidates it. Snapshots are
+    read through a memory map, without copying the file into memory first.
+    """
+
+    def __init__(self, path, snapshot_path=None):
+        self.path = path
+        self.snapshot_path = snapshot_path or f"{path}{SNAPSHOT_SUFFIX}"
+
+    @cached_property
+    def key(self):
+        return {
+            "version": SNAPSHOT_VERSION,
+            "content": get_content_hash(self.path),
+            "parser": get_parser_hash(),
+        }
+
+    def load(self):
+        """
+        Return the (index, hierarchy) of a valid snapshot, or None.
+        """
+        try:
+            f = open(self.snapshot_path, "rb")
+        except OSError:
+            return None
+        with f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files can't be memory-mapped.
+                return None
+            with data:
+                try:
+                    if pickle.load(data) != self.key:
+                        return None
+                    return pickle.load(data)
+                except (
+                    pickle.UnpicklingError,
+                    EOFError,
+                    AttributeError,
+                    ImportError,
+                    TypeError,
+                ):
+                    # Stale snapshots can refer to classes that were moved,
+                    # renamed or changed their signature; they are rebuilt.
+                    return None
+
+    def save(self, index, hierarchy):
+        # Written under a temporary name and moved into place, so a failed
+        # write never leaves a partial snapshot behind.
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(self.key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump((index, hierarchy), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.snapshot_path)
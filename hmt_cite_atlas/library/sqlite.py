@@ -0,0 +1,184 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import (
+    Book,
+    CITEDatum,
+    DeferredIndex,
+    Line,
+    Relation,
+    Scholion,
+    Section
+)
+
+
+# PRAGMA statements applied to each new SQLite connection, per profile:
+# - "serving" (the default) is read oriented; WAL lets readers carry on while
+#   an import writes, and the database file is memory mapped. With
+#   settings.SQLITE_QUERY_ONLY the connection also refuses writes.
+# - "import" trades durability for write throughput while libraries are
+#   loaded; the journal mode is left as it is, as WAL can't be left while
+#   other connections are open.
+# - "shadow" is used for a database that nothing else has open (see
+#   `shadow.ShadowDatabase`).
+PROFILES = {
+    "serving": [
+        "PRAGMA journal_mode=WAL;",
+        "PRAGMA synchronous=NORMAL;",
+        "PRAGMA mmap_size=268435456;",
+        "PRAGMA cache_size=-65536;",
+        "PRAGMA temp_store=MEMORY;",
+    ],
+    "import": [
+        "PRAGMA query_only=OFF;",
+        "PRAGMA synchronous=OFF;",
+        "PRAGMA cache_size=-262144;",
+        "PRAGMA temp_store=MEMORY;",
+    ],
+    "shadow": [
+        "PRAGMA query_only=OFF;",
+        "PRAGMA journal_mode=OFF;",
+        "PRAGMA synchronous=OFF;",
+        "PRAGMA locking_mode=EXCLUSIVE;",
+        "PRAGMA cache_size=-262144;",
+        "PRAGMA temp_store=MEMORY;",
+    ],
+}
+
+# The large tables that are bulk loaded by an import; their non-unique
+# indexes are dropped while they are loaded (see `deferred_indexes`).
+DEFERRED_INDEX_MODELS = [CITEDatum, Book, Scholion, Line, Section, Relation]
+
+# The profile of new connections, per database alias, while it differs from
+# settings.SQLITE_CONNECTION_PROFILE.
+active_profiles = {}
+
+
+def get_pragmas(name):
+    pragmas = list(PROFILES[name])
+    if name == "serving":
+        query_only = "ON" if settings.SQLITE_QUERY_ONLY else "OFF"
+        pragmas.append(f"PRAGMA query_only={query_only};")
+    return pragmas
+
+
+def apply_profile(cursor, name):
+    for pragma in get_pragmas(name):
+        cursor.execute(pragma)
+
+
+def configure_connection(sender, connection, **kwargs):
+    """
+    `connection_created` receiver that applies the profile of the connection.
+    """
+    if connection.vendor != "sqlite":
+        return
+    name = active_profiles.get(connection.alias, settings.SQLITE_CONNECTION_PROFILE)
+    with connection.cursor() as cursor:
+        apply_profile(cursor, name)
+
+
+def is_open(connection):
+    # PRAGMAs such as `synchronous` can't be changed inside a transaction, so
+    # within an atomic block the profile only applies to new connections.
+    if connection.vendor != "sqlite" or connection.connection is None:
+        return False
+    return not connection.in_atomic_block
+
+
+@contextmanager
+def connection_profile(name, using=DEFAULT_DB_ALIAS):
+    """
+    Apply the `name` profile to the (current and any new) `using` connection
+    and restore the previous profile afterwards.
+
+    with connection_profile("import"):
+        ...
+    """
+    connection = connections[using]
+    previous = active_profiles.get(using, settings.SQLITE_CONNECTION_PROFILE)
+    active_profiles[using] = name
+    try:
+        if is_open(connection):
+            with connection.cursor() as cursor:
+                apply_profile(cursor, name)
+        yield
+    finally:
+        if previous == settings.SQLITE_CONNECTION_PROFILE:
+            active_profiles.pop(using, None)
+        else:
+            active_profiles[using] = previous
+        if is_open(connection):
+            with connection.cursor() as cursor:
+                apply_profile(cursor, previous)
+
+
+def restore_indexes(using=DEFAULT_DB_ALIAS):
+    """
+    Recreate the indexes that a `deferred_indexes` block dropped and that are
+    still missing (e.g. as the import was killed), followed by ANALYZE, and
+    return their names.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return []
+
+    deferred = DeferredIndex.objects.using(using).order_by("pk")
+    restored = []
+    with connection.cursor() as cursor:
+        for name, sql in deferred.values_list("name", "sql"):
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name = %s",
+                [name],
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(sql)
+                restored.append(name)
+        deferred.delete()
+        if restored:
+            cursor.execute("ANALYZE;")
+    return restored
+
+
+@contextmanager
+def deferred_indexes(models=None, using=DEFAULT_DB_ALIAS):
+    """
+    Drop the non-unique indexes of `models` (DEFERRED_INDEX_MODELS by
+    default), so a bulk load doesn't maintain them row by row, and recreate
+    them from their original statements afterwards, followed by ANALYZE.
+
+    The statements are saved as `DeferredIndex` rows before the indexes are
+    dropped, so if the process dies before they are recreated, the next
+    `deferred_indexes` block (or `restore_indexes` call) recreates them.
+
+    Unique indexes (e.g. on `urn`) are kept, as loading relies on them to look
+    up the pks of the objects it just wrote.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        yield []
+        return
+
+    restore_indexes(using)
+    tables = [model._meta.db_table for model in models or DEFERRED_INDEX_MODELS]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'index' AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%' "
+            f"AND tbl_name IN ({', '.join(['%s'] * len(tables))})",
+            tables,
+        )
+        indexes = cursor.fetchall()
+        DeferredIndex.objects.using(using).bulk_create(
+            [DeferredIndex(name=name, sql=sql) for name, sql in indexes]
+        )
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+    try:
+        yield [name for name, _ in indexes]
+    finally:
+        if not restore_indexes(using):
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE;")
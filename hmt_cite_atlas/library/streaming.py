@@ -0,0 +1,263 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+import tqdm
+
+from ..urns import parse_urn
+from .bulk import LOOKUP_BATCH_SIZE, BulkVisitor, BulkWriter, chunked, log
+from .hierarchy import URNHierarchy
+from .importers import Parser
+from .models import (
+    Book,
+    CITECollection,
+    CITEDatum,
+    Line,
+    Relation,
+    Scholion,
+    Section
+)
+from .records import CtsPassage
+
+
+CHUNK_SIZE = 5000
+# Range filters per query when loading the lines / sections of a chunk of
+# relations (each one binds three parameters).
+RANGE_BATCH_SIZE = 100
+
+# Blocks that only depend on already resolved parents; these are handed to the
+# writer in chunks as they are parsed.
+STREAMED_BLOCKS = {"#!ctsdata", "#!citedata", "#!relations"}
+HEADER_BLOCKS = {
+    "#!ctscatalog",
+    "#!citecollections",
+    "#!citeproperties",
+    "#!datamodels",
+}
+
+
+class StreamingParser(Parser):
+    """
+    Parser that hands objects from STREAMED_BLOCKS to `sink` in chunks instead
+    of accumulating them in `self.index`.
+
+    The file is read in two passes: the first pass only indexes the header
+    blocks (which are small and define the columns used by #!citedata), the
+    second pass streams the data blocks.
+    """
+
+    def __init__(
+        self,
+        full_content_path,
+        library_obj,
+        sink,
+        chunk_size=CHUNK_SIZE,
+        profiler=None,
+    ):
+        super().__init__(full_content_path, library_obj, profiler=profiler)
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.blocks = HEADER_BLOCKS
+        self.chunk = {}
+        self.chunk_block = None
+
+    def ignore_block(self):
+        return super().ignore_block() or self.current_block not in self.blocks
+
+    def index_obj(self, record, key=None):
+        if self.current_block not in STREAMED_BLOCKS:
+            return super().index_obj(record, key=key)
+
+        if self.current_block != self.chunk_block:
+            self.flush()
+            self.chunk_block = self.current_block
+        self.chunk[key if key else record["urn"]] = record
+        if len(self.chunk) >= self.chunk_size:
+            self.flush()
+
+    def handle_ctsdata(self, idx, position, line, **data):
+        # Passages aren't added to `self.hierarchy`; `StreamingVisitor` expands
+        # the objects of relations against the rows already written instead.
+        urn, tokens = self.split_line(line)
+        self.index_obj(CtsPassage(urn, tokens, position, idx, self.get_urn_root(urn)))
+
+    def flush(self):
+        if self.chunk:
+            self.sink(self.chunk_block, list(self.chunk.items()))
+        self.chunk = {}
+
+    def parse(self, blocks):
+        self.blocks = blocks
+        for data in tqdm.tqdm(self.yield_data()):
+            self.profiler.switch("Parser", f"Parser.{self.current_block}")
+            self.handle(**data)
+        self.flush()
+        self.profiler.finish("Parser")
+        return self.index
+
+
+class StreamingVisitor(BulkVisitor):
+    """
+    Writes chunks of parsed objects as they arrive from a `StreamingParser`.
+
+    Only the URN -> pk maps (and relations that refer to objects further down
+    the file) stay resident between chunks: the books and scholia of a
+    #!ctsdata chunk are dropped once written, and the book, scholion and range
+    objects of a #!relations chunk are expanded with a `URNHierarchy` of just
+    the lines and sections they refer to, loaded from the database.
+    """
+
+    def __init__(self, library_obj, writer=None):
+        super().__init__({}, library_obj, writer=writer)
+        self.deferred = []
+
+    def write_chunk(self, model, instances):
+        instances = list(instances)
+        urns = [instance.urn for instance in instances]
+        return self.write(model, instances, urns=urns)
+
+    def is_duplicate(self, urn, record, *models):
+        # Duplicates within a chunk were already collapsed by the parser.
+        if any(urn in self.pks[model] for model in models):
+            self.problems.append((f"Duplicate URN: {urn}", record))
+            return True
+        return False
+
+    def visit_ctsdata(self, entries):
+        entries = [
+            (urn, record)
+            for urn, record in entries
+            if not self.is_duplicate(urn, record, Line, Section)
+        ]
+        self.books, self.scholia = {}, {}
+        lines, sections = self.split_hierarchy(entries)
+        # Books and scholia can span chunks; only write the ones seen first.
+        for model, urns in [(Book, self.books), (Scholion, self.scholia)]:
+            for urn in urns.keys() & self.pks[model].keys():
+                del urns[urn]
+        self.write_chunk(Book, self.build_books(start=len(self.pks[Book])))
+        self.write_chunk(Scholion, self.build_scholia(start=len(self.pks[Scholion])))
+        self.write_chunk(Line, self.build_lines(lines))
+        self.write_chunk(Section, self.build_sections(sections))
+        self.books, self.scholia = {}, {}
+
+    def visit_citedata(self, entries):
+        entries = [
+            (urn, record)
+            for urn, record in entries
+            if not self.is_duplicate(urn, record, CITEDatum)
+        ]
+        self.write_chunk(
+            CITEDatum, self.build(CITEDatum, entries, citecollection=CITECollection)
+        )
+
+    def get_positions(self, model, urns):
+        """
+        Return a {urn: (ctscatalog_id, idx)} map of the written `model` rows
+        for `urns`.
+        """
+        qs = model.objects.filter(citelibrary=self.library_obj).order_by()
+        positions = {}
+        for chunk in chunked(urns, LOOKUP_BATCH_SIZE):
+            rows = qs.filter(urn__in=chunk).values_list("urn", "ctscatalog_id", "idx")
+            positions.update((urn, (catalog_id, idx)) for urn, catalog_id, idx in rows)
+        return positions
+
+    def get_leaf_filters(self, model, urns):
+        """
+        Return `Q` filters for the `model` rows that the book, scholion and
+        range URNs in `urns` expand to.
+        """
+        filters = []
+        parents = [(Book, "book_id")]
+        if model is Section:
+            parents.append((Scholion, "scholion_id"))
+        for parent, field in parents:
+            pks = [self.pks[parent][urn] for urn in urns if urn in self.pks[parent]]
+            for chunk in chunked(pks, LOOKUP_BATCH_SIZE):
+                filters.append(Q(**{f"{field}__in": chunk}))
+
+        ranges = []
+        for urn in urns:
+            try:
+                parsed = parse_urn(urn)
+            except ValueError:
+                continue
+            if parsed.is_range:
+                ranges.append(parsed.endpoint_urns)
+        positions = self.get_positions(model, {urn for pair in ranges for urn in pair})
+        range_filters = []
+        for start, end in ranges:
+            start, end = positions.get(start), positions.get(end)
+            if start and end and start[0] == end[0]:
+                range_filters.append(
+                    Q(ctscatalog_id=start[0], idx__range=(start[1], end[1]))
+                )
+        for chunk in chunked(range_filters, RANGE_BATCH_SIZE):
+            filters.append(reduce(or_, chunk))
+        return filters
+
+    def load_hierarchy(self, entries):
+        """
+        Return a `URNHierarchy` of the written lines and sections that the
+        object URNs of the relation `entries` expand to.
+        """
+        urns = {urn for _, record in entries for urn in record.object_obj}
+        urns -= self.pks[Line].keys() | self.pks[Section].keys()
+        leaves = set()
+        for model in [Line, Section]:
+            qs = model.objects.filter(citelibrary=self.library_obj).order_by()
+            for q in self.get_leaf_filters(model, urns):
+                leaves.update(qs.filter(q).values_list("ctscatalog_id", "idx", "urn"))
+
+        hierarchy = URNHierarchy()
+        # Document order within each catalog.
+        for *_, urn in sorted(leaves):
+            hierarchy.add(urn)
+        return hierarchy
+
+    def visit_relations(self, entries):
+        self.relations.hierarchy = self.load_hierarchy(entries)
+        relations, deferred = self.relations.split(entries)
+        self.visited += self.writer.write(Relation, relations)
+        self.deferred.extend(deferred)
+
+    def visit_chunk(self, block, entries):
+        handlers = {
+            "#!ctsdata": self.visit_ctsdata,
+            "#!citedata": self.visit_citedata,
+            "#!relations": self.visit_relations,
+        }
+        handlers[block](entries)
+
+    def finish(self):
+        # Relations that referred to objects further down the file (or that
+        # can't be resolved at all, which are reported as problems).
+        self.relations.hierarchy = self.load_hierarchy(self.deferred)
+        self.visited += self.relations.write(self.deferred)
+        self.deferred = []
+
+        log(*self.writer.report())
+        return self.visited, self.problems
+
+
+def stream_library(
+    full_content_path, library_obj, chunk_size=CHUNK_SIZE, profiler=None
+):
+    """
+    Import a CEX file without materializing the whole parsed index.
+    """
+    visitor = StreamingVisitor(library_obj, writer=BulkWriter(profiler=profiler))
+    parser = StreamingParser(
+        full_content_path,
+        library_obj,
+        visitor.visit_chunk,
+        chunk_size=chunk_size,
+        profiler=profiler,
+    )
+    print("StreamingParser.apply")
+    visitor.index = parser.parse(HEADER_BLOCKS)
+    visitor.apply_headers()
+    parser.parse(STREAMED_BLOCKS)
+    return visitor.finish()
@@ -0,0 +1,260 @@
+import random
+
+
+ILIAD_URN = "urn:cts:greekLit:tlg0012.tlg001.msA:"
+SCHOLIA_VERSIONS = ["msA", "msAint", "msAim", "msAext", "msAil"]
+VERB_URN = "urn:cite2:cite:verbs.v1:commentsOn"
+WORDS = [
+    "μῆνιν",
+    "ἄειδε",
+    "θεὰ",
+    "Πηληϊάδεω",
+    "Ἀχιλῆος",
+    "οὐλομένην",
+    "ἣ",
+    "μυρί",
+    "Ἀχαιοῖς",
+    "ἄλγε",
+    "ἔθηκε",
+    "πολλὰς",
+    "δ'",
+    "ἰφθίμους",
+    "ψυχὰς",
+    "Ἄϊδι",
+    "προΐαψεν",
+    "ἡρώων",
+]
+
+COLLECTIONS = [
+    "urn:cite2:hmt:msA.v1:#Pages of the Venetus A#urn:cite2:hmt:msA.v1.label:#urn:cite2:hmt:msA.v1.sequence:#CC BY 3.0",
+    "urn:cite2:hmt:va_dse.v1:#DSE records for Venetus A#urn:cite2:hmt:va_dse.v1.label:##Public domain",
+    "urn:cite2:cite:verbs.v1:#Verbs for relations#urn:cite2:cite:verbs.v1.description:##Public domain",
+    "urn:cite2:hmt:vaimg.2017a:#Images of the Venetus A#urn:cite2:hmt:vaimg.2017a.caption:##CC BY-NC-SA 3.0",
+]
+PROPERTIES = [
+    "urn:cite2:hmt:msA.v1.sequence:#Page sequence#Number#",
+    "urn:cite2:hmt:msA.v1.urn:#URN#Cite2Urn#",
+    "urn:cite2:hmt:msA.v1.rv:#Recto or Verso#String#recto,verso",
+    "urn:cite2:hmt:msA.v1.label:#Label#String#",
+    "urn:cite2:hmt:msA.v1.image:#Default image#Cite2Urn#",
+    "urn:cite2:hmt:va_dse.v1.urn:#DSE record#Cite2Urn#",
+    "urn:cite2:hmt:va_dse.v1.label:#Label#String#",
+    "urn:cite2:hmt:va_dse.v1.passage:#Text passage#CtsUrn#",
+    "urn:cite2:hmt:va_dse.v1.imageroi:#Image region#Cite2Urn#",
+    "urn:cite2:hmt:va_dse.v1.surface:#Artifact surface#Cite2Urn#",
+    "urn:cite2:cite:verbs.v1.urn:#URN#Cite2Urn#",
+    "urn:cite2:cite:verbs.v1.description:#Description#String#",
+    "urn:cite2:hmt:vaimg.2017a.urn:#URN#Cite2Urn#",
+    "urn:cite2:hmt:vaimg.2017a.caption:#Caption#String#",
+    "urn:cite2:hmt:vaimg.2017a.rights:#License for binary image data#String#",
+]
+
+
+class SyntheticLibrary:
+    """
+    A deterministic CEX library of configurable size, shaped like an HMT
+    release (see `tests/constants.py`):
+
+    - an Iliad catalog with `books` x `lines` lines
+    - `catalogs` scholia catalogs with `scholia` scholia (lemma and comment
+      sections) per book
+    - page, image and DSE #!citedata for every line and scholion
+    - a commentsOn relation per scholion, some of which refer to (sometimes
+      malformed) passage ranges, sub-references or an entire book
+
+    SyntheticLibrary.at_scale(10).write("/tmp/synthetic.cex")
+    """
+
+    LINES_PER_PAGE = 25
+
+    def __init__(self, books=24, lines=25, scholia=10, catalogs=1, seed=0):
+        self.books = books
+        self.lines = lines
+        self.scholia = scholia
+        self.catalogs = catalogs
+        self.seed = seed
+
+    @classmethod
+    def at_scale(cls, scale, seed=0):
+        return cls(lines=25 * scale, scholia=10 * scale, catalogs=2, seed=seed)
+
+    @property
+    def scholia_catalogs(self):
+        return [
+            f"urn:cts:greekLit:tlg5026.{version}.hmt:"
+            for version in SCHOLIA_VERSIONS[: self.catalogs]
+        ]
+
+    @property
+    def pages(self):
+        return -(-self.books * self.lines // self.LINES_PER_PAGE)
+
+    def get_counts(self):
+        """
+        The number of objects a full import of the library creates, per model.
+        """
+        lines = self.books * self.lines
+        scholia = self.books * self.scholia * self.catalogs
+        return {
+            "CTSCatalog": 1 + self.catalogs,
+            "CITECollection": len(COLLECTIONS),
+            "CITEProperty": len(PROPERTIES),
+            "Datamodel": 1,
+            "CITEDatum": 1 + 2 * self.pages + lines + scholia,
+            "Book": self.books * (1 + self.catalogs),
+            "Scholion": scholia,
+            "Line": lines,
+            "Section": 2 * scholia,
+            "Relation": sum(rows for *_, rows in self.iter_relations_objects()),
+        }
+
+    def get_page(self, book, line):
+        page = ((book - 1) * self.lines + line - 1) // self.LINES_PER_PAGE + 1
+        return f"{(page + 1) // 2}{'r' if page % 2 else 'v'}", page
+
+    def get_image(self, page):
+        folio, number = page
+        return f"urn:cite2:hmt:vaimg.2017a:VA{folio.zfill(4).upper()}N_{number:04}"
+
+    def get_text(self, rng, length):
+        return " ".join(rng.choice(WORDS) for _ in range(length))
+
+    def get_roi(self, rng):
+        return ",".join(f"{rng.random():.8f}" for _ in range(4))
+
+    def get_object(self, book, line, n):
+        """
+        Return the object URN of the n-th relation of a catalog along with the
+        number of lines it refers to.
+        """
+        if n == 0:
+            return f"{ILIAD_URN}{book}", self.lines
+        end = min(line + 2, self.lines)
+        if n % 7 == 6 and end > line:
+            # Malformed ranges leave the book out of the end reference.
+            return f"{ILIAD_URN}{book}.{line}-{end}", end - line + 1
+        if n % 5 == 4 and end > line:
+            return f"{ILIAD_URN}{book}.{line}-{book}.{end}", end - line + 1
+        if n % 11 == 10:
+            return f"{ILIAD_URN}{book}.{line}@{WORDS[n % len(WORDS)]}", 1
+        return f"{ILIAD_URN}{book}.{line}", 1
+
+    def iter_relations_objects(self):
+        for catalog_urn in self.scholia_catalogs:
+            n = 0
+            for book in range(1, self.books + 1):
+                for scholion in range(1, self.scholia + 1):
+                    line = (scholion * 7) % self.lines + 1
+                    yield (catalog_urn, book, scholion, *self.get_object(book, line, n))
+                    n += 1
+
+    def iter_headers(self):
+        yield "#!cexversion"
+        yield "3.0"
+        yield ""
+        yield "#!citelibrary"
+        yield "name#Synthetic HMT library"
+        yield "urn#urn:cite2:hmt:publications.cex.synthetic:all"
+        yield ""
+        yield "#!datamodels"
+        yield "Collection#Model#Label#Description"
+        yield "urn:cite2:hmt:va_dse.v1:#urn:cite2:cite:datamodels.v1:dse#DSE model#Diplomatic scholarly edition"
+        yield ""
+        yield "#!citecollections"
+        yield "URN#Description#Labelling property#Ordering property#License"
+        yield from COLLECTIONS
+        yield ""
+        yield "#!citeproperties"
+        yield "Property#Label#Type#Authority list"
+        yield from PROPERTIES
+        yield ""
+
+    def iter_citedata(self, rng):
+        yield "#!citedata"
+        yield "sequence#urn#rv#label#image"
+        for page in range(1, self.pages + 1):
+            folio = f"{(page + 1) // 2}{'r' if page % 2 else 'v'}"
+            image = self.get_image((folio, page))
+            side = "recto" if page % 2 else "verso"
+            yield f"{page}#urn:cite2:hmt:msA.v1:{folio}#{side}#folio {folio}#{image}"
+        yield ""
+
+        yield "#!citedata"
+        yield "urn#caption#rights"
+        for page in range(1, self.pages + 1):
+            folio = f"{(page + 1) // 2}{'r' if page % 2 else 'v'}"
+            image = self.get_image((folio, page))
+            yield f"{image}#Venetus A folio {folio}#CC BY-NC-SA 3.0"
+        yield ""
+
+        yield "#!citedata"
+        yield "urn#label#passage#imageroi#surface"
+        for book in range(1, self.books + 1):
+            for line in range(1, self.lines + 1):
+                page = self.get_page(book, line)
+                yield (
+                    f"urn:cite2:hmt:va_dse.v1:il{book}_{line}"
+                    f"#DSE record for Iliad {book}.{line}"
+                    f"#{ILIAD_URN}{book}.{line}"
+                    f"#{self.get_image(page)}@{self.get_roi(rng)}"
+                    f"#urn:cite2:hmt:msA.v1:{page[0]}"
+                )
+        for catalog_idx, catalog_urn in enumerate(self.scholia_catalogs):
+            for book in range(1, self.books + 1):
+                for scholion in range(1, self.scholia + 1):
+                    line = (scholion * 7) % self.lines + 1
+                    page = self.get_page(book, line)
+                    yield (
+                        f"urn:cite2:hmt:va_dse.v1:schol{catalog_idx}_{book}_{scholion}"
+                        f"#DSE record for scholion {book}.{scholion}"
+                        f"#{catalog_urn}{book}.{scholion}"
+                        f"#{self.get_image(page)}@{self.get_roi(rng)}"
+                        f"#urn:cite2:hmt:msA.v1:{page[0]}"
+                    )
+        yield ""
+
+        yield "#!citedata"
+        yield "urn#description"
+        yield f"{VERB_URN}#Subject (a CtsUrn) comments on the object (a second CtsUrn)."
+        yield ""
+
+    def iter_ctsdata(self, rng):
+        yield "#!ctscatalog"
+        yield "urn#citationScheme#groupName#workTitle#versionLabel#exemplarLabel#online#lang"
+        yield f"{ILIAD_URN}#book,line#Homeric epic#Iliad#HMT project diplomatic edition##true#grc"
+        for catalog_urn in self.scholia_catalogs:
+            yield f"{catalog_urn}#book,scholion,section#Scholia#Scholia to the Iliad#HMT project edition##true#grc"
+        yield ""
+
+        yield "#!ctsdata"
+        for book in range(1, self.books + 1):
+            for line in range(1, self.lines + 1):
+                yield f"{ILIAD_URN}{book}.{line}#{self.get_text(rng, 6)}"
+        for catalog_urn in self.scholia_catalogs:
+            for book in range(1, self.books + 1):
+                for scholion in range(1, self.scholia + 1):
+                    ref = f"{catalog_urn}{book}.{scholion}"
+                    yield f"{ref}.lemma#{self.get_text(rng, 2)}"
+                    yield f"{ref}.comment#{self.get_text(rng, 12)}"
+        yield ""
+
+    def iter_relations(self):
+        yield "#!relations"
+        yield "subject#relation#object"
+        for catalog_urn, book, scholion, obj, _ in self.iter_relations_objects():
+            yield f"{catalog_urn}{book}.{scholion}#{VERB_URN}#{obj}"
+        yield ""
+
+    def iter_lines(self):
+        rng = random.Random(self.seed)
+        yield from self.iter_headers()
+        yield from self.iter_citedata(rng)
+        yield from self.iter_ctsdata(rng)
+        yield from self.iter_relations()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for line in self.iter_lines():
+                f.write(line)
+                f.write("\n")
+        return path
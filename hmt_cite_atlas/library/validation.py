@@ -0,0 +1,167 @@
+import json
+from collections import Counter, defaultdict
+
+from .importers import Parser, Visitor
+
+
+# Blocks whose records can be the subject or object of a relation (see
+# `bulk.RELATABLE_MODELS`); books are resolved through the `URNHierarchy`.
+RELATABLE_BLOCKS = {"#!ctsdata", "#!citedata"}
+
+
+class ValidationReport:
+    """
+    Problems found in a CEX file by `validate_library`:
+
+    - `unresolved`: URNs that no record of the library resolves, grouped by
+      block and by field (or verb, for #!relations), with the number of times
+      each one is referred to
+    - `patched`: known defects of the source that the parser works around
+      (e.g. malformed passage ranges like `1.13-14`), grouped by kind
+    - `duplicates`: keys that more than one record of a block was indexed under
+    - `malformed`: lines the parser couldn't handle at all
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = Counter()
+        self.unresolved = defaultdict(lambda: defaultdict(Counter))
+        self.patched = defaultdict(dict)
+        self.duplicates = defaultdict(list)
+        self.malformed = []
+
+    @property
+    def ok(self):
+        return not (self.unresolved or self.duplicates or self.malformed)
+
+    def get_report(self):
+        return {
+            "path": self.path,
+            "ok": self.ok,
+            "records": dict(self.records),
+            "unresolved": {
+                block: {group: dict(urns) for group, urns in groups.items()}
+                for block, groups in self.unresolved.items()
+            },
+            "patched": dict(self.patched),
+            "duplicates": dict(self.duplicates),
+            "malformed": self.malformed,
+        }
+
+    def report(self):
+        lines = [f"{self.path}: {sum(self.records.values())} records"]
+        for block, groups in self.unresolved.items():
+            for group, urns in groups.items():
+                lines.append(
+                    f"{block} {group}: {len(urns)} unresolved URNs "
+                    f"({sum(urns.values())} references)"
+                )
+        for kind, patches in self.patched.items():
+            lines.append(f"Patched {len(patches)} {kind} URNs")
+        for block, keys in self.duplicates.items():
+            lines.append(f"{block}: {len(keys)} duplicate keys")
+        if self.malformed:
+            lines.append(f"{len(self.malformed)} malformed lines")
+        return lines
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.get_report(), f, indent=2, ensure_ascii=False)
+
+
+class ValidationParser(Parser):
+    """
+    Parser that records duplicate keys, patched defects and lines it can't
+    handle in a `ValidationReport` instead of overwriting, patching silently or
+    stopping.
+    """
+
+    def __init__(self, full_content_path, report):
+        super().__init__(full_content_path, None)
+        self.report = report
+
+    def index_obj(self, record, key=None):
+        key = key if key else record["urn"]
+        if key in self.index:
+            self.report.duplicates[self.current_block].append(key)
+        super().index_obj(record, key)
+
+    def patched(self, kind, original, patched):
+        self.report.patched[kind][original] = patched
+
+    def apply(self):
+        for data in self.yield_data():
+            try:
+                self.handle(**data)
+            except Exception as e:
+                self.report.malformed.append(
+                    {
+                        "block": self.current_block,
+                        "line": data["line"],
+                        "error": f"{type(e).__name__}: {e}",
+                    }
+                )
+        return self.index
+
+
+class ValidationVisitor(Visitor):
+    """
+    Resolves the URNs of a parsed index the way `Visitor` and
+    `bulk.RelationLoader` do, against the index itself, without creating any
+    objects.
+    """
+
+    def __init__(self, index, hierarchy, report):
+        super().__init__(index, hierarchy=hierarchy)
+        self.report = report
+
+    def unresolved(self, block, group, urn):
+        self.report.unresolved[block][group][urn] += 1
+
+    def resolve_node(self, key, record):
+        for field, urn in self.filter_urn_nodes(record.as_kwargs()):
+            if not self.get_node_data(urn, record):
+                self.unresolved(record.block, field, urn)
+
+    def is_relatable(self, urn):
+        for candidate in [urn, f"{urn}.lemma", f"{urn}.comment"]:
+            record = self.index.get(candidate)
+            if getattr(record, "block", None) in RELATABLE_BLOCKS:
+                return True
+            if candidate in self.hierarchy.books:
+                return True
+        return False
+
+    def resolve_relation(self, record):
+        verb = record.verb
+        if getattr(self.index.get(verb), "block", None) != "#!citedata":
+            self.unresolved(record.block, verb, verb)
+        urns = [record.subject_obj, *self.hierarchy.expand_all(record.object_obj)]
+        for urn in urns:
+            if not self.is_relatable(urn):
+                self.unresolved(record.block, verb, urn)
+
+    def apply(self):
+        for key in self.keys:
+            record = self.index[key]
+            self.report.records[record.block] += 1
+            if record.block == "#!relations":
+                self.resolve_relation(record)
+            else:
+                self.resolve_node(key, record)
+        return self.report
+
+
+def validate_library(full_content_path):
+    """
+    Parse a CEX file and resolve its URNs in memory, without using the
+    database, and return a `ValidationReport`:
+
+    report = validate_library("data/library/hmt-2020h.cex")
+    print(*report.report(), sep="\\n")
+    report.write("hmt-2020h.validation.json")
+    """
+    report = ValidationReport(full_content_path)
+    parser = ValidationParser(full_content_path, report)
+    index = parser.apply()
+    return ValidationVisitor(index, parser.hierarchy, report).apply()
@@ -28,6 +28,10 @@ DATABASES = {
         "OPTIONS": {"timeout": 5 * 60},
     }
 }
+# PRAGMA profile of new SQLite connections (see `library.sqlite.PROFILES`)
+SQLITE_CONNECTION_PROFILE = os.environ.get("SQLITE_CONNECTION_PROFILE", "serving")
+# Opens serving connections with `PRAGMA query_only=ON`
+SQLITE_QUERY_ONLY = bool(int(os.environ.get("SQLITE_QUERY_ONLY", "0")))
 
 ALLOWED_HOSTS = ["localhost"]
 if "HEROKU_APP_NAME" in os.environ:
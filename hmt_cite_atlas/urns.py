@@ -0,0 +1,116 @@
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+
+# URNs are looked up again shortly after they are first parsed (e.g. a line
+# URN when its record is parsed and then added to the hierarchy), so a small
+# cache covers the hot paths without holding on to a whole library.
+URN_CACHE_SIZE = 4096
+
+
+class URN(
+    namedtuple(
+        "URN",
+        [
+            "urn",
+            "scheme",
+            "namespace",
+            "work",
+            "passage",
+            "reference",
+            "subreference",
+            "endpoints",
+        ],
+    )
+):
+    """
+    A parsed CTS or CITE2 URN; get one through `parse_urn`.
+
+    parse_urn("urn:cts:greekLit:tlg0012.tlg001.msA:1.13-1.14@μῆνιν")
+    URN(
+        urn="urn:cts:greekLit:tlg0012.tlg001.msA:1.13-1.14@μῆνιν",
+        scheme="cts",
+        namespace="greekLit",
+        work="tlg0012.tlg001.msA",
+        passage="1.13-1.14@μῆνιν",
+        reference="1.13-1.14",
+        subreference="μῆνιν",
+        endpoints=(("1", "13"), ("1", "14")),
+    )
+
+    For a CITE2 URN `work` is the collection (e.g. "msA.v1") and `passage` the
+    object identifier; image regions of interest are the subreference.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.urn
+
+    @property
+    def root(self):
+        """
+        The version (or collection) URN, e.g. "urn:cts:greekLit:tlg0012.tlg001.msA:"
+        """
+        return self.urn[: len(self.urn) - len(self.passage)]
+
+    @property
+    def version(self):
+        return self.work.rsplit(".", maxsplit=1)[-1]
+
+    @property
+    def parts(self):
+        """
+        The components of the (first endpoint of the) reference, e.g. ("1", "13")
+        """
+        return self.endpoints[0] if self.endpoints else ()
+
+    @property
+    def is_range(self):
+        return len(self.endpoints) == 2
+
+    @property
+    def endpoint_urns(self):
+        root = self.root
+        return tuple(f"{root}{'.'.join(parts)}" for parts in self.endpoints)
+
+    def ancestor(self, depth):
+        """
+        The URN of the first `depth` components of the reference; for an Iliad
+        line `ancestor(1)` is its book, for a scholion section `ancestor(2)` is
+        the scholion.
+        """
+        return f"{self.root}{'.'.join(self.parts[:depth])}"
+
+    @property
+    def parent(self):
+        return self.ancestor(len(self.parts) - 1)
+
+
+@lru_cache(maxsize=URN_CACHE_SIZE)
+def parse_urn(urn):
+    """
+    Return the (cached) `URN` for `urn`; raises ValueError for anything that
+    doesn't have the `urn:<scheme>:<namespace>:<work>:<passage>` shape.
+    """
+    head, _, passage = urn.rpartition(":")
+    components = head.split(":", maxsplit=3)
+    if len(components) != 4 or components[0] != "urn":
+        raise ValueError(f"Invalid URN: {urn}")
+    _, scheme, namespace, work = [sys.intern(component) for component in components]
+
+    reference, _, subreference = passage.partition("@")
+    endpoints = ()
+    if reference:
+        endpoints = tuple(tuple(ref.split(".")) for ref in reference.split("-"))
+    return URN(
+        urn,
+        scheme,
+        namespace,
+        work,
+        passage,
+        reference,
+        subreference or None,
+        endpoints,
+    )
@@ -5,6 +5,7 @@ from django.utils.functional import cached_property
 import requests
 
 from ..library.shortcuts import get_lines_for_folio
+from ..urns import parse_urn
 
 
 class AlignmentsShim:
@@ -31,8 +32,8 @@ class AlignmentsShim:
         return [l.urn for l in self.folio_lines]
 
     def get_ref(self):
-        first = self.line_urns[0].rsplit(":", maxsplit=1)[1]
-        last = self.line_urns[-1].rsplit(":", maxsplit=1)[1]
+        first = parse_urn(self.line_urns[0]).passage
+        last = parse_urn(self.line_urns[-1]).passage
         if first == last:
             return first
         return f"{first}-{last}"
@@ -1,9 +1,8 @@
-from django.db.models import Q
 from django.urls import reverse_lazy
 from django.utils.functional import cached_property
 
 from ..iiif import IIIFResolver
-from ..library.models import CITEDatum
+from ..library.models import CITEDatum, DSERecord
 from .shortcuts import build_absolute_url
 
 
@@ -65,24 +64,15 @@ class WebAnnotationGenerator:
 
     def get_urn_coordinates(self, urns):
         # @@@ support a single URN
-        predicate = Q()
-        for urn in urns:
-            predicate.add(
-                Q(fields__contains={"urn:cite2:hmt:va_dse.v1.passage:": urn}), Q.OR
-            )
-        results = CITEDatum.objects.filter(predicate).order_by("pk")
-        coordinates = []
-        for result in results:
-            if result.fields["urn:cite2:hmt:va_dse.v1.surface:"] != self.urn:
-                # @@@ validates that the URNs are found within the current folio
-                continue
-
-            _, roi = result.fields["urn:cite2:hmt:va_dse.v1.imageroi:"].rsplit(
-                "@", maxsplit=1
-            )
-            coords = [float(part) for part in roi.split(",")]
-            coordinates.append(coords)
-        return coordinates
+        # @@@ validates that the URNs are found within the current folio
+        # Records whose region of interest is malformed have null coordinates.
+        results = DSERecord.objects.filter(
+            passage__in=urns, surface__urn=self.urn, roi_x__isnull=False
+        ).order_by("datum_id")
+        return [
+            list(coords)
+            for coords in results.values_list("roi_x", "roi_y", "roi_w", "roi_h")
+        ]
 
     def get_bounding_box_dimensions(self, coords):
         dimensions = {}
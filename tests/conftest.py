@@ -0,0 +1,36 @@
+import shutil
+
+import pytest
+
+from hmt_cite_atlas.library import importers
+from hmt_cite_atlas.library.importers import _import_library
+from tests.utils import SAMPLE_CEX_PATH
+
+
+SAMPLE_LIBRARY = {
+    "urn": "urn:cite2:hmt:publications.cex.sample",
+    "content_path": "sample.cex",
+    "metadata": {"library_title": "Sample"},
+}
+
+
+@pytest.fixture
+def sample_cex_path(tmp_path):
+    """
+    A copy of the sample CEX file, so sidecar files end up in a temporary
+    directory.
+    """
+    path = tmp_path / "sample.cex"
+    shutil.copy(SAMPLE_CEX_PATH, path)
+    return str(path)
+
+
+@pytest.fixture
+def import_sample(sample_cex_path, monkeypatch, tmp_path):
+    """
+    Import the copy of the sample CEX file with `_import_library`:
+
+    import_sample(delta=True)
+    """
+    monkeypatch.setattr(importers, "LIBRARY_DATA_PATH", str(tmp_path))
+    return lambda **kwargs: _import_library(SAMPLE_LIBRARY, **kwargs)
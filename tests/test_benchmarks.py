@@ -0,0 +1,127 @@
+"""
+Import benchmarks against synthetic libraries; these only run when
+BENCHMARK_SCALES is set, e.g.:
+
+BENCHMARK_SCALES=1,10,100 BENCHMARK_REPORT=benchmarks.json pytest tests/test_benchmarks.py -s
+"""
+import json
+import os
+import time
+
+import pytest
+
+from hmt_cite_atlas.library import importers, models
+from hmt_cite_atlas.library.bulk import BulkVisitor
+from hmt_cite_atlas.library.importers import Parser, Visitor, import_libraries
+from hmt_cite_atlas.library.models import CITELibrary
+from hmt_cite_atlas.library.synthetic import SyntheticLibrary
+
+
+SCALES = [
+    int(scale) for scale in os.environ.get("BENCHMARK_SCALES", "").split(",") if scale
+]
+LIBRARY_URN = "urn:cite2:hmt:publications.cex.synthetic"
+
+pytestmark = pytest.mark.skipif(not SCALES, reason="BENCHMARK_SCALES is not set")
+
+
+@pytest.fixture(scope="module")
+def benchmark_report():
+    results = []
+    yield results
+    for result in results:
+        print(
+            f"{result['benchmark']} x{result['scale']}: {result['seconds']:.2f}s "
+            f"({result['records']} records)"
+        )
+    path = os.environ.get("BENCHMARK_REPORT")
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+@pytest.fixture(scope="module")
+def synthetic_cex(tmp_path_factory):
+    paths = {}
+
+    def get_path(scale):
+        if scale not in paths:
+            path = tmp_path_factory.mktemp(f"x{scale}") / "synthetic.cex"
+            paths[scale] = SyntheticLibrary.at_scale(scale).write(str(path))
+        return paths[scale]
+
+    return get_path
+
+
+@pytest.fixture
+def benchmark(benchmark_report):
+    def run(name, scale, func, records):
+        start = time.perf_counter()
+        result = func()
+        benchmark_report.append(
+            {
+                "benchmark": name,
+                "scale": scale,
+                "seconds": time.perf_counter() - start,
+                "records": records,
+            }
+        )
+        return result
+
+    return run
+
+
+def get_records(scale):
+    return sum(SyntheticLibrary.at_scale(scale).get_counts().values())
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_parser(benchmark, synthetic_cex, scale):
+    parser = Parser(synthetic_cex(scale), None)
+    index = benchmark("Parser.apply", scale, parser.apply, get_records(scale))
+    assert index
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("visitor_class", [Visitor, BulkVisitor])
+@pytest.mark.parametrize("scale", SCALES)
+def test_visitor(benchmark, synthetic_cex, scale, visitor_class):
+    library_obj = CITELibrary.objects.create(urn=LIBRARY_URN)
+    parser = Parser(synthetic_cex(scale), library_obj)
+    index = parser.apply()
+    visitor = visitor_class(index, library_obj, hierarchy=parser.hierarchy)
+
+    _, problems = benchmark(
+        f"{visitor_class.__name__}.apply", scale, visitor.apply, get_records(scale)
+    )
+    assert problems == []
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    "options", [{}, {"bulk": True}, {"stream": True}, {"parallel": True, "bulk": True}]
+)
+@pytest.mark.parametrize("scale", SCALES)
+def test_import_libraries(benchmark, synthetic_cex, monkeypatch, scale, options):
+    path = synthetic_cex(scale)
+    library_data_path = os.path.dirname(path)
+    metadata_path = os.path.join(library_data_path, "metadata.json")
+    with open(metadata_path, "w", encoding="utf-8") as f:
+        metadata = {"library_title": "Synthetic HMT library"}
+        library = {
+            "urn": LIBRARY_URN,
+            "content_path": os.path.basename(path),
+            "metadata": metadata,
+        }
+        json.dump({"libraries": [library]}, f)
+    monkeypatch.setattr(importers, "LIBRARY_DATA_PATH", library_data_path)
+    monkeypatch.setattr(importers, "LIBRARY_METADATA_PATH", metadata_path)
+
+    benchmark_name = "import_libraries({})".format(
+        ", ".join(f"{option}=True" for option in options)
+    )
+    benchmark(
+        benchmark_name, scale, lambda: import_libraries(**options), get_records(scale)
+    )
+    counts = SyntheticLibrary.at_scale(scale).get_counts()
+    assert {name: getattr(models, name).objects.count() for name in counts} == counts
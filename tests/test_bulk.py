@@ -0,0 +1,50 @@
+import pytest
+
+from hmt_cite_atlas.library.bulk import BulkVisitor, BulkWriter, chunked
+from hmt_cite_atlas.library.importers import Parser
+from hmt_cite_atlas.library.models import (
+    Book,
+    CITEDatum,
+    CITELibrary,
+    Line,
+    Relation,
+    Scholion,
+    Section
+)
+from tests.utils import SAMPLE_CEX_PATH
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.django_db
+def test_bulk_visitor():
+    library_obj = CITELibrary.objects.create(
+        urn="urn:cite2:hmt:publications.cex.sample"
+    )
+    index = Parser(SAMPLE_CEX_PATH, library_obj).apply()
+    visited, problems = BulkVisitor(
+        index, library_obj, BulkWriter(batch_size=2)
+    ).apply()
+
+    assert problems == []
+    assert Book.objects.count() == 3
+    assert Scholion.objects.count() == 2
+    assert Line.objects.count() == 4
+    assert Section.objects.count() == 3
+    assert CITEDatum.objects.count() == 9
+
+    line = Line.objects.get(urn="urn:cts:greekLit:tlg0012.tlg001.msA:1.2")
+    assert line.book.urn == "urn:cts:greekLit:tlg0012.tlg001.msA:1"
+    assert line.ctscatalog.urn == "urn:cts:greekLit:tlg0012.tlg001.msA:"
+
+    # Passage ranges produce one relation per line.
+    section = Section.objects.get(urn="urn:cts:greekLit:tlg5026.msA.hmt:1.2.comment")
+    objects = [r.object_content_object.urn for r in section.subject_relations.all()]
+    assert sorted(objects) == [
+        "urn:cts:greekLit:tlg0012.tlg001.msA:1.2",
+        "urn:cts:greekLit:tlg0012.tlg001.msA:1.3",
+    ]
+    assert Relation.objects.count() == 3
+    assert visited == 45
@@ -0,0 +1,107 @@
+import pytest
+
+from hmt_cite_atlas.library import importers, snapshots
+from hmt_cite_atlas.library.importers import Visitor
+from hmt_cite_atlas.library.models import (
+    Book,
+    CITEDatum,
+    CITELibrary,
+    ImportCheckpoint,
+    Line,
+    Relation,
+    Scholion,
+    Section
+)
+
+
+COUNTED_MODELS = [Book, Scholion, Line, Section, CITEDatum, Relation]
+
+
+def get_counts():
+    return {model.__name__: model.objects.count() for model in COUNTED_MODELS}
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_size(monkeypatch):
+    monkeypatch.setattr(importers, "CHECKPOINT_SIZE", 5)
+
+
+@pytest.mark.django_db
+def test_checkpoint_is_completed(import_sample):
+    import_sample()
+    checkpoint = ImportCheckpoint.objects.get()
+    assert checkpoint.completed
+    assert checkpoint.block == "#!relations"
+    assert checkpoint.position == 39
+    assert checkpoint.counters == {"visited": 45, "problems": 0}
+
+
+@pytest.mark.django_db
+def test_resume_interrupted_import(import_sample, monkeypatch):
+    resolve_node = Visitor.resolve_node
+    resolved = []
+    interrupt_at = []
+
+    def interrupt(self, key, record):
+        resolved.append(key)
+        if len(resolved) in interrupt_at:
+            interrupt_at.clear()
+            raise RuntimeError("Interrupted")
+        return resolve_node(self, key, record)
+
+    monkeypatch.setattr(Visitor, "resolve_node", interrupt)
+    import_sample()
+    expected = get_counts()
+    full_import = len(resolved)
+    CITELibrary.objects.all().delete()
+
+    resolved.clear()
+    interrupt_at.append(12)
+    with pytest.raises(RuntimeError):
+        import_sample()
+    checkpoint = ImportCheckpoint.objects.get()
+    assert (checkpoint.position, checkpoint.completed) == (10, False)
+    # The chunk that was interrupted was rolled back.
+    assert get_counts() != expected
+
+    resolved.clear()
+    import_sample(resume=True)
+    assert get_counts() == expected
+    assert len(resolved) < full_import
+    checkpoint.refresh_from_db()
+    assert checkpoint.completed
+    assert checkpoint.counters["visited"] == 45
+
+    # A completed library is skipped, a fresh import starts over.
+    resolved.clear()
+    import_sample(resume=True)
+    assert resolved == []
+    with pytest.raises(Exception):
+        import_sample()
+
+
+@pytest.mark.django_db
+def test_resume_requires_the_same_file(import_sample, sample_cex_path):
+    import_sample()
+    with open(sample_cex_path, "a") as f:
+        f.write("\n")
+    with pytest.raises(ValueError):
+        import_sample(resume=True)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("options", [{"bulk": True}, {"stream": True}])
+def test_resume_requires_a_checkpoint(import_sample, options):
+    import_sample(**options)
+    assert not ImportCheckpoint.objects.exists()
+    with pytest.raises(ValueError, match="no checkpoint"):
+        import_sample(resume=True)
+
+
+@pytest.mark.django_db
+def test_content_is_hashed_once(import_sample):
+    snapshots.hash_content.cache_clear()
+    import_sample(snapshot=True)
+    # The checkpoint and the parse snapshot share the hash of the file.
+    info = snapshots.hash_content.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
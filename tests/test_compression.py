@@ -0,0 +1,50 @@
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+from hmt_cite_atlas.library.compression import CEXStream, get_compression
+from hmt_cite_atlas.library.importers import Parser
+from hmt_cite_atlas.library.readers import CEXReader
+from tests.utils import SAMPLE_CEX_PATH
+
+
+COMPRESSORS = {".gz": gzip.compress, ".bz2": bz2.compress, ".xz": lzma.compress}
+
+
+@pytest.fixture(params=list(COMPRESSORS))
+def compressed_cex_path(request, tmp_path):
+    with open(SAMPLE_CEX_PATH, "rb") as f:
+        data = f.read()
+    path = tmp_path / f"sample.cex{request.param}"
+    path.write_bytes(COMPRESSORS[request.param](data))
+    return str(path)
+
+
+def test_get_compression():
+    assert get_compression("hmt-2020h.cex.xz") == ".xz"
+    assert get_compression("hmt-2020h.cex") is None
+
+
+def test_stream_counters(compressed_cex_path):
+    with open(SAMPLE_CEX_PATH, "rb") as f:
+        data = f.read()
+    # Small chunks split multi-byte characters across reads.
+    with CEXStream(compressed_cex_path, chunk_bytes=7) as stream:
+        lines = list(stream)
+        assert 0 < stream.bytes_read < len(data)
+        assert stream.bytes_decoded == len(data)
+        assert stream.decode_time > 0
+    assert lines == data.decode("utf-8").rstrip("\n").split("\n")
+
+
+def test_parse_compressed(compressed_cex_path):
+    parser = Parser(compressed_cex_path, None)
+    assert parser.apply() == Parser(SAMPLE_CEX_PATH, None).apply()
+    assert parser.stream.compression == get_compression(compressed_cex_path)
+
+
+def test_reader_rejects_compressed(compressed_cex_path):
+    with pytest.raises(ValueError):
+        CEXReader(compressed_cex_path)
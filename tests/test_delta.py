@@ -0,0 +1,139 @@
+import pytest
+
+from hmt_cite_atlas.library.bulk import BulkVisitor
+from hmt_cite_atlas.library.delta import DeltaVisitor, get_library
+from hmt_cite_atlas.library.importers import Parser
+from hmt_cite_atlas.library.models import (
+    Book,
+    CITEDatum,
+    CITELibrary,
+    Line,
+    RecordFingerprint,
+    Relation,
+    Scholion,
+    Section
+)
+from tests.utils import SAMPLE_CEX_PATH
+
+
+ILIAD = "urn:cts:greekLit:tlg0012.tlg001.msA:"
+LIBRARY_DATA = {
+    "urn": "urn:cite2:hmt:publications.cex.sample",
+    "metadata": {"library_title": "Sample"},
+}
+CHANGES = [
+    # An updated line, a deleted book and a new book.
+    (f"{ILIAD}1.2#οὐλομένην", f"{ILIAD}1.2#οὐλομένην, ἣ"),
+    (f"{ILIAD}2.1#ὣς", f"{ILIAD}1.4#ἡρώων\n{ILIAD}3.1#ἔνθα"),
+    # An updated datum.
+    ("VA012VN_0514#folio 12v", "VA012VN_0514#folio 12v (detail)"),
+    # A changed relation and a new one, which refers to a whole book.
+    (f"{ILIAD}1.2-3", f"{ILIAD}1.2-4"),
+    (
+        f"{ILIAD}1.2-4",
+        f"{ILIAD}1.2-4\n"
+        f"urn:cts:greekLit:tlg5026.msA.hmt:1.1#urn:cite2:cite:verbs.v1:commentsOn#{ILIAD}1",
+    ),
+]
+
+
+@pytest.fixture
+def release_cex_path(tmp_path):
+    with open(SAMPLE_CEX_PATH, encoding="utf-8") as f:
+        content = f.read()
+    for old, new in CHANGES:
+        assert old in content
+        content = content.replace(old, new)
+    path = tmp_path / "release.cex"
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def get_snapshot():
+    return {
+        "books": list(Book.objects.values_list("urn", "idx", "position")),
+        "scholia": list(
+            Scholion.objects.values_list("urn", "idx", "position", "book__urn")
+        ),
+        "lines": list(
+            Line.objects.values_list("urn", "text_content", "idx", "book__urn")
+        ),
+        "sections": list(
+            Section.objects.values_list("urn", "text_content", "idx", "scholion__urn")
+        ),
+        "citedata": list(CITEDatum.objects.values_list("urn", "fields")),
+        "relations": sorted(
+            (
+                relation.subject_content_object.urn,
+                relation.verb.urn,
+                relation.object_content_object.urn,
+            )
+            for relation in Relation.objects.all()
+        ),
+    }
+
+
+def delta_import(path):
+    library_obj = get_library(LIBRARY_DATA)
+    parser = Parser(path, library_obj)
+    index = parser.apply()
+    visitor = DeltaVisitor(index, library_obj, hierarchy=parser.hierarchy)
+    visited, problems = visitor.apply()
+    assert problems == []
+    return visitor
+
+
+def bulk_import(path):
+    CITELibrary.objects.all().delete()
+    library_obj = CITELibrary.objects.create(urn=LIBRARY_DATA["urn"])
+    index = Parser(path, library_obj).apply()
+    BulkVisitor(index, library_obj).apply()
+
+
+@pytest.mark.django_db
+def test_delta_import_matches_full_import(release_cex_path):
+    bulk_import(SAMPLE_CEX_PATH)
+    expected = get_snapshot()
+
+    # Libraries imported without fingerprints are rebuilt.
+    visitor = delta_import(SAMPLE_CEX_PATH)
+    assert get_snapshot() == expected
+    assert visitor.changes["#!ctsdata"]["inserted"] == 7
+    assert RecordFingerprint.objects.count() == len(visitor.fingerprints)
+
+    visitor = delta_import(SAMPLE_CEX_PATH)
+    assert visitor.report()[-1] == f"{len(visitor.fingerprints)} records unchanged"
+    assert visitor.visited == 0
+    assert get_snapshot() == expected
+
+    bulk_import(release_cex_path)
+    expected = get_snapshot()
+    bulk_import(SAMPLE_CEX_PATH)
+    delta_import(SAMPLE_CEX_PATH)
+
+    visitor = delta_import(release_cex_path)
+    assert get_snapshot() == expected
+    # Sections are updated as well, as their idx moved.
+    assert dict(visitor.changes["#!ctsdata"]) == {
+        "inserted": 2,
+        "updated": 4,
+        "deleted": 1,
+    }
+    assert dict(visitor.changes["#!relations"]) == {
+        "inserted": 2,
+        "updated": 0,
+        "deleted": 1,
+    }
+    assert dict(visitor.changes["Book"]) == {"inserted": 1, "updated": 0, "deleted": 1}
+    assert visitor.changes["#!citedata"]["updated"] == 1
+
+
+@pytest.mark.django_db
+def test_delta_import_previous_urn():
+    delta_import(SAMPLE_CEX_PATH)
+    data = dict(LIBRARY_DATA, urn=f"{LIBRARY_DATA['urn']}.next")
+    data["previous_urn"] = LIBRARY_DATA["urn"]
+
+    library_obj = get_library(data)
+    assert CITELibrary.objects.get().urn == data["urn"]
+    assert library_obj.lines.count() == 4
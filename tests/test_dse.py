@@ -0,0 +1,163 @@
+import pytest
+
+from hmt_cite_atlas.library.dse import DSEMaterializer, parse_image_roi
+from hmt_cite_atlas.library.models import CITELibrary, DSERecord
+from hmt_cite_atlas.library.shortcuts import (
+    get_dse_scholion_for_folio,
+    get_lines_for_folio,
+    get_scholion_for_dse_scholion
+)
+from hmt_cite_atlas.web_annotation.utils import WebAnnotationGenerator
+
+
+ILIAD = "urn:cts:greekLit:tlg0012.tlg001.msA:"
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (
+            "urn:cite2:hmt:vaimg.2017a:VA012RN_0013@0.1,0.2,0.3,0.04",
+            ("urn:cite2:hmt:vaimg.2017a:VA012RN_0013", [0.1, 0.2, 0.3, 0.04]),
+        ),
+        (
+            "urn:cite2:hmt:vaimg.2017a:VA012RN_0013",
+            ("urn:cite2:hmt:vaimg.2017a:VA012RN_0013", [None] * 4),
+        ),
+        (
+            "urn:cite2:hmt:vaimg.2017a:VA012RN_0013@0.1,0.2",
+            ("urn:cite2:hmt:vaimg.2017a:VA012RN_0013", [None] * 4),
+        ),
+        (
+            "VA012RN_0013@0.1,0.2,0.3,0.04",
+            ("VA012RN_0013@0.1,0.2,0.3,0.04", [None] * 4),
+        ),
+    ],
+)
+def test_parse_image_roi(value, expected):
+    assert parse_image_roi(value) == expected
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "options", [{}, {"bulk": True}, {"stream": True}, {"delta": True}]
+)
+def test_dse_records_are_materialized(import_sample, options):
+    import_sample(**options)
+    records = {record.urn: record for record in DSERecord.objects.all()}
+    assert len(records) == 4
+
+    record = records["urn:cite2:hmt:va_dse.v1:il1"]
+    assert record.passage == f"{ILIAD}1.1"
+    assert record.line.urn == f"{ILIAD}1.1"
+    assert record.scholion is None
+    assert record.surface.urn == "urn:cite2:hmt:msA.v1:12r"
+    assert record.image_urn == "urn:cite2:hmt:vaimg.2017a:VA012RN_0013"
+    assert record.roi == [0.1, 0.2, 0.3, 0.04]
+    assert record.datum.fields["urn:cite2:hmt:va_dse.v1.label:"] == record.label
+
+    record = records["urn:cite2:hmt:va_dse.v1:schol0"]
+    assert record.scholion.urn == "urn:cts:greekLit:tlg5026.msA.hmt:1.1"
+    assert record.line is None
+
+
+@pytest.mark.django_db
+def test_materialize_replaces_records(import_sample):
+    import_sample()
+    library_obj = CITELibrary.objects.get()
+    DSERecord.objects.update(passage="stale")
+    assert DSEMaterializer(library_obj).apply() == 4
+    assert not DSERecord.objects.filter(passage="stale").exists()
+
+
+@pytest.mark.django_db
+def test_folio_lookups(import_sample):
+    import_sample()
+    folio_urn = "urn:cite2:hmt:msA.v1:12r"
+    lines = get_lines_for_folio(folio_urn)
+    assert [line.urn for line in lines] == [f"{ILIAD}1.1", f"{ILIAD}1.2"]
+
+    dse_data = get_dse_scholion_for_folio(folio_urn)
+    assert {datum.urn for datum in dse_data} == {
+        "urn:cite2:hmt:va_dse.v1:il1",
+        "urn:cite2:hmt:va_dse.v1:il2",
+        "urn:cite2:hmt:va_dse.v1:schol0",
+    }
+    sections = get_scholion_for_dse_scholion(dse_data)
+    assert {section.urn for section in sections} == {
+        "urn:cts:greekLit:tlg5026.msA.hmt:1.1.lemma",
+        "urn:cts:greekLit:tlg5026.msA.hmt:1.1.comment",
+    }
+
+    generator = WebAnnotationGenerator(folio_urn, {"idx": 0})
+    coordinates = generator.get_urn_coordinates(
+        [f"{ILIAD}1.1", f"{ILIAD}1.2", f"{ILIAD}1.3"]
+    )
+    assert coordinates == [[0.1, 0.2, 0.3, 0.04], [0.1, 0.25, 0.3, 0.04]]
+
+
+def get_records():
+    return {
+        record["urn"]: record
+        for record in DSERecord.objects.values(
+            "pk",
+            "urn",
+            "label",
+            "passage",
+            "line__urn",
+            "scholion__urn",
+            "surface__urn",
+        )
+    }
+
+
+@pytest.mark.django_db
+def test_delta_import_rebuilds_stale_records(import_sample, sample_cex_path):
+    import_sample(delta=True)
+    records = get_records()
+    import_sample(delta=True)
+    assert get_records() == records
+
+    # A deleted line (and so its record) and an updated DSE datum.
+    with open(sample_cex_path, encoding="utf-8") as f:
+        content = f.read()
+    content = content.replace(f"{ILIAD}1.2#οὐλομένην\n", "")
+    content = content.replace(
+        "DSE record for Iliad 1.3", "DSE record for Iliad 1.3 (revised)"
+    )
+    with open(sample_cex_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    import_sample(delta=True)
+    rebuilt = get_records()
+    assert (
+        rebuilt["urn:cite2:hmt:va_dse.v1:il1"] == records["urn:cite2:hmt:va_dse.v1:il1"]
+    )
+    assert rebuilt["urn:cite2:hmt:va_dse.v1:il2"]["line__urn"] is None
+    assert rebuilt["urn:cite2:hmt:va_dse.v1:il3"]["label"].endswith("(revised)")
+
+    DSEMaterializer(CITELibrary.objects.get()).apply()
+    expected = get_records()
+    assert {urn: dict(record, pk=None) for urn, record in rebuilt.items()} == {
+        urn: dict(record, pk=None) for urn, record in expected.items()
+    }
+
+
+@pytest.mark.django_db
+def test_malformed_rois_are_skipped(import_sample, sample_cex_path):
+    with open(sample_cex_path, encoding="utf-8") as f:
+        content = f.read()
+    content = content.replace("VA012RN_0013@0.1,0.25,0.3,0.04", "VA012RN_0013@0.1,x", 1)
+    with open(sample_cex_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    import_sample()
+    assert DSERecord.objects.get(urn="urn:cite2:hmt:va_dse.v1:il2").roi == [None] * 4
+
+    generator = WebAnnotationGenerator("urn:cite2:hmt:msA.v1:12r", {"idx": 0})
+    coordinates = generator.get_urn_coordinates([f"{ILIAD}1.1", f"{ILIAD}1.2"])
+    assert coordinates == [[0.1, 0.2, 0.3, 0.04]]
+    assert generator.get_bounding_box_dimensions(coordinates) == {
+        "x": 10.0,
+        "y": 20.0,
+        "w": 30.0,
+        "h": 4.0,
+    }
@@ -0,0 +1,69 @@
+import pytest
+
+from hmt_cite_atlas.library.models import Folio
+from hmt_cite_atlas.library.shortcuts import get_folios_in_range
+from tests.utils import get_query_plan
+
+
+FOLIO_12R = "urn:cite2:hmt:msA.v1:12r"
+FOLIO_12V = "urn:cite2:hmt:msA.v1:12v"
+
+
+def reverse_folios(path):
+    """
+    Number the pages against the order of their records (and pks).
+    """
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    content = content.replace(f"1#{FOLIO_12R}", f"2#{FOLIO_12R}", 1)
+    content = content.replace(f"2#{FOLIO_12V}", f"1#{FOLIO_12V}", 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("options", [{}, {"bulk": True}])
+def test_folios_are_materialized(import_sample, options):
+    import_sample(**options)
+    assert list(Folio.objects.values_list("urn", "ordinal")) == [
+        (FOLIO_12R, 1),
+        (FOLIO_12V, 2),
+    ]
+    folio = Folio.objects.get(urn=FOLIO_12R)
+    assert folio.datum.urn == FOLIO_12R
+    assert folio.citecollection.urn == "urn:cite2:hmt:msA.v1:"
+    assert folio.get_previous() is None
+    assert folio.get_next().urn == FOLIO_12V
+    assert folio.get_next().get_previous() == folio
+
+
+@pytest.mark.django_db
+def test_folio_range_follows_ordinals(import_sample, sample_cex_path):
+    reverse_folios(sample_cex_path)
+    import_sample()
+    folios = get_folios_in_range([FOLIO_12V, FOLIO_12R])
+    assert [folio.urn for folio in folios] == [FOLIO_12V, FOLIO_12R]
+    assert not get_folios_in_range([FOLIO_12R, FOLIO_12V]).exists()
+
+    plan = get_query_plan(folios)
+    assert "USING INDEX library_fol_citecol" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.django_db
+def test_delta_import_rebuilds_changed_folios(import_sample, sample_cex_path):
+    import_sample(delta=True)
+    folios = list(Folio.objects.values_list("pk", "urn", "ordinal"))
+    import_sample(delta=True)
+    assert list(Folio.objects.values_list("pk", "urn", "ordinal")) == folios
+
+    with open(sample_cex_path, encoding="utf-8") as f:
+        content = f.read()
+    content = content.replace(f"2#{FOLIO_12V}", f"3#{FOLIO_12V}", 1)
+    with open(sample_cex_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    import_sample(delta=True)
+    (pk_12r, *_), (pk_12v, *_) = folios
+    assert Folio.objects.get(urn=FOLIO_12R).pk == pk_12r
+    folio = Folio.objects.get(urn=FOLIO_12V)
+    assert (folio.ordinal, folio.pk != pk_12v) == (3, True)
@@ -0,0 +1,67 @@
+from hmt_cite_atlas.library.hierarchy import URNHierarchy
+from hmt_cite_atlas.library.importers import Parser
+from tests.utils import SAMPLE_CEX_PATH
+
+
+ILIAD = "urn:cts:greekLit:tlg0012.tlg001.msA:"
+SCHOLIA = "urn:cts:greekLit:tlg5026.msA.hmt:"
+
+
+def get_hierarchy():
+    parser = Parser(SAMPLE_CEX_PATH, None)
+    index = parser.apply()
+    assert len(parser.hierarchy) == len(URNHierarchy.from_index(index))
+    return parser.hierarchy
+
+
+def test_expand_line():
+    hierarchy = get_hierarchy()
+    assert hierarchy.expand(f"{ILIAD}1.1") == [f"{ILIAD}1.1"]
+    assert hierarchy.expand(f"{ILIAD}9.1") is None
+
+
+def test_expand_book():
+    hierarchy = get_hierarchy()
+    assert hierarchy.expand(f"{ILIAD}1") == [
+        f"{ILIAD}1.1",
+        f"{ILIAD}1.2",
+        f"{ILIAD}1.3",
+    ]
+
+
+def test_expand_range():
+    hierarchy = get_hierarchy()
+    assert hierarchy.expand(f"{ILIAD}1.2-1.3") == [f"{ILIAD}1.2", f"{ILIAD}1.3"]
+    assert hierarchy.expand(f"{ILIAD}1.3-1.2") is None
+    assert hierarchy.expand(f"{ILIAD}1.2-1.9") is None
+
+
+def test_expand_scholion():
+    hierarchy = get_hierarchy()
+    assert hierarchy.expand(f"{SCHOLIA}1.1") == [
+        f"{SCHOLIA}1.1.lemma",
+        f"{SCHOLIA}1.1.comment",
+    ]
+
+
+def test_expand_all():
+    hierarchy = get_hierarchy()
+    urns = [f"{ILIAD}1.1-1.2", "urn:cite2:hmt:unknown:1"]
+    assert hierarchy.expand_all(urns) == [
+        f"{ILIAD}1.1",
+        f"{ILIAD}1.2",
+        "urn:cite2:hmt:unknown:1",
+    ]
+
+
+def test_relation_range_is_normalized():
+    index = Parser(SAMPLE_CEX_PATH, None).apply()
+    relations = [record for record in index.values() if record.block == "#!relations"]
+    assert relations[1]["object_obj"] == [f"{ILIAD}1.2-1.3"]
+
+
+def test_malformed_urns_are_skipped():
+    hierarchy = URNHierarchy()
+    hierarchy.add("urn:cts:1.1")
+    assert len(hierarchy) == 0
+    assert hierarchy.expand_all(["urn:cts:1.1"]) == ["urn:cts:1.1"]
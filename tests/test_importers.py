@@ -22,3 +22,28 @@ def test_handle_citeproperties(urn, line):
     obj_urn = line.split("#")[0]
     assert obj_urn in parser.columns[urn]
     assert obj_urn in parser.index
+
+
+@pytest.mark.parametrize(
+    "urn,root",
+    [
+        (
+            "urn:cts:greekLit:tlg0012.tlg001.msA:1.1",
+            "urn:cts:greekLit:tlg0012.tlg001.msA:",
+        ),
+        ("urn:cts:greekLit:1.1", "urn:cts:greekLit:"),
+    ],
+)
+def test_get_urn_root(urn, root):
+    assert Parser.get_urn_root(urn) == root
+
+
+def test_handle_relations_with_malformed_object():
+    parser = Parser("some_path", mock.MagicMock())
+    parser.current_block = "#!relations"
+    subject = "urn:cts:greekLit:tlg5026.msA.hmt:1.2"
+    verb = "urn:cite2:cite:verbs.v1:commentsOn"
+    parser.handle_relations(f"{subject}#{verb}#urn:cts:1.1@μῆνιν")
+    (record,) = parser.index.values()
+    assert record.object_obj == ["urn:cts:1.1"]
+    assert record.object_at == "μῆνιν"
@@ -0,0 +1,39 @@
+import pytest
+
+from hmt_cite_atlas.library.importers import Parser, Visitor
+from hmt_cite_atlas.library.json_indexes import (
+    get_index_name,
+    get_missing_indexes
+)
+from hmt_cite_atlas.library.models import CITEDatum, CITELibrary
+from hmt_cite_atlas.library.shortcuts import get_folios_for_image
+from tests.utils import SAMPLE_CEX_PATH, get_query_plan
+
+
+IMAGE = "urn:cite2:hmt:msA.v1.image:"
+
+
+@pytest.mark.django_db
+def test_registered_keys_are_indexed():
+    assert get_missing_indexes(CITEDatum) == []
+
+
+@pytest.mark.django_db
+def test_registered_key_lookups_use_their_index():
+    library_obj = CITELibrary.objects.create(
+        urn="urn:cite2:hmt:publications.cex.sample"
+    )
+    parser = Parser(SAMPLE_CEX_PATH, library_obj)
+    Visitor(parser.apply(), library_obj, parser.hierarchy).apply()
+
+    image_urn = "urn:cite2:hmt:vaimg.2017a:VA012VN_0514"
+    queryset = get_folios_for_image(image_urn)
+    assert [datum.urn for datum in queryset] == ["urn:cite2:hmt:msA.v1:12v"]
+    assert get_index_name(CITEDatum, IMAGE) in get_query_plan(queryset)
+
+    # Unregistered keys are still looked up, without an index.
+    queryset = CITEDatum.objects.filter(
+        **{"fields__urn:cite2:hmt:msA.v1.label:": "folio 12v"}
+    )
+    assert [datum.urn for datum in queryset] == ["urn:cite2:hmt:msA.v1:12v"]
+    assert "_json_" not in get_query_plan(queryset)
@@ -0,0 +1,28 @@
+import pytest
+
+from hmt_cite_atlas.library.importers import Parser
+from hmt_cite_atlas.library.parallel import ParallelParser, split_range
+from hmt_cite_atlas.library.readers import CEXReader
+
+
+def test_split_range(sample_cex_path):
+    with CEXReader(sample_cex_path) as reader:
+        entry = reader.get_blocks("#!ctsdata")[0]
+        content = bytes(reader.data)
+    start, end = entry["start"], entry["end"]
+
+    ranges = split_range(sample_cex_path, start, end, chunk_bytes=100)
+    assert len(ranges) > 1
+    assert ranges[0][0] == start
+    assert ranges[-1][1] == end
+    for chunk_start, _ in ranges:
+        assert content[:chunk_start].endswith(b"\n")
+
+
+@pytest.mark.parametrize("chunk_bytes", [64, 1024 * 1024])
+def test_parallel_parser_matches_parser(sample_cex_path, chunk_bytes):
+    expected = Parser(sample_cex_path, None).apply()
+    index = ParallelParser(
+        sample_cex_path, None, chunk_bytes=chunk_bytes, max_workers=2
+    ).apply()
+    assert list(index.items()) == list(expected.items())
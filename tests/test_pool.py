@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from hmt_cite_atlas.library import importers
+from hmt_cite_atlas.library.importers import import_libraries
+from hmt_cite_atlas.library.models import CITELibrary, Line
+from tests.utils import SAMPLE_CEX_PATH
+
+
+# URN namespaces are unique across libraries, so the second library is the
+# sample with its namespaces renamed.
+NAMESPACES = {
+    "urn:cite2:cite:": "urn:cite2:citecopy:",
+    "urn:cite2:hmt:": "urn:cite2:hmtcopy:",
+    "urn:cts:greekLit:": "urn:cts:greekLitCopy:",
+}
+
+
+@pytest.fixture
+def libraries(tmp_path, monkeypatch):
+    with open(SAMPLE_CEX_PATH, encoding="utf-8") as f:
+        content = f.read()
+    (tmp_path / "sample.cex").write_text(content, encoding="utf-8")
+    for namespace, copy in NAMESPACES.items():
+        content = content.replace(namespace, copy)
+    (tmp_path / "copy.cex").write_text(content, encoding="utf-8")
+
+    libraries = [
+        {
+            "urn": f"urn:cite2:hmt:publications.cex.{name}",
+            "content_path": f"{name}.cex",
+            "metadata": {"library_title": name},
+        }
+        for name in ["sample", "copy"]
+    ]
+    metadata_path = tmp_path / "metadata.json"
+    metadata_path.write_text(json.dumps({"libraries": libraries}))
+    monkeypatch.setattr(importers, "LIBRARY_DATA_PATH", str(tmp_path))
+    monkeypatch.setattr(importers, "LIBRARY_METADATA_PATH", str(metadata_path))
+    return libraries
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("bulk", [False, True])
+def test_import_libraries_with_workers(libraries, capsys, bulk):
+    import_libraries(workers=2, bulk=bulk)
+    assert CITELibrary.objects.count() == 2
+    for library in CITELibrary.objects.all():
+        assert Line.objects.filter(citelibrary=library).count() == 4
+
+    stderr = capsys.readouterr().err
+    for data in libraries:
+        assert f"{data['urn']}: parsed in" in stderr
+        assert f"{data['urn']}: written in" in stderr
+    assert "Imported 2 libraries in" in stderr
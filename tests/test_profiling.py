@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from hmt_cite_atlas.library.bulk import BulkVisitor, BulkWriter
+from hmt_cite_atlas.library.importers import Parser
+from hmt_cite_atlas.library.models import CITELibrary
+from hmt_cite_atlas.library.profiling import ImportProfiler
+from tests.utils import SAMPLE_CEX_PATH
+
+
+def test_disabled_profiler():
+    profiler = ImportProfiler(enabled=False)
+    with profiler, profiler.phase("Parser.apply"):
+        profiler.switch("Parser", "Parser.#!ctsdata")
+    assert profiler.phases == {}
+
+
+def test_switch():
+    with ImportProfiler() as profiler:
+        for block in ["a", "a", "b", "a"]:
+            profiler.switch("Parser", block)
+        profiler.finish("Parser")
+    assert {name: phase["calls"] for name, phase in profiler.phases.items()} == {
+        "a": 2,
+        "b": 1,
+    }
+
+
+@pytest.mark.django_db
+def test_import_profile(tmp_path):
+    library_obj = CITELibrary.objects.create(
+        urn="urn:cite2:hmt:publications.cex.sample"
+    )
+    with ImportProfiler(cprofile_dir=str(tmp_path / "profile")) as profiler:
+        parser = Parser(SAMPLE_CEX_PATH, library_obj, profiler=profiler)
+        with profiler.phase("Parser.apply"):
+            index = parser.apply()
+        visitor = BulkVisitor(index, library_obj, BulkWriter(profiler=profiler))
+        with profiler.phase("BulkVisitor.apply"):
+            visitor.apply()
+
+    phases = profiler.phases
+    assert list(phases)[:2] == ["Parser.apply", "Parser.#!datamodels"]
+    assert phases["Parser.#!ctsdata"]["queries"] == 0
+    assert phases["write.Line"]["rows"] == 4
+    assert phases["write.Relation"]["rows"] == 3
+    assert phases["BulkVisitor.apply"]["rows"] == 45
+    assert phases["BulkVisitor.apply"]["peak_memory"] > 0
+    assert sorted(path.name for path in (tmp_path / "profile").iterdir()) == [
+        "BulkVisitor.apply.prof",
+        "Parser.apply.prof",
+    ]
+
+    path = tmp_path / "profile.json"
+    profiler.write(str(path), library=library_obj.urn)
+    report = json.loads(path.read_text())
+    assert report["library"] == library_obj.urn
+    assert report["rows"] == 45
+    assert report["phases"][0]["name"] == "Parser.apply"
@@ -0,0 +1,145 @@
+from django.db import connection
+
+import pytest
+
+from hmt_cite_atlas.library.bulk import BulkVisitor
+from hmt_cite_atlas.library.dse import DSEMaterializer
+from hmt_cite_atlas.library.importers import Parser
+from hmt_cite_atlas.library.models import (
+    Book,
+    CITELibrary,
+    CTSCatalog,
+    DSERecord,
+    Line,
+    Scholion,
+    Section
+)
+from hmt_cite_atlas.library.shortcuts import (
+    get_dse_scholion_for_folio,
+    get_lines_for_folio,
+    get_scholion_for_dse_scholion
+)
+from hmt_cite_atlas.library.synthetic import ILIAD_URN, SyntheticLibrary
+from tests.utils import get_query_plan
+
+
+@pytest.fixture
+def synthetic_library(db, tmp_path):
+    library = SyntheticLibrary(books=4, lines=50, scholia=20, catalogs=2)
+    path = library.write(str(tmp_path / "synthetic.cex"))
+    library_obj = CITELibrary.objects.create(
+        urn="urn:cite2:hmt:publications.cex.synthetic"
+    )
+    BulkVisitor(Parser(path, library_obj).apply(), library_obj).apply()
+    DSEMaterializer(library_obj).apply()
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return library
+
+
+def get_top_queries(library):
+    scholia_urn = library.scholia_catalogs[0]
+    iliad = CTSCatalog.objects.get(urn=ILIAD_URN)
+    scholia = CTSCatalog.objects.get(urn=scholia_urn)
+    book = Book.objects.get(urn=f"{ILIAD_URN}2")
+    scholia_book = Book.objects.get(urn=f"{scholia_urn}2")
+    scholion = Scholion.objects.get(urn=f"{scholia_urn}2.3")
+    return {
+        # `do_cex_export`
+        "catalog lines": (iliad.lines.order_by("idx"), "ctscatalog", iliad),
+        "catalog books": (iliad.books.all(), "ctscatalog", iliad),
+        "catalog scholia": (scholia.scholia.all(), "ctscatalog", scholia),
+        "catalog sections": (scholia.sections.all(), "ctscatalog", scholia),
+        # `BookNode` / `ScholionNode` connections
+        "book lines": (book.lines.all(), "book", book),
+        "book scholia": (scholia_book.scholia.all(), "book", scholia_book),
+        "book sections": (scholia_book.sections.all(), "book", scholia_book),
+        "scholion sections": (scholion.sections.all(), "scholion", scholion),
+    }
+
+
+def assert_idx_order(objects, expected):
+    """
+    `objects` are the `expected` objects, in `idx` order.
+    """
+    rows = [(obj.idx, obj.pk) for obj in objects]
+    assert sorted(rows) == sorted((obj.idx, obj.pk) for obj in expected)
+    assert [idx for idx, _ in rows] == sorted(idx for idx, _ in rows)
+
+
+@pytest.mark.django_db
+def test_top_queries_use_composite_indexes(synthetic_library):
+    for name, (queryset, field, value) in get_top_queries(synthetic_library).items():
+        model = queryset.model
+        plan = get_query_plan(queryset)
+        index_names = [index.name for index in model._meta.indexes]
+        assert any(index_name in plan for index_name in index_names), (name, plan)
+        assert "TEMP B-TREE" not in plan, (name, plan)
+
+        # Rows matched without the index, ordered in Python.
+        expected = [
+            obj
+            for obj in model.objects.order_by("pk")
+            if getattr(obj, f"{field}_id") == value.pk
+        ]
+        assert expected, name
+        assert_idx_order(queryset, expected)
+
+
+def get_folio_urn(library):
+    ref, _ = library.get_page(2, 1)
+    return f"urn:cite2:hmt:msA.v1:{ref}"
+
+
+def get_folio_records(folio_urn):
+    return DSERecord.objects.filter(surface__urn=folio_urn).order_by("pk")
+
+
+@pytest.mark.django_db
+def test_folio_lines_are_read_in_text_order(synthetic_library):
+    folio_urn = get_folio_urn(synthetic_library)
+    lines = get_lines_for_folio(folio_urn)
+    plan = get_query_plan(lines)
+    assert "library_lin_ctscata_03a751_idx" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+    expected = {record.line for record in get_folio_records(folio_urn) if record.line}
+    assert expected
+    assert_idx_order(lines, expected)
+
+
+@pytest.mark.django_db
+def test_folio_sections_are_in_idx_order(synthetic_library):
+    folio_urn = get_folio_urn(synthetic_library)
+    sections = get_scholion_for_dse_scholion(get_dse_scholion_for_folio(folio_urn))
+    assert "library_sec_scholio_61dee9_idx" in get_query_plan(sections)
+    # The exported text annotations follow this order.
+    assert sections.ordered
+
+    scholia = {record.scholion for record in get_folio_records(folio_urn)}
+    expected = [
+        section
+        for section in Section.objects.order_by("pk")
+        if section.scholion in scholia
+    ]
+    assert expected
+    assert_idx_order(sections, expected)
+
+
+@pytest.mark.django_db
+def test_urn_lookups_do_not_sort(synthetic_library):
+    # `BulkVisitor.load_pks` and friends
+    urns = [f"{ILIAD_URN}2.1", f"{ILIAD_URN}2.2"]
+    lines = Line.objects.filter(citelibrary=CITELibrary.objects.get()).order_by()
+    queryset = lines.filter(urn__in=urns).values_list("urn", "pk")
+    assert "TEMP B-TREE" not in get_query_plan(queryset)
+    assert dict(queryset) == {
+        line.urn: line.pk for line in Line.objects.all() if line.urn in urns
+    }
+    assert len(dict(queryset)) == 2
+
+
+def test_covered_foreign_keys_have_no_index_of_their_own():
+    for model in [Book, Scholion, Section, Line]:
+        for index in model._meta.indexes:
+            assert not model._meta.get_field(index.fields[0]).db_index, index.name
@@ -0,0 +1,73 @@
+import os
+
+from hmt_cite_atlas.library.importers import Parser
+from hmt_cite_atlas.library.readers import (
+    SIDECAR_SUFFIX,
+    BlockParser,
+    CEXReader
+)
+
+
+def test_block_index(sample_cex_path):
+    with CEXReader(sample_cex_path) as reader:
+        blocks = reader.get_blocks()
+        content = bytes(reader.data)
+
+    assert os.path.exists(f"{sample_cex_path}{SIDECAR_SUFFIX}")
+    assert [entry["block"] for entry in blocks].count("#!citedata") == 4
+    for entry in blocks:
+        assert content[: entry["start"]].rstrip().endswith(entry["block"].encode())
+    assert blocks[-1]["end"] == len(content)
+
+    ctscatalog = next(entry for entry in blocks if entry["block"] == "#!ctscatalog")
+    assert ctscatalog["lines"] == 3
+    assert ctscatalog["columns"][:2] == ["urn", "citationScheme"]
+
+    ctsdata = next(entry for entry in blocks if entry["block"] == "#!ctsdata")
+    assert sorted(ctsdata["catalogs"]) == [
+        "urn:cts:greekLit:tlg0012.tlg001.msA:",
+        "urn:cts:greekLit:tlg5026.msA.hmt:",
+    ]
+
+
+def test_sidecar_is_reused_until_the_file_changes(sample_cex_path):
+    with CEXReader(sample_cex_path) as reader:
+        reader.index
+    assert CEXReader(sample_cex_path).load_index() is not None
+
+    with open(sample_cex_path, "a", encoding="utf-8") as f:
+        f.write("\n// a comment\n")
+    assert CEXReader(sample_cex_path).load_index() is None
+
+
+def test_iter_catalog(sample_cex_path):
+    with CEXReader(sample_cex_path) as reader:
+        lines = list(reader.iter_catalog("urn:cts:greekLit:tlg5026.msA.hmt:"))
+    assert [line.split("#")[0] for line in lines] == [
+        "urn:cts:greekLit:tlg5026.msA.hmt:1.1.lemma",
+        "urn:cts:greekLit:tlg5026.msA.hmt:1.1.comment",
+        "urn:cts:greekLit:tlg5026.msA.hmt:1.2.comment",
+    ]
+
+
+def test_block_parser(sample_cex_path):
+    full_index = Parser(sample_cex_path, None).apply()
+
+    index = BlockParser(sample_cex_path, None, ["#!citedata"]).apply()
+    expected = {
+        key: record
+        for key, record in full_index.items()
+        if record.block == "#!citedata"
+    }
+    assert index == expected
+
+    catalog_urn = "urn:cts:greekLit:tlg5026.msA.hmt:"
+    index = BlockParser(
+        sample_cex_path, None, ["#!ctsdata"], catalog_urn=catalog_urn
+    ).apply()
+    expected = {
+        key: record
+        for key, record in full_index.items()
+        if record.block == "#!ctsdata" and record.ctscatalog == catalog_urn
+    }
+    assert index == expected
@@ -0,0 +1,54 @@
+import pickle
+
+from hmt_cite_atlas.library.importers import Parser
+from hmt_cite_atlas.library.records import CiteDatum, CiteRelation, CtsPassage
+from tests.utils import SAMPLE_CEX_PATH
+
+
+ILIAD = "urn:cts:greekLit:tlg0012.tlg001.msA:"
+
+
+def test_records_are_mappings():
+    record = CtsPassage(f"{ILIAD}1.1", "μῆνιν ἄειδε", 1, 0, ILIAD)
+    assert record["ctscatalog"] == ILIAD
+    assert dict(record) == {
+        "urn": f"{ILIAD}1.1",
+        "text_content": "μῆνιν ἄειδε",
+        "position": 1,
+        "idx": 0,
+        "ctscatalog": ILIAD,
+    }
+    assert record.as_kwargs("library") == {"citelibrary": "library", **record}
+
+    datum = CiteDatum(
+        "urn:cite2:hmt:msA.v1:1r",
+        "urn:cite2:hmt:msA.v1:",
+        ("urn:cite2:hmt:msA.v1.urn:", "urn:cite2:hmt:msA.v1.rv:"),
+        ("urn:cite2:hmt:msA.v1:1r", "recto"),
+    )
+    assert datum["fields"] == {
+        "urn:cite2:hmt:msA.v1.urn:": "urn:cite2:hmt:msA.v1:1r",
+        "urn:cite2:hmt:msA.v1.rv:": "recto",
+    }
+    assert not hasattr(datum, "__dict__")
+
+
+def test_records_pickle():
+    relation = CiteRelation(
+        "urn:cts:greekLit:tlg5026.msA.hmt:1.1",
+        "urn:cite2:cite:verbs.v1:commentsOn",
+        [f"{ILIAD}1.1"],
+        None,
+    )
+    assert pickle.loads(pickle.dumps(relation)) == relation
+    assert relation != CiteRelation(relation.subject_obj, relation.verb, [], None)
+
+
+def test_parser_interns_urns():
+    index = Parser(SAMPLE_CEX_PATH, None).apply()
+    lines = [record for record in index.values() if record.block == "#!ctsdata"]
+    assert len({id(record.ctscatalog) for record in lines}) == 2
+    relation = next(
+        record for record in index.values() if record.block == "#!relations"
+    )
+    assert index[f"{ILIAD}1.1"].urn is relation.object_obj[0]
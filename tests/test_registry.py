@@ -0,0 +1,54 @@
+from django.db.models import Model
+
+import pytest
+
+from hmt_cite_atlas.library.importers import Parser, Visitor
+from hmt_cite_atlas.library.models import Book, CITELibrary, Line
+from hmt_cite_atlas.library.registry import URNRegistry
+from tests.utils import SAMPLE_CEX_PATH
+
+
+BOOK_URN = "urn:cts:greekLit:tlg0012.tlg001.msA:1"
+
+
+def test_registry_lookups():
+    registry = URNRegistry()
+    assert registry.get(Book, BOOK_URN) is None
+
+    registry.add(Book(pk=7, urn=BOOK_URN))
+    book = registry.get(Book, BOOK_URN)
+    assert (book.pk, book.urn) == (7, BOOK_URN)
+    assert registry.get(Line, BOOK_URN) is None
+
+    assert len(registry) == 1
+    assert (registry.hits, registry.misses) == (1, 2)
+    assert registry.report() == "URN registry: 1 URNs, 1 hits / 3 lookups (33%)"
+
+    book = registry.find(BOOK_URN)
+    assert (type(book), book.pk) == (Book, 7)
+    assert registry.find(f"{BOOK_URN}.1") is None
+    assert (registry.hits, registry.misses) == (2, 3)
+
+    registry.clear()
+    assert len(registry) == 0
+    assert registry.hit_rate == 0.0
+
+
+@pytest.mark.django_db
+def test_visitor_registry_is_scoped_to_an_import():
+    for _ in range(2):
+        CITELibrary.objects.all().delete()
+        library_obj = CITELibrary.objects.create(
+            urn="urn:cite2:hmt:publications.cex.sample"
+        )
+        parser = Parser(SAMPLE_CEX_PATH, library_obj)
+        visitor = Visitor(parser.apply(), library_obj, parser.hierarchy)
+        _, problems = visitor.apply()
+
+        assert problems == []
+        assert len(visitor.registry) == 0
+        # Objects are only registered by pk, the index keeps the parsed records.
+        assert not any(isinstance(value, Model) for value in visitor.index.values())
+        assert set(Book.objects.values_list("citelibrary", flat=True).distinct()) == {
+            library_obj.pk
+        }
@@ -0,0 +1,141 @@
+from collections import defaultdict
+
+import pytest
+
+from hmt_cite_atlas.library.bulk import BulkVisitor, RelationLoader
+from hmt_cite_atlas.library.hierarchy import URNHierarchy
+from hmt_cite_atlas.library.importers import Parser, Visitor
+from hmt_cite_atlas.library.models import (
+    CITEDatum,
+    CITELibrary,
+    Line,
+    Relation,
+    Section
+)
+from hmt_cite_atlas.library.shortcuts import (
+    COMMENTS_ON_URN,
+    get_commented_objects
+)
+from hmt_cite_atlas.library.synthetic import SyntheticLibrary
+from tests.utils import SAMPLE_CEX_PATH, get_query_plan
+
+
+ILIAD = "urn:cts:greekLit:tlg0012.tlg001.msA:"
+
+
+def test_relation_loader_resolves_targets():
+    hierarchy = URNHierarchy()
+    for ref in ["1.1", "1.2", "1.3"]:
+        hierarchy.add(f"{ILIAD}{ref}")
+    pks = defaultdict(dict)
+    pks[Line] = {f"{ILIAD}1.1": 1, f"{ILIAD}1.2": 2, f"{ILIAD}1.3": 3}
+    loader = RelationLoader(None, pks, hierarchy)
+    loader.content_types = {Line: 10, Section: 20}
+    loader.add(Section(pk=4, urn="urn:cts:greekLit:tlg5026.msA.hmt:1.1.lemma"))
+
+    verb_urn = "urn:cite2:cite:verbs.v1:commentsOn"
+    pks[CITEDatum][verb_urn] = 5
+    relations = list(
+        loader.build(
+            [
+                (
+                    None,
+                    {
+                        "subject_obj": "urn:cts:greekLit:tlg5026.msA.hmt:1.1",
+                        "verb": verb_urn,
+                        "object_obj": [f"{ILIAD}1.2-1.3", f"{ILIAD}9.9"],
+                        "object_at": None,
+                    },
+                )
+            ]
+        )
+    )
+    assert [
+        (
+            relation.subject_content_type_id,
+            relation.subject_id,
+            relation.verb_id,
+            relation.object_content_type_id,
+            relation.object_id,
+        )
+        for relation in relations
+    ] == [(20, 4, 5, 10, 2), (20, 4, 5, 10, 3)]
+    assert [problem for problem, _ in loader.problems] == [
+        f"URN (or permutations) not in index: {ILIAD}9.9"
+    ]
+
+
+@pytest.mark.django_db
+def test_visitor_relations():
+    library_obj = CITELibrary.objects.create(
+        urn="urn:cite2:hmt:publications.cex.sample"
+    )
+    parser = Parser(SAMPLE_CEX_PATH, library_obj)
+    index = parser.apply()
+    visited, problems = Visitor(index, library_obj, parser.hierarchy).apply()
+
+    assert problems == []
+    assert visited == 45
+    section = Section.objects.get(urn="urn:cts:greekLit:tlg5026.msA.hmt:1.2.comment")
+    objects = section.subject_relations.all()
+    assert sorted(relation.object_content_object.urn for relation in objects) == [
+        f"{ILIAD}1.2",
+        f"{ILIAD}1.3",
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("books", [1, 3])
+def test_commented_objects_in_constant_queries(
+    books, tmp_path, django_assert_num_queries
+):
+    library = SyntheticLibrary(books=books, lines=10, scholia=4)
+    path = library.write(str(tmp_path / "synthetic.cex"))
+    library_obj = CITELibrary.objects.create(
+        urn="urn:cite2:hmt:publications.cex.synthetic"
+    )
+    BulkVisitor(Parser(path, library_obj).apply(), library_obj).apply()
+    sections = library_obj.sections.all()
+
+    # The relations and their objects (lines).
+    with django_assert_num_queries(2):
+        commented = get_commented_objects(sections)
+        urns = {
+            pk: [obj.urn for obj in objects if obj] for pk, objects in commented.items()
+        }
+
+    expected = defaultdict(list)
+    for relation in Relation.objects.for_subjects(sections).order_by("pk"):
+        expected[relation.subject_id].append(relation.object_content_object.urn)
+    assert urns == expected
+    assert len(urns) == books * 4
+    assert get_commented_objects(sections, verb_urn=COMMENTS_ON_URN) == commented
+    assert not get_commented_objects(sections, verb_urn="urn:cite2:cite:verbs.v1:x")
+
+
+@pytest.mark.django_db
+def test_relation_targets_are_indexed():
+    library_obj = CITELibrary.objects.create(
+        urn="urn:cite2:hmt:publications.cex.sample"
+    )
+    parser = Parser(SAMPLE_CEX_PATH, library_obj)
+    Visitor(parser.apply(), library_obj, parser.hierarchy).apply()
+    section = Section.objects.get(urn="urn:cts:greekLit:tlg5026.msA.hmt:1.2.comment")
+    line = Line.objects.get(urn=f"{ILIAD}1.2")
+    subject_index, object_index = Relation._meta.indexes
+
+    for queryset, index, target, field in [
+        (section.subject_relations.all(), subject_index, section, "subject"),
+        (line.object_relations.all(), object_index, line, "object"),
+    ]:
+        plan = get_query_plan(queryset)
+        assert index.name in plan, plan
+
+        # Relations matched without the index.
+        expected = [
+            relation.pk
+            for relation in Relation.objects.order_by("pk")
+            if getattr(relation, f"{field}_content_object") == target
+        ]
+        assert expected
+        assert sorted(relation.pk for relation in queryset) == expected
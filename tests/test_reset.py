@@ -0,0 +1,80 @@
+from django.db import transaction
+
+import pytest
+
+from hmt_cite_atlas.library.importers import Parser, Visitor
+from hmt_cite_atlas.library.models import (
+    CITEDatum,
+    CITELibrary,
+    Line,
+    Relation,
+    Section
+)
+from hmt_cite_atlas.library.reset import (
+    LibraryReset,
+    get_reset_models,
+    reset_libraries
+)
+from tests.utils import SAMPLE_CEX_PATH
+
+
+def import_sample(urn):
+    library_obj = CITELibrary.objects.create(urn=urn)
+    parser = Parser(SAMPLE_CEX_PATH, library_obj)
+    Visitor(parser.apply(), library_obj, parser.hierarchy).apply()
+    return library_obj
+
+
+def get_counts():
+    return {model.__name__: model.objects.count() for model in get_reset_models()}
+
+
+def test_reset_models_are_in_foreign_key_order():
+    models = get_reset_models()
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if field.many_to_one and field.related_model in models:
+                assert models.index(field.related_model) >= models.index(model)
+
+
+@pytest.mark.django_db
+def test_reset_matches_cascading_delete():
+    library_obj = import_sample("urn:cite2:hmt:publications.cex.sample")
+    assert Line.objects.count() == 4
+    with pytest.raises(RuntimeError):
+        # Rolled back, so the same library can be compared with a reset below.
+        with transaction.atomic():
+            CITELibrary.objects.get(pk=library_obj.pk).delete()
+            deleted = get_counts()
+            raise RuntimeError
+
+    reset = LibraryReset(library_obj)
+    timings = reset.apply()
+    assert get_counts() == deleted
+    assert not CITELibrary.objects.exists()
+    assert timings["Line"]["rows"] == 4
+    assert timings["CITELibrary"]["rows"] == 1
+    assert all(timing["seconds"] >= 0 for timing in timings.values())
+
+
+@pytest.mark.django_db
+def test_reset_is_scoped_to_a_library():
+    library_obj = import_sample("urn:cite2:hmt:publications.cex.sample")
+    counts = get_counts()
+    other = CITELibrary.objects.create(urn="urn:cite2:hmt:publications.cex.other")
+    # A relation of another library that points into the reset one.
+    Relation.objects.create(
+        subject_content_object=Section.objects.first(),
+        verb=CITEDatum.objects.filter(citelibrary=library_obj).first(),
+        object_content_object=Line.objects.first(),
+        citelibrary=other,
+    )
+
+    reset_libraries(CITELibrary.objects.filter(pk=library_obj.pk))
+    assert list(CITELibrary.objects.all()) == [other]
+    assert all(count == 0 for count in get_counts().values())
+
+    library_obj = import_sample("urn:cite2:hmt:publications.cex.sample")
+    assert get_counts() == counts
+    LibraryReset(other).apply()
+    assert get_counts() == counts
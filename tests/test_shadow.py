@@ -0,0 +1,97 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from hmt_cite_atlas.library.synthetic import SyntheticLibrary
+from tests.utils import SAMPLE_CEX_PATH
+
+
+# Shadow imports swap the database file of the default connection, so they
+# run against a file database in a separate process.
+SCRIPT = """
+import sys
+
+import django
+
+django.setup()
+
+from hmt_cite_atlas.library import importers
+
+importers.LIBRARY_METADATA_PATH = sys.argv[1]
+importers.import_libraries(shadow=True, bulk=True)
+"""
+
+
+@pytest.fixture
+def shadow_import(tmp_path):
+    def run(content_path):
+        metadata_path = tmp_path / "metadata.json"
+        library = {
+            "urn": "urn:cite2:hmt:publications.cex.sample",
+            "content_path": content_path,
+            "metadata": {"library_title": "Sample"},
+        }
+        metadata_path.write_text(json.dumps({"libraries": [library]}))
+        return subprocess.run(
+            [sys.executable, "-c", SCRIPT, str(metadata_path)],
+            env={**os.environ, "DB_DATA_PATH": str(tmp_path)},
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            capture_output=True,
+            text=True,
+        )
+
+    return run
+
+
+def count_lines(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM library_line").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_shadow_import(tmp_path, shadow_import):
+    db_path = str(tmp_path / "db.sqlite")
+    result = shadow_import(SAMPLE_CEX_PATH)
+    assert result.returncode == 0, result.stderr
+    assert count_lines(db_path) == 4
+    assert not os.path.exists(f"{db_path}.shadow")
+
+    # A (WAL mode, like serving connections) reader that is open during the
+    # swap keeps reading the previous release; the file is replaced, not
+    # written to.
+    reader = sqlite3.connect(db_path, isolation_level=None)
+    reader.execute("PRAGMA journal_mode=WAL;")
+    reader.execute("BEGIN;")
+    assert reader.execute("SELECT COUNT(*) FROM library_line").fetchone()[0] == 4
+    inode = os.stat(db_path).st_ino
+    content_path = SyntheticLibrary(books=1, lines=6, scholia=1).write(
+        str(tmp_path / "larger.cex")
+    )
+    result = shadow_import(content_path)
+    assert result.returncode == 0, result.stderr
+    assert "Line: 4 -> 6 rows" in result.stderr
+    assert os.stat(db_path).st_ino != inode
+    assert not os.path.exists(f"{db_path}-wal")
+    assert not os.path.exists(f"{db_path}-shm")
+    assert reader.execute("SELECT COUNT(*) FROM library_line").fetchone()[0] == 4
+    reader.execute("COMMIT;")
+    assert reader.execute("SELECT COUNT(*) FROM library_line").fetchone()[0] == 4
+    reader.close()
+    assert count_lines(db_path) == 6
+    assert not os.path.exists(f"{db_path}.shadow")
+
+    # A release that loses most of its lines isn't swapped in.
+    content_path = SyntheticLibrary(books=1, lines=1, scholia=1).write(
+        str(tmp_path / "smaller.cex")
+    )
+    result = shadow_import(content_path)
+    assert result.returncode != 0
+    assert "Line dropped from 6 to 1 rows" in result.stderr
+    assert count_lines(db_path) == 6
+    assert not os.path.exists(f"{db_path}.shadow")
@@ -0,0 +1,82 @@
+import pickle
+
+import pytest
+
+from hmt_cite_atlas.library import importers, snapshots
+from hmt_cite_atlas.library.importers import Parser, _import_library
+from hmt_cite_atlas.library.models import CITELibrary, Line
+from hmt_cite_atlas.library.snapshots import ParseSnapshot
+
+
+def parse(path):
+    parser = Parser(path, None)
+    return parser.apply(), parser.hierarchy
+
+
+def test_snapshot_round_trip(sample_cex_path):
+    snapshot = ParseSnapshot(sample_cex_path)
+    assert snapshot.load() is None
+
+    index, hierarchy = parse(sample_cex_path)
+    snapshot.save(index, hierarchy)
+    loaded_index, loaded_hierarchy = ParseSnapshot(sample_cex_path).load()
+    assert loaded_index == index
+    assert list(loaded_index) == list(index)
+    assert loaded_hierarchy.leaves == hierarchy.leaves
+    assert loaded_hierarchy.positions == hierarchy.positions
+
+
+def test_snapshot_is_invalidated(sample_cex_path, monkeypatch):
+    snapshot = ParseSnapshot(sample_cex_path)
+    snapshot.save(*parse(sample_cex_path))
+
+    monkeypatch.setattr(snapshots, "get_parser_hash", lambda: "changed")
+    assert ParseSnapshot(sample_cex_path).load() is None
+    monkeypatch.undo()
+    assert ParseSnapshot(sample_cex_path).load() is not None
+
+    with open(sample_cex_path, "a") as f:
+        f.write("\n")
+    assert ParseSnapshot(sample_cex_path).load() is None
+
+    with open(snapshot.snapshot_path, "wb") as f:
+        f.write(b"not a snapshot")
+    assert ParseSnapshot(sample_cex_path).load() is None
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        # A class of a module that no longer exists (ModuleNotFoundError).
+        b"chmt_cite_atlas.library.missing\nRecord\n.",
+        # A class whose signature changed (TypeError).
+        b"cbuiltins\nint\n(I1\nI2\nI3\ntR.",
+    ],
+)
+def test_stale_snapshot_is_ignored(sample_cex_path, payload):
+    snapshot = ParseSnapshot(sample_cex_path)
+    snapshot.save(*parse(sample_cex_path))
+    with open(snapshot.snapshot_path, "wb") as f:
+        f.write(pickle.dumps(snapshot.key))
+        f.write(payload)
+    assert ParseSnapshot(sample_cex_path).load() is None
+
+
+@pytest.mark.django_db
+def test_import_uses_snapshot(sample_cex_path, monkeypatch, tmp_path):
+    monkeypatch.setattr(importers, "LIBRARY_DATA_PATH", str(tmp_path))
+    data = {
+        "urn": "urn:cite2:hmt:publications.cex.sample",
+        "content_path": "sample.cex",
+        "metadata": {"library_title": "Sample"},
+    }
+    _import_library(data, bulk=True, snapshot=True)
+    assert ParseSnapshot(sample_cex_path).load() is not None
+
+    def fail(self):
+        raise AssertionError("The CEX file was parsed again")
+
+    monkeypatch.setattr(Parser, "apply", fail)
+    CITELibrary.objects.all().delete()
+    _import_library(data, bulk=True, snapshot=True)
+    assert Line.objects.count() == 4
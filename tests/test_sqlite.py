@@ -0,0 +1,173 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+from django.db import connection
+
+import pytest
+
+from hmt_cite_atlas.library.models import DeferredIndex, Line
+from hmt_cite_atlas.library.sqlite import (
+    apply_profile,
+    connection_profile,
+    deferred_indexes,
+    restore_indexes
+)
+
+
+# Kills the process halfway through a bulk import with `kill`, like an
+# interrupted import would; runs against a file database in a separate process.
+SCRIPT = """
+import os
+import sys
+
+import django
+
+django.setup()
+
+from django.core.management import call_command
+
+from hmt_cite_atlas.library import importers
+
+call_command("migrate", verbosity=0)
+importers.LIBRARY_METADATA_PATH = sys.argv[1]
+if sys.argv[2] == "kill":
+    importers._import_library = lambda *args, **kwargs: os._exit(1)
+if sys.argv[2] != "migrate":
+    importers.import_libraries(bulk=True)
+"""
+
+
+def get_pragma(cursor, name):
+    cursor.execute(f"PRAGMA {name};")
+    return cursor.fetchone()[0]
+
+
+def get_indexes(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s",
+            [table],
+        )
+        return {name for name, in cursor.fetchall()}
+
+
+def test_apply_profile(tmp_path):
+    db = sqlite3.connect(str(tmp_path / "db.sqlite"))
+    cursor = db.cursor()
+    apply_profile(cursor, "serving")
+    assert get_pragma(cursor, "journal_mode") == "wal"
+    assert get_pragma(cursor, "synchronous") == 1
+    assert get_pragma(cursor, "mmap_size") == 268435456
+
+    apply_profile(cursor, "import")
+    assert get_pragma(cursor, "journal_mode") == "wal"
+    assert get_pragma(cursor, "synchronous") == 0
+    db.close()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_connection_profile(settings):
+    settings.SQLITE_QUERY_ONLY = True
+    with connection.cursor() as cursor:
+        with connection_profile("serving"):
+            assert get_pragma(cursor, "query_only") == 1
+            with connection_profile("import"):
+                assert get_pragma(cursor, "query_only") == 0
+                assert get_pragma(cursor, "synchronous") == 0
+            assert get_pragma(cursor, "query_only") == 1
+        settings.SQLITE_QUERY_ONLY = False
+        apply_profile(cursor, "serving")
+        assert get_pragma(cursor, "query_only") == 0
+
+
+@pytest.mark.django_db
+def test_deferred_indexes():
+    table = Line._meta.db_table
+    indexes = get_indexes(table)
+    with deferred_indexes([Line]) as dropped:
+        assert dropped
+        # The unique index on `urn` is kept for the pk lookups of the import.
+        assert get_indexes(table) == indexes - set(dropped)
+        assert any(name.startswith("sqlite_autoindex") for name in get_indexes(table))
+    assert get_indexes(table) == indexes
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        assert cursor.fetchone()[0] == 1
+
+    assert not DeferredIndex.objects.exists()
+
+
+@pytest.mark.django_db
+def test_restore_indexes():
+    table = Line._meta.db_table
+    indexes = get_indexes(table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = %s AND sql LIKE 'CREATE INDEX%%'",
+            [table],
+        )
+        (name, sql), *_ = cursor.fetchall()
+        cursor.execute(f'DROP INDEX "{name}"')
+    DeferredIndex.objects.create(name=name, sql=sql)
+    DeferredIndex.objects.create(name="library_line_kept", sql="SELECT 1/0")
+
+    # Indexes that still exist are left alone.
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE INDEX "library_line_kept" ON "{table}" ("urn")')
+    assert restore_indexes() == [name]
+    assert get_indexes(table) == indexes | {"library_line_kept"}
+    assert not DeferredIndex.objects.exists()
+    assert restore_indexes() == []
+
+
+def get_file_indexes(path, table):
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?",
+            [table],
+        )
+        return {name for name, in rows}
+    finally:
+        connection.close()
+
+
+def test_indexes_survive_a_killed_import(tmp_path, sample_cex_path):
+    metadata_path = tmp_path / "metadata.json"
+    library = {
+        "urn": "urn:cite2:hmt:publications.cex.sample",
+        "content_path": sample_cex_path,
+        "metadata": {"library_title": "Sample"},
+    }
+    metadata_path.write_text(json.dumps({"libraries": [library]}))
+
+    def run(mode):
+        return subprocess.run(
+            [sys.executable, "-c", SCRIPT, str(metadata_path), mode],
+            env={**os.environ, "DB_DATA_PATH": str(tmp_path)},
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            capture_output=True,
+            text=True,
+        )
+
+    db_path = str(tmp_path / "db.sqlite")
+    table = Line._meta.db_table
+    result = run("migrate")
+    assert result.returncode == 0, result.stderr
+    indexes = get_file_indexes(db_path, table)
+    assert len(indexes) > 1
+
+    result = run("kill")
+    assert result.returncode == 1, result.stderr
+    assert len(get_file_indexes(db_path, table)) == 1
+
+    result = run("import")
+    assert result.returncode == 0, result.stderr
+    assert get_file_indexes(db_path, table) == indexes
+    with sqlite3.connect(db_path) as connection:
+        count = connection.execute("SELECT COUNT(*) FROM library_deferredindex")
+        assert count.fetchone()[0] == 0
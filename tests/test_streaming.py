@@ -0,0 +1,129 @@
+import gc
+import tracemalloc
+
+import pytest
+
+from hmt_cite_atlas.library.bulk import RelationLoader
+from hmt_cite_atlas.library.importers import Parser
+from hmt_cite_atlas.library.models import (
+    CITEDatum,
+    CITELibrary,
+    Line,
+    Relation,
+    Section
+)
+from hmt_cite_atlas.library.streaming import (
+    StreamingParser,
+    StreamingVisitor,
+    stream_library
+)
+from hmt_cite_atlas.library.synthetic import SyntheticLibrary
+from tests.utils import SAMPLE_CEX_PATH
+
+
+def test_streaming_parser_chunks():
+    chunks = []
+    parser = StreamingParser(
+        SAMPLE_CEX_PATH, None, lambda *chunk: chunks.append(chunk), chunk_size=3
+    )
+    index = parser.parse({"#!ctscatalog"})
+    assert list(index) == [
+        "urn:cts:greekLit:tlg0012.tlg001.msA:",
+        "urn:cts:greekLit:tlg5026.msA.hmt:",
+    ]
+    parser.parse({"#!ctsdata"})
+    assert [(block, len(entries)) for block, entries in chunks] == [
+        ("#!ctsdata", 3),
+        ("#!ctsdata", 3),
+        ("#!ctsdata", 1),
+    ]
+
+
+@pytest.mark.django_db
+def test_stream_library():
+    library_obj = CITELibrary.objects.create(
+        urn="urn:cite2:hmt:publications.cex.sample"
+    )
+    visited, problems = stream_library(SAMPLE_CEX_PATH, library_obj, chunk_size=2)
+
+    assert problems == []
+    assert visited == 45
+    assert Line.objects.count() == 4
+    assert Section.objects.count() == 3
+    assert CITEDatum.objects.count() == 9
+    assert Relation.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_stream_library_resolves_relations_once(monkeypatch):
+    get_targets = RelationLoader.get_targets
+    calls = []
+
+    def counting_get_targets(self, obj_kwargs):
+        calls.append(obj_kwargs)
+        return get_targets(self, obj_kwargs)
+
+    monkeypatch.setattr(RelationLoader, "get_targets", counting_get_targets)
+    library_obj = CITELibrary.objects.create(
+        urn="urn:cite2:hmt:publications.cex.sample"
+    )
+    stream_library(SAMPLE_CEX_PATH, library_obj, chunk_size=2)
+
+    index = Parser(SAMPLE_CEX_PATH, None).apply()
+    entries = [
+        record
+        for record in index.values()
+        if getattr(record, "block", None) == "#!relations"
+    ]
+    assert entries and len(calls) == len(entries)
+
+
+def get_resident_size(path, library_obj, visitors):
+    """
+    Stream `path` and return the bytes its `StreamingVisitor` (collected in
+    `visitors`) still holds on to once the import finished, besides its
+    URN -> pk maps.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        visited, problems = stream_library(path, library_obj, chunk_size=200)
+        assert problems == []
+        gc.collect()
+        resident = tracemalloc.get_traced_memory()[0]
+        pks = visitors.pop().pks
+        gc.collect()
+        return resident - tracemalloc.get_traced_memory()[0], pks
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.django_db
+def test_stream_library_resident_state(tmp_path, monkeypatch):
+    visitors = []
+    finish = StreamingVisitor.finish
+
+    def keeping_finish(self):
+        visitors.append(self)
+        return finish(self)
+
+    monkeypatch.setattr(StreamingVisitor, "finish", keeping_finish)
+    sizes = []
+    for books in [2, 8]:
+        library = SyntheticLibrary(books=books, lines=100, scholia=20, catalogs=2)
+        path = library.write(str(tmp_path / f"synthetic-{books}.cex"))
+        library_obj = CITELibrary.objects.create(
+            urn=f"urn:cite2:hmt:publications.cex.synthetic{books}"
+        )
+        size, pks = get_resident_size(path, library_obj, visitors)
+        counts = library.get_counts()
+        assert len(pks[Line]) == counts["Line"]
+        assert Relation.objects.filter(citelibrary=library_obj).count() == (
+            counts["Relation"]
+        )
+        sizes.append(size)
+        library_obj.delete()
+
+    # Four times the text, but no hierarchy, books or scholia kept around.
+    small, large = sizes
+    assert large < small * 1.5
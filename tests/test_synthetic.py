@@ -0,0 +1,54 @@
+import pytest
+
+from hmt_cite_atlas.library import models
+from hmt_cite_atlas.library.bulk import BulkVisitor
+from hmt_cite_atlas.library.importers import Parser
+from hmt_cite_atlas.library.models import CITELibrary
+from hmt_cite_atlas.library.synthetic import SyntheticLibrary
+
+
+def test_synthetic_library_is_deterministic(tmp_path):
+    first = SyntheticLibrary(books=2, lines=10, scholia=4, seed=1)
+    second = SyntheticLibrary(books=2, lines=10, scholia=4, seed=1)
+    assert list(first.iter_lines()) == list(second.iter_lines())
+    assert list(first.iter_lines()) != list(
+        SyntheticLibrary(books=2, lines=10, scholia=4, seed=2).iter_lines()
+    )
+
+
+def test_synthetic_relations():
+    library = SyntheticLibrary(books=1, lines=10, scholia=14)
+    relations = list(library.iter_relations())[2:-1]
+    objects = [relation.rsplit(":", maxsplit=1)[1] for relation in relations]
+    assert objects == [
+        "1",
+        "1.5",
+        "1.2",
+        "1.9",
+        "1.6-1.8",
+        "1.3",
+        "1.10",
+        "1.7",
+        "1.4",
+        "1.1-1.3",
+        "1.8@ἔθηκε",
+        "1.5",
+        "1.2",
+        "1.9-10",
+    ]
+
+
+@pytest.mark.django_db
+def test_synthetic_library_import(tmp_path):
+    library = SyntheticLibrary(books=3, lines=12, scholia=5, catalogs=2)
+    path = library.write(str(tmp_path / "synthetic.cex"))
+    library_obj = CITELibrary.objects.create(
+        urn="urn:cite2:hmt:publications.cex.synthetic"
+    )
+    index = Parser(path, library_obj).apply()
+    visited, problems = BulkVisitor(index, library_obj).apply()
+
+    assert problems == []
+    assert {
+        name: getattr(models, name).objects.count() for name in library.get_counts()
+    } == library.get_counts()
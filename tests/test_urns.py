@@ -0,0 +1,71 @@
+import pytest
+
+from hmt_cite_atlas.iiif import IIIFResolver
+from hmt_cite_atlas.library.shortcuts import extract_folios_range, munge_urn
+from hmt_cite_atlas.urns import parse_urn
+
+
+ILIAD = "urn:cts:greekLit:tlg0012.tlg001.msA:"
+
+
+def test_parse_cts_urn():
+    urn = parse_urn(f"{ILIAD}1.13-14@μῆνιν")
+    assert urn.scheme == "cts"
+    assert urn.namespace == "greekLit"
+    assert urn.work == "tlg0012.tlg001.msA"
+    assert urn.version == "msA"
+    assert urn.root == ILIAD
+    assert urn.passage == "1.13-14@μῆνιν"
+    assert urn.reference == "1.13-14"
+    assert urn.subreference == "μῆνιν"
+    assert urn.is_range
+    assert urn.endpoints == (("1", "13"), ("14",))
+    assert urn.endpoint_urns == (f"{ILIAD}1.13", f"{ILIAD}14")
+    assert str(urn) == f"{ILIAD}1.13-14@μῆνιν"
+
+
+def test_parse_hierarchy():
+    section = parse_urn("urn:cts:greekLit:tlg5026.msA.hmt:1.2.comment")
+    assert section.parts == ("1", "2", "comment")
+    assert section.ancestor(1) == "urn:cts:greekLit:tlg5026.msA.hmt:1"
+    assert section.parent == "urn:cts:greekLit:tlg5026.msA.hmt:1.2"
+    assert not section.is_range
+
+    catalog = parse_urn(ILIAD)
+    assert (catalog.passage, catalog.parts, catalog.root) == ("", (), ILIAD)
+
+
+def test_parse_cite2_urn():
+    urn = parse_urn("urn:cite2:hmt:vaimg.2017a:VA012RN_0013@0.1,0.2,0.3,0.4")
+    assert (urn.scheme, urn.namespace, urn.work) == ("cite2", "hmt", "vaimg.2017a")
+    assert urn.reference == "VA012RN_0013"
+    assert urn.subreference == "0.1,0.2,0.3,0.4"
+
+
+@pytest.mark.parametrize("value", ["urn:cts:greekLit", "1.1", "foo:bar:baz:qux:1"])
+def test_parse_invalid_urn(value):
+    with pytest.raises(ValueError):
+        parse_urn(value)
+
+
+def test_parse_urn_is_cached():
+    parse_urn.cache_clear()
+    assert parse_urn(f"{ILIAD}1.1") is parse_urn(f"{ILIAD}1.1")
+    info = parse_urn.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_shortcuts():
+    passage = "urn:cts:greekLit:tlg0012.tlg001.msA-folios:12r.1.1-326v.24.804"
+    assert extract_folios_range(passage) == [
+        "urn:cite2:hmt:msA.v1:12r",
+        "urn:cite2:hmt:msA.v1:326v",
+    ]
+    munged = munge_urn(
+        "urn:cts:greekLit:tlg0012.tlg001.msA-folios:",
+        f"{ILIAD}1.5",
+        "urn:cite2:hmt:msA.v1:12r",
+    )
+    assert munged == "urn:cts:greekLit:tlg0012.tlg001.msA-folios:12r.1.5"
+    resolver = IIIFResolver("urn:cite2:hmt:vaimg.2017a:VA012VN_0514")
+    assert resolver.munged_image_path == "VA012VN-0514"
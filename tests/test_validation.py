@@ -0,0 +1,55 @@
+import json
+
+from hmt_cite_atlas.library.validation import validate_library
+from tests.utils import SAMPLE_CEX_PATH
+
+
+ILIAD = "urn:cts:greekLit:tlg0012.tlg001.msA:"
+COMMENTS_ON = "urn:cite2:cite:verbs.v1:commentsOn"
+
+
+# Not marked with `django_db`, so any database access fails these tests.
+
+
+def test_validate_sample():
+    report = validate_library(SAMPLE_CEX_PATH)
+    assert report.ok
+    assert report.records["#!ctsdata"] == 7
+    assert report.patched == {"range": {f"{ILIAD}1.2-3": f"{ILIAD}1.2-1.3"}}
+
+
+def test_validate_problems(sample_cex_path, tmp_path):
+    with open(sample_cex_path, "a", encoding="utf-8") as f:
+        f.write(
+            "\n".join(
+                [
+                    "",
+                    "#!relations",
+                    f"urn:cts:greekLit:tlg5026.msA.hmt:1.1#{COMMENTS_ON}#{ILIAD}9.1",
+                    f"urn:cts:greekLit:tlg5026.msA.hmt:1.2#{COMMENTS_ON}#{ILIAD}1.1-2.1",
+                    f"urn:cts:greekLit:tlg5026.msA.hmt:1.1#{COMMENTS_ON}",
+                    "#!ctsdata",
+                    f"{ILIAD}1.1#Μῆνιν again",
+                    "",
+                ]
+            )
+        )
+
+    report = validate_library(sample_cex_path)
+    assert not report.ok
+    assert report.unresolved["#!relations"][COMMENTS_ON] == {f"{ILIAD}9.1": 1}
+    assert report.duplicates == {"#!ctsdata": [f"{ILIAD}1.1"]}
+    assert [(entry["block"], entry["error"]) for entry in report.malformed] == [
+        ("#!relations", f"AssertionError: Range spans books: {ILIAD}1.1-2.1"),
+        (
+            "#!relations",
+            "ValueError: Expected a subject, verb and object URN: "
+            f"urn:cts:greekLit:tlg5026.msA.hmt:1.1#{COMMENTS_ON}",
+        ),
+    ]
+    summary = f"#!relations {COMMENTS_ON}: 1 unresolved URNs (1 references)"
+    assert summary in report.report()
+
+    path = tmp_path / "report.json"
+    report.write(str(path))
+    assert json.loads(path.read_text())["duplicates"] == {"#!ctsdata": [f"{ILIAD}1.1"]}
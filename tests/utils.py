@@ -0,0 +1,16 @@
+import os
+
+from django.db import connection
+
+
+SAMPLE_CEX_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "sample.cex")
+
+
+def get_query_plan(queryset):
+    """
+    The SQLite query plan of `queryset`, as one string.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return " ".join(row[-1] for row in cursor.fetchall())